@@ -1,3 +1,55 @@
-from .namespace import NameSpace, list_config_files
-from .parser import config_parser, get_config, registry_parser
-from .registry import set_registry_file, get_registered_variable
+import importlib
+
+# the public functions and classes of this package and the modules that define them
+# modules are only imported when one of their names is accessed first, so that `import yamlparser` does not import yaml or argparse
+_exports = {
+    "NameSpace": "namespace",
+    "AttributePath": "namespace",
+    "list_config_files": "namespace",
+    "get_loaded_file_count": "namespace",
+    "reset_loaded_file_count": "namespace",
+    "config_parser": "parser",
+    "get_config": "parser",
+    "use_config": "parser",
+    "get_reloader": "parser",
+    "registry_parser": "parser",
+    "set_registry_file": "registry",
+    "get_registered_variable": "registry",
+    "set_yaml_backend": "backend",
+    "get_yaml_backend": "backend",
+    "available_yaml_backends": "backend",
+    "set_array_storage": "arrays",
+    "get_array_storage": "arrays",
+    "as_numpy": "arrays",
+    "FileCache": "cache",
+    "get_file_cache": "cache",
+    "invalidate_resource_index": "resources",
+    "FrozenNameSpace": "frozen",
+    "ScanIndex": "scanindex",
+    "get_scan_index_file": "scanindex",
+    "Reloader": "reloader",
+    "Sweep": "sweep",
+    "prefetch_files": "prefetch",
+    "aprefetch_files": "prefetch",
+    "use_prefetched": "prefetch",
+    "Collector": "instrumentation",
+    "collect_stats": "instrumentation",
+    "stats": "instrumentation",
+}
+
+_modules = {"arrays", "backend", "bench", "cache", "formatting", "frozen", "instrumentation", "namespace", "parser", "prefetch", "registry", "reloader", "resources", "scanindex", "scanner", "snapshot", "sweep"}
+
+__all__ = list(_exports)
+
+def __getattr__(name):
+    if name in _exports:
+        value = getattr(importlib.import_module("." + _exports[name], __name__), name)
+    elif name in _modules:
+        value = importlib.import_module("." + name, __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,109 @@
+import array
+import copy
+import sys
+
+# the storage of long homogeneous numeric lists: None for plain lists, "array" or "numpy", see set_array_storage
+_storage = None
+
+# lists with fewer elements are always stored as plain lists
+_min_size = 1024
+
+# the array types for the element types of homogeneous lists
+_typecodes = {float: "d", int: "q"}
+_dtypes = {"d": "float64", "q": "int64"}
+
+def set_array_storage(storage="array", min_size=1024):
+    """Selects process-wide how long homogeneous numeric lists are stored when configurations are loaded or values are set.
+
+    Lists that contain only floats or only integers (that fit into 64 bits) are stored as `array.array` or as NumPy arrays, which need a fraction of the memory of plain lists and are loaded, copied and hashed much faster.
+    :func:`NameSpace.dict` and :func:`NameSpace.dump` convert arrays back into lists, and :func:`as_numpy` exports them to NumPy without copying.
+    Lists of mixed types, e.g., `[1, 2.5]`, and lists inside lists are not converted, so that all values keep their types.
+    Parsed files are cached with the converted lists, so that loading them again only copies the arrays.
+
+    Parameters:
+    storage: str or None
+    One of "array", "numpy", "auto" or None.
+    "auto" selects NumPy if it is installed, and falls back to "array" otherwise; None disables the conversion (the default).
+
+    min_size: int
+    Only lists with at least this number of elements are converted
+
+    Raises: ValueError
+    If the storage is unknown, or NumPy is selected but not installed
+    """
+    global _storage, _min_size
+    if storage not in ("array", "numpy", "auto", None):
+        raise ValueError(f"The array storage '{storage}' is not known; possible storages are: array, numpy, auto or None")
+    if storage in ("numpy", "auto"):
+        try:
+            import numpy
+        except ImportError:
+            if storage == "numpy":
+                raise ValueError("The array storage 'numpy' requires NumPy to be installed")
+            storage = "array"
+    _storage = storage
+    _min_size = min_size
+
+def get_array_storage():
+    """Returns the storage of long homogeneous numeric lists that is currently active, see :func:`set_array_storage`"""
+    return _storage
+
+def _array_settings():
+    """Returns the current storage and minimum size, which change the parsed contents of configuration files"""
+    return _storage, _min_size
+
+def is_array(value):
+    """Checks whether the given value is an `array.array` or a NumPy array"""
+    if isinstance(value, array.array):
+        return True
+    numpy = sys.modules.get("numpy")
+    return numpy is not None and isinstance(value, numpy.ndarray)
+
+def as_numpy(value):
+    """Returns the given numeric list or array as NumPy array.
+    Arrays that are stored via :func:`set_array_storage` are not copied, so that modifications of the returned array are visible in the configuration."""
+    import numpy
+    if isinstance(value, array.array):
+        return numpy.frombuffer(value, dtype=_dtypes[value.typecode])
+    return numpy.asarray(value)
+
+def copy_array(value):
+    """Returns a copy of the given array"""
+    return copy.copy(value)
+
+def compact_list(value):
+    """Returns the given list as array if it is long enough and contains only floats or only integers, and the value itself otherwise"""
+    if _storage is None or type(value) is not list or len(value) < _min_size:
+        return value
+    types = set(map(type, value))
+    if len(types) != 1:
+        return value
+    typecode = _typecodes.get(types.pop())
+    if typecode is None:
+        return value
+    try:
+        compact = array.array(typecode, value)
+    except OverflowError:
+        return value
+    if _storage == "numpy":
+        import numpy
+        # the NumPy array uses the buffer of the array without copying
+        return numpy.frombuffer(compact, dtype=_dtypes[typecode])
+    return compact
+
+def compact_content(content):
+    """Converts all lists that are values of the given (nested) dictionary via :func:`compact_list`, including dictionaries inside lists, and returns the content"""
+    if _storage is None or not isinstance(content, dict):
+        return content
+    for key, value in content.items():
+        if isinstance(value, dict):
+            compact_content(value)
+        elif isinstance(value, list):
+            compact = compact_list(value)
+            if compact is not value:
+                content[key] = compact
+            else:
+                for element in value:
+                    if isinstance(element, dict):
+                        compact_content(element)
+    return content
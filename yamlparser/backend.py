@@ -0,0 +1,70 @@
+import yaml
+
+# the available YAML backends, as (loader, dumper) pairs
+# the dumpers are the non-safe variants, since this is what yaml.dump uses by default
+_backends = {
+    "python": (yaml.SafeLoader, yaml.Dumper),
+}
+if getattr(yaml, "__with_libyaml__", False):
+    _backends["c"] = (yaml.CSafeLoader, yaml.CDumper)
+
+def _default_backend():
+    return "c" if "c" in _backends else "python"
+
+_backend = _default_backend()
+
+def available_yaml_backends():
+    """Returns the list of YAML backends that can be used in this environment.
+    The "python" backend is always available, the "c" backend only when PyYAML was compiled with libyaml support."""
+    return list(_backends.keys())
+
+def set_yaml_backend(backend="auto"):
+    """Selects the YAML backend that is used process-wide for loading and dumping configurations.
+
+    Parameters:
+    backend: str
+    One of "c", "python" or "auto".
+    "auto" selects the libyaml-based "c" backend if available, and falls back to "python" otherwise.
+    """
+    global _backend
+    if backend == "auto":
+        _backend = _default_backend()
+    else:
+        _backend = _check_backend(backend)
+
+def get_yaml_backend():
+    """Returns the name of the YAML backend that is currently active."""
+    return _backend
+
+def _check_backend(backend):
+    if backend is None:
+        return _backend
+    if backend == "auto":
+        return _default_backend()
+    if backend not in _backends:
+        raise ValueError(f"The YAML backend '{backend}' is not available; possible backends are: {available_yaml_backends()}")
+    return backend
+
+def load_yaml(stream, backend=None):
+    """Loads the given YAML stream (a string or an open file) with the given or the currently active backend.
+
+    Returns:
+    The loaded content, or an empty dictionary if the stream is empty
+    """
+    loader = _backends[_check_backend(backend)][0]
+    return yaml.load(stream, Loader=loader) or {}
+
+def parse_yaml(stream, backend=None):
+    """Parses the given YAML stream (a string or an open file) with the given or the currently active backend.
+
+    Returns:
+    An iterator over the parser events of the stream
+    """
+    loader = _backends[_check_backend(backend)][0]
+    return yaml.parse(stream, Loader=loader)
+
+def dump_yaml(data, backend=None, **kwargs):
+    """Dumps the given data into a YAML string with the given or the currently active backend.
+    All further keyword arguments are passed to `yaml.dump`."""
+    dumper = _backends[_check_backend(backend)][1]
+    return yaml.dump(data, Dumper=dumper, **kwargs)
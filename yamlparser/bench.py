@@ -0,0 +1,402 @@
+"""Benchmarks of the main operations of this package on synthetic configurations.
+
+Run all benchmarks and store the results:
+
+    python -m yamlparser.bench run --sizes small medium --output results.json
+
+Compare the results with a stored baseline:
+
+    python -m yamlparser.bench compare baseline.json results.json --threshold 0.2
+"""
+import copy
+import gc
+import hashlib
+import json
+import operator
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from . import arrays, backend, cache, namespace, parser, registry, scanner
+
+# the parameters of the synthetic configurations for each size
+sizes = {
+    "tiny": dict(width=4, depth=2, list_size=2, fan_out=2, placeholders=0.1, registry=0.05, files=10),
+    "small": dict(width=10, depth=2, list_size=5, fan_out=5, placeholders=0.1, registry=0.05, files=100),
+    "medium": dict(width=20, depth=3, list_size=10, fan_out=10, placeholders=0.1, registry=0.05, files=500),
+    "large": dict(width=30, depth=3, list_size=50, fan_out=20, placeholders=0.1, registry=0.05, files=2000),
+}
+
+
+def generate_config(width, depth, list_size=0, placeholders=0., registry=0., prefix="", **kwargs):
+    """Generates a nested dictionary with the given number of keys per level and the given number of levels.
+
+    Parameters:
+    width: int
+    The number of keys in each (sub-)dictionary, half of them are sub-dictionaries as long as the depth is not reached
+
+    depth: int
+    The number of nested levels
+
+    list_size: int
+    The size of one list value per dictionary; 0 to disable lists
+
+    placeholders: float
+    The fraction of string values that contain a `{KEY}` placeholder, which refer to other keys of the configuration
+
+    registry: float
+    The fraction of values that are references to the registry, as `{"registry": KEY}`
+
+    Returns: dict
+    The generated configuration, where keys are deterministic and values depend only on the parameters
+    """
+    config = {}
+    for i in range(width):
+        key = f"key{i}"
+        # distribute placeholders and registry references deterministically
+        position = (i + 1) / width
+        if depth > 1 and i % 2:
+            config[key] = generate_config(width, depth-1, list_size, placeholders, registry, prefix+key+".")
+        elif registry and (i * 7919) % 1000 < registry * 1000:
+            config[key] = {"registry": f"BENCH_KEY_{i % 10}"}
+        elif placeholders and (i * 104729) % 1000 < placeholders * 1000 and i > 1:
+            # refer to the previous key that is no sub-dictionary
+            config[key] = f"value of {{{prefix}key{i-2}}} at {position}"
+        elif i % 3 == 0:
+            config[key] = i
+        elif i % 3 == 1:
+            config[key] = float(i) / 3
+        else:
+            config[key] = f"value{i}"
+    if list_size:
+        config["list"] = list(range(list_size))
+    return config
+
+
+def write_config_tree(directory, width, depth, fan_out, **kwargs):
+    """Writes a main configuration file that references `fan_out` sub-configuration files into the given directory.
+
+    Returns: str
+    The path of the main configuration file
+    """
+    main = {"name": "benchmark"}
+    for i in range(fan_out):
+        sub_config = os.path.join(directory, f"sub{i}.yaml")
+        with open(sub_config, "w") as f:
+            f.write(backend.dump_yaml({f"sub{i}": generate_config(width, depth, **kwargs)}))
+        main[f"sub{i}"] = {"yaml": sub_config, "key0": -i}
+    main_file = os.path.join(directory, "main.yaml")
+    with open(main_file, "w") as f:
+        f.write(backend.dump_yaml(main))
+    return main_file
+
+
+def write_collection(directory, files, width, depth, **kwargs):
+    """Writes the given number of configuration files into sub-directories of the given directory, to be scanned for registry keys"""
+    for i in range(files):
+        subdirectory = os.path.join(directory, f"dir{i % 10}")
+        os.makedirs(subdirectory, exist_ok=True)
+        with open(os.path.join(subdirectory, f"config{i}.yaml"), "w") as f:
+            f.write(backend.dump_yaml(generate_config(width, depth, registry=0.2, **{k:v for k,v in kwargs.items() if k != "registry"})))
+
+
+def _namespace(params):
+    return namespace.NameSpace(generate_config(**params), registry_key=None)
+
+
+def _updates(params, count=10000):
+    """Returns a namespace and a list of `count` dotted keys of its deepest values, as applied by command line overrides"""
+    ns = _namespace(params)
+    keys = sorted(ns.attributes(), key=lambda k: -k.count("."))
+    keys = keys[:max(len(keys)//4, 1)]
+    return ns, [keys[i % len(keys)] for i in range(count)]
+
+
+def _modified(params):
+    """Returns a namespace with a computed fingerprint, in which one of the deepest values has been modified afterward, and an unmodified clone"""
+    ns, keys = _updates(params, 1)
+    ns.fingerprint()
+    clone = ns.clone()
+    ns.set(keys[0], "modified")
+    return ns, clone
+
+
+def _sweep(params, count=100):
+    """Returns a namespace and `count` values for two of its deepest keys"""
+    ns, keys = _updates(params)
+    return ns, {keys[0]: [f"value{i}" for i in range(count)], keys[-1]: [i for i in range(count)]}
+
+
+def _clone_variants(ns, parameters):
+    """Generates the variants of a sweep by cloning, modifying and formatting the entire namespace for each variant"""
+    for values in zip(*parameters.values()):
+        variant = ns.clone()
+        for key, value in zip(parameters, values):
+            variant.set(key, value)
+        variant.format_self()
+
+
+def _with_storage(storage, function):
+    """Calls the function with the given array storage, see :func:`set_array_storage`"""
+    previous = arrays._array_settings()
+    arrays.set_array_storage(storage)
+    try:
+        return function()
+    finally:
+        arrays.set_array_storage(*previous)
+
+
+def _deep_reads(params, count=10000):
+    """Returns a function that reads one of the deepest values `count` times via attribute access, e.g., `ns.key1.key1.key2`"""
+    read = operator.attrgetter(".".join(["key1"] * (params["depth"]-1) + ["key2"]))
+    def run(ns):
+        for _ in range(count):
+            read(ns)
+    return run
+
+
+def _scan_events(path, registry_key="registry"):
+    """Scans the given file for registry keys via the YAML event stream, see :func:`scan_registry_keys`"""
+    with open(path) as f:
+        return [(value, attribute) for attribute, value in scanner.scan_registry_keys(f, registry_key)]
+
+
+def _scan_namespace(path, registry_key="registry"):
+    """The previous scan for registry keys, which loads the file into a NameSpace and filters its attributes"""
+    attributes = namespace.NameSpace(path, modifiable=False, registry_key=None).attributes()
+    return [(value, attribute) for attribute, value in attributes.items() if attribute.split(".")[-1] == registry_key]
+
+
+def _recursive_set(ns, key, value):
+    """The previous implementation of :func:`NameSpace.set`, which splits the key and joins the remainder again for each level"""
+    keys = key.split(".")
+    if len(keys) > 1:
+        _recursive_set(getattr(ns, keys[0]), ".".join(keys[1:]), value)
+    else:
+        ns[key] = value
+
+
+def _benchmarks(params, directory):
+    """Returns the benchmarks for the given size parameters as {name: (setup, run)}, where `run(setup())` is timed"""
+    config = generate_config(**params)
+    os.makedirs(os.path.join(directory, "tree"))
+    main_file = write_config_tree(os.path.join(directory, "tree"), **params)
+    collection = os.path.join(directory, "collection")
+    # the scanned files are smaller than the main configuration, but many
+    write_collection(collection, **dict(params, depth=max(params["depth"]-1, 1)))
+    registry_file = os.path.join(directory, "registry.yaml")
+    with open(registry_file, "w") as f:
+        f.write(backend.dump_yaml({f"BENCH_KEY_{i}": f"registered{i}" for i in range(10)}))
+    registry.set_registry_file(registry_file)
+    index_file = os.path.join(directory, "scan.json")
+    flat_file = os.path.join(directory, "flat.yaml")
+    namespace.NameSpace(config, registry_key=None).save(flat_file)
+    # long numeric lists, which can be stored as arrays
+    numeric_file = os.path.join(directory, "numeric.yaml")
+    size = params["list_size"] * 1000
+    namespace.NameSpace({"weights": [i / 7 for i in range(size)], "schedule": list(range(size))}).save(numeric_file)
+    load_numeric = lambda: namespace.NameSpace(numeric_file)
+    deep_reads = _deep_reads(params)
+    # a larger file with many registry keys, which is scanned for them
+    scan_file = os.path.join(directory, "scan.yaml")
+    with open(scan_file, "w") as f:
+        f.write(backend.dump_yaml(generate_config(**dict(params, depth=params["depth"]+1, registry=0.2))))
+    # options for the fast command line path, which set a few of the keys
+    overrides = [main_file, "--sub0.key0", "1", "--name", "changed"]
+
+    def uncached():
+        cache.get_file_cache().clear()
+
+    def read(yaml_backend):
+        with open(flat_file) as f:
+            return backend.load_yaml(f, yaml_backend)
+
+    # a chain of placeholders, where each value refers to the next key
+    chain = params["width"] ** 2
+    chained = {f"chain{i}": f"<{{chain{i+1}}}>" for i in range(chain)}
+    chained[f"chain{chain}"] = "end"
+
+    benchmarks = {
+        "NameSpace.update": (lambda: None, lambda _: namespace.NameSpace(config)),
+        "NameSpace.attributes": (lambda: _namespace(params), lambda ns: ns.attributes()),
+        "NameSpace.dict": (lambda: _namespace(params), lambda ns: ns.dict()),
+        "NameSpace.format_self": (lambda: _namespace(params), lambda ns: ns.format_self()),
+        "NameSpace.clone": (lambda: _namespace(params), lambda ns: ns.clone()),
+        "NameSpace.compile": (lambda: _namespace(params), lambda ns: ns.compile()),
+        "NameSpace.read": (lambda: _namespace(params), deep_reads),
+        "NameSpace.read.compiled": (lambda: _namespace(params).compile(), deep_reads),
+        # the retained memory of the trees, which own copies of the lists of the configuration
+        "NameSpace.tree": (lambda: None, lambda _: namespace.NameSpace(copy.deepcopy(config), modifiable=False, registry_key=None)),
+        "NameSpace.tree.compiled": (lambda: None, lambda _: namespace.NameSpace(copy.deepcopy(config), registry_key=None).compile()),
+        "NameSpace.dump": (lambda: _namespace(params), lambda ns: ns.dump()),
+        "NameSpace.set": (lambda: _updates(params), lambda args: [args[0].set(key, 1) for key in args[1]]),
+        "NameSpace.set.recursive": (lambda: _updates(params), lambda args: [_recursive_set(args[0], key, 1) for key in args[1]]),
+        "NameSpace.get": (lambda: _updates(params), lambda args: [args[0].get(key) for key in args[1]]),
+        "NameSpace.sweep": (lambda: _sweep(params), lambda args: list(args[0].sweep(args[1], mode="zip"))),
+        "NameSpace.sweep.clone": (lambda: _sweep(params), lambda args: _clone_variants(*args)),
+        "NameSpace.fingerprint": (lambda: _namespace(params), lambda ns: ns.fingerprint()),
+        "NameSpace.fingerprint.dump": (lambda: _namespace(params), lambda ns: hashlib.sha256(ns.dump().encode()).hexdigest()),
+        "NameSpace.fingerprint.modified": (lambda: _modified(params), lambda args: args[0].fingerprint()),
+        "NameSpace.diff": (lambda: _modified(params), lambda args: args[0].diff(args[1])),
+        "load.uncached": (uncached, lambda _: namespace.NameSpace(flat_file)),
+        "load.cached": (lambda: namespace.NameSpace(flat_file), lambda _: namespace.NameSpace(flat_file)),
+        "load.sub_configs": (uncached, lambda _: namespace.NameSpace(main_file)),
+        "load.sub_configs.concurrent": (uncached, lambda _: namespace.NameSpace(main_file, jobs=8)),
+        "load.numeric": (uncached, lambda _: load_numeric()),
+        "load.numeric.array": (uncached, lambda _: _with_storage("array", load_numeric)),
+        "load.numeric.cached": (load_numeric, lambda _: load_numeric()),
+        "load.numeric.cached.array": (lambda: _with_storage("array", load_numeric), lambda _: _with_storage("array", load_numeric)),
+        "NameSpace.clone.numeric": (load_numeric, lambda ns: ns.clone()),
+        "NameSpace.clone.numeric.array": (lambda: _with_storage("array", load_numeric), lambda ns: ns.clone()),
+        "load.select": (uncached, lambda _: namespace.NameSpace(flat_file, select=["key0", "key1"])),
+        "load.sections": (uncached, lambda _: namespace.NameSpace(flat_file, lazy="sections").key1),
+        "load.lazy": (uncached, lambda _: namespace.NameSpace(main_file, lazy=True).sub0),
+        "config_parser": (uncached, lambda _: parser.config_parser(command_line_options=overrides, store_config=False)),
+        # the configuration tree has `fan_out` times the keys of the generated configuration
+        "config_parser.cached": (lambda: namespace.NameSpace(main_file), lambda _: parser.config_parser(command_line_options=overrides, store_config=False)),
+        "config_parser.snapshot": (lambda: parser.config_parser(command_line_options=overrides, store_config=False, snapshot_dir=os.path.join(directory, "snapshots")), lambda _: parser.config_parser(command_line_options=overrides, store_config=False, snapshot_dir=os.path.join(directory, "snapshots"))),
+        "registry_content": (registry.invalidate_registry, lambda _: registry.registry_content()),
+        "registry.lookup": (lambda: registry.get_registered_variable("BENCH_KEY_0"), lambda _: [registry.get_registered_variable(f"BENCH_KEY_{i%10}") for i in range(1000)]),
+        "registry.scan": (uncached, lambda _: _scan_events(scan_file)),
+        "registry.scan.namespace": (uncached, lambda _: _scan_namespace(scan_file)),
+        "get_required_registration": (uncached, lambda _: namespace.get_required_registration([collection])),
+        "get_required_registration.parallel": (uncached, lambda _: namespace.get_required_registration([collection], jobs=0)),
+        "get_required_registration.index": (lambda: namespace.get_required_registration([collection], index_file=index_file), lambda _: namespace.get_required_registration([collection], index_file=index_file)),
+        "format.chain": (lambda: namespace.NameSpace(chained), lambda ns: ns.format_self()),
+    }
+    for yaml_backend in backend.available_yaml_backends():
+        benchmarks[f"backend.{yaml_backend}"] = (lambda: None, lambda _, yaml_backend=yaml_backend: read(yaml_backend))
+    return benchmarks
+
+
+def measure(setup, run, repeat=5):
+    """Measures the time and the memory of `run(setup())`.
+
+    The time is measured `repeat` times without memory tracing, the memory in one additional traced run.
+    The retained memory is the memory that is still allocated when `run` returns, while its result is kept, e.g., the size of the created namespace; garbage is collected before measuring it.
+    Setup is excluded from all measurements.
+
+    Returns: dict
+    With keys `median`, `min` (seconds), `peak_memory` and `retained_memory` (bytes)
+    """
+    times = []
+    for _ in range(repeat):
+        argument = setup()
+        gc.collect()
+        start = time.perf_counter()
+        run(argument)
+        times.append(time.perf_counter() - start)
+    argument = setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = run(argument)
+        peak = tracemalloc.get_traced_memory()[1]
+        # namespaces refer to their parents, so that discarded intermediate results are only freed by the garbage collector
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+    return dict(median=statistics.median(times), min=min(times), peak_memory=peak, retained_memory=retained)
+
+
+def run_benchmarks(size_names=("small",), names=None, repeat=5, verbose=False):
+    """Runs the benchmarks for the given sizes.
+
+    Parameters:
+    size_names: [str]
+    The names of the sizes to run, see `sizes`
+
+    names: [str] or None
+    If given, only benchmarks whose names start with any of the given names are run
+
+    repeat: int
+    The number of timed repetitions per benchmark
+
+    Returns: dict
+    The results as {"meta": {...}, "results": {benchmark: {size: measurement}}}, see :func:`measure`
+    """
+    results = {}
+    registry_file = registry.get_registry_file()
+    try:
+        for size in size_names:
+            params = sizes[size]
+            with tempfile.TemporaryDirectory() as directory:
+                for name, (setup, run) in _benchmarks(params, directory).items():
+                    if names and not any(name.startswith(n) for n in names):
+                        continue
+                    results.setdefault(name, {})[size] = measurement = measure(setup, run, repeat)
+                    if verbose:
+                        print(f"{name:40s} {size:8s} {measurement['median']*1000:10.2f} ms {measurement['peak_memory']/1024:10.0f} KiB {measurement['retained_memory']/1024:10.0f} KiB")
+    finally:
+        registry.set_registry_file(registry_file)
+        cache.get_file_cache().clear()
+    meta = dict(python=sys.version.split()[0], platform=platform.platform(), backend=backend.get_yaml_backend(), repeat=repeat)
+    return dict(meta=meta, results=results)
+
+
+def compare(baseline, current, threshold=0.2):
+    """Compares the median times and the peak and retained memory of two results of :func:`run_benchmarks`.
+
+    Parameters:
+    threshold: float
+    The relative increase that is reported as regression
+
+    Returns: [(benchmark, size, metric, baseline, current, ratio, regression)]
+    All measurements that are present in both results, sorted by benchmark and size, where `ratio` is current/baseline; metrics that are missing in older results are skipped
+    """
+    rows = []
+    for name, by_size in sorted(current["results"].items()):
+        for size, measurement in sorted(by_size.items()):
+            reference = baseline["results"].get(name, {}).get(size)
+            if reference is None:
+                continue
+            for metric in ("median", "peak_memory", "retained_memory"):
+                if metric not in reference or metric not in measurement:
+                    continue
+                ratio = measurement[metric] / reference[metric] if reference[metric] else float("inf") if measurement[metric] else 1.
+                rows.append((name, size, metric, reference[metric], measurement[metric], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main(command_line_options=None):
+    """The command line interface of the benchmarks, see the module documentation"""
+    import argparse
+    command_parser = argparse.ArgumentParser(description="Benchmarks of yamlparser on synthetic configurations")
+    commands = command_parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="Run the benchmarks")
+    run.add_argument("--sizes", nargs="+", choices=list(sizes), default=["small"], help="The sizes of the synthetic configurations")
+    run.add_argument("--filter", nargs="+", help="Only run benchmarks that start with any of the given names")
+    run.add_argument("--repeat", type=int, default=5, help="The number of timed repetitions")
+    run.add_argument("--output", "-o", help="Write the results to this JSON file")
+    diff = commands.add_parser("compare", help="Compare two results")
+    diff.add_argument("baseline", help="The JSON file with the baseline results")
+    diff.add_argument("current", help="The JSON file with the current results")
+    diff.add_argument("--threshold", type=float, default=0.2, help="The relative increase that counts as regression")
+    args = command_parser.parse_args(command_line_options)
+
+    if args.command == "run":
+        results = run_benchmarks(args.sizes, args.filter, args.repeat, verbose=True)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=2)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = 0
+    for name, size, metric, reference, measurement, ratio, regression in compare(baseline, current, args.threshold):
+        regressions += regression
+        print(f"{name:40s} {size:8s} {metric:12s} {reference:14.6g} {measurement:14.6g} {ratio:7.2f}x{'  REGRESSION' if regression else ''}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
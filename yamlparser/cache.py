@@ -0,0 +1,84 @@
+import collections
+import copy
+import os
+import threading
+
+class FileCache:
+    """A bounded least-recently-used cache of parsed configuration files.
+
+    Entries are keyed by the resolved path of the file and are invalidated when the modification time or the size of the file changes.
+    The cached documents are never handed out directly; each lookup returns a deep copy, so that modifications of the returned content cannot corrupt the cache.
+
+    Parameters:
+    maxsize: int
+    The maximum number of files to keep in the cache. Use 0 to disable caching.
+    """
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, path, loader, variant=None):
+        """Returns the content of the given file, which is parsed with `loader(path)` if it is not cached or outdated.
+        The `variant` distinguishes contents that are parsed differently from the same file; a cached content of another variant is replaced."""
+        path = os.path.realpath(path)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size, variant)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == signature:
+                self.hits += 1
+                self._entries.move_to_end(path)
+                return copy.deepcopy(entry[1])
+            self.misses += 1
+
+        content = loader(path)
+        if self.maxsize > 0:
+            with self._lock:
+                self._entries[path] = (signature, content)
+                self._entries.move_to_end(path)
+                self._evict()
+        return copy.deepcopy(content)
+
+    def invalidate(self, path):
+        """Removes the given file from the cache, if present"""
+        with self._lock:
+            self._entries.pop(os.path.realpath(path), None)
+
+    def resize(self, maxsize):
+        """Changes the maximum number of cached files, evicting the least recently used ones if required"""
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def clear(self):
+        """Removes all entries from the cache and resets the statistics"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        """Returns the cache statistics as a dictionary with keys `hits`, `misses`, `size` and `maxsize`"""
+        with self._lock:
+            return dict(hits=self.hits, misses=self.misses, size=len(self._entries), maxsize=self.maxsize)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, path):
+        return os.path.realpath(path) in self._entries
+
+    def _evict(self):
+        while len(self._entries) > max(self.maxsize, 0):
+            self._entries.popitem(last=False)
+
+
+# the process-wide cache of parsed configuration files
+_file_cache = FileCache()
+
+def get_file_cache():
+    """Returns the process-wide cache of parsed configuration files, see :class:`FileCache`"""
+    return _file_cache
@@ -0,0 +1,131 @@
+import re
+
+from .arrays import is_array
+
+# matches {KEY} placeholders, where KEY cannot contain braces
+_placeholder = re.compile(r"\{([^{}]*)\}")
+
+class Formatter:
+    """Resolves `{KEY}` placeholders in the values of a flattened configuration.
+
+    All placeholders of a value are scanned once, and the referenced keys that hold strings (or lists) themselves form a dependency graph.
+    Values are resolved in topological order of this graph, so chained references (`{a}` -> `{b}` -> value) are resolved independently of the order of the keys.
+
+    A placeholder inside the value of a key `n1.n2.key` is looked up as `KEY`, then `n1.KEY`, then `n1.n2.KEY`, and the first existing key is used.
+    Placeholders that do not match any key are left untouched.
+
+    Parameters:
+    attributes: dict
+    The flattened configuration, as returned by :func:`NameSpace.attributes`
+    """
+    def __init__(self, attributes):
+        self.attributes = attributes
+        self.resolved = {}
+        # the keys referenced by each placeholder of a value, as {KEY: key}
+        self._references = {}
+
+    def _lookup(self, name, scope):
+        """Returns the key that the placeholder name refers to in the given scope, or None"""
+        if name in self.attributes:
+            return name
+        prefix = ""
+        for part in scope:
+            prefix += part + "."
+            if prefix + name in self.attributes:
+                return prefix + name
+        return None
+
+    def _scan(self, value, scope, references):
+        """Collects the keys of all placeholders in the given string or (nested) list"""
+        if isinstance(value, list):
+            for element in value:
+                self._scan(element, scope, references)
+        elif isinstance(value, str):
+            for name in _placeholder.findall(value):
+                if name not in references:
+                    key = self._lookup(name, scope)
+                    if key is not None:
+                        references[name] = key
+
+    def references(self, key):
+        """Returns the placeholders of the value stored for the given key and the keys that they refer to"""
+        references = self._references.get(key)
+        if references is None:
+            references = {}
+            self._scan(self.attributes[key], key.split(".")[:-1], references)
+            self._references[key] = references
+        return references
+
+    def _dependencies(self, references):
+        """Returns the referenced keys that need to be resolved themselves"""
+        return [key for key in references.values() if key not in self.resolved and isinstance(self.attributes[key], (str, list))]
+
+    def _substitute(self, value, references):
+        if isinstance(value, list):
+            return [self._substitute(s, references) if isinstance(s, (str, list)) else s for s in value]
+        if not references:
+            return value
+
+        def replace(match):
+            key = references.get(match.group(1))
+            if key is None:
+                return match.group(0)
+            value = self.resolved.get(key, self.attributes[key])
+            # arrays are formatted like lists
+            return str(value.tolist() if is_array(value) else value)
+
+        return _placeholder.sub(replace, value)
+
+    def resolve(self, key):
+        """Returns the fully formatted value for the given key, resolving all values that it depends on first
+
+        Raises: ValueError
+        If the references contain a cycle
+        """
+        # iterative depth-first search, which resolves the dependency graph in topological order
+        stack = [key]
+        # the keys that are currently being resolved, in the order of the dependency chain
+        visiting = {}
+        while stack:
+            current = stack[-1]
+            if current in self.resolved:
+                stack.pop()
+                continue
+            value = self.attributes[current]
+            if not isinstance(value, (str, list)):
+                self.resolved[current] = value
+                stack.pop()
+                continue
+            references = self.references(current)
+            pending = self._dependencies(references) if current not in visiting else []
+            if pending:
+                visiting[current] = True
+                for dependency in pending:
+                    if dependency in visiting:
+                        cycle = list(visiting)
+                        cycle = cycle[cycle.index(dependency):] + [dependency]
+                        raise ValueError(f"Could not format the configuration due to cyclic references: {' -> '.join(cycle)}")
+                    stack.append(dependency)
+            else:
+                self.resolved[current] = self._substitute(value, references)
+                visiting.pop(current, None)
+                stack.pop()
+        return self.resolved[key]
+
+    def resolve_all(self):
+        """Resolves all values and returns a dictionary of all keys whose values have changed"""
+        changed = {}
+        for key, value in self.attributes.items():
+            if isinstance(value, (str, list)):
+                resolved = self.resolve(key)
+                if resolved != value:
+                    changed[key] = resolved
+        return changed
+
+    def format(self, value, scope=()):
+        """Formats the given string or (nested) list of strings, using the fully formatted values of all referenced keys"""
+        references = {}
+        self._scan(value, scope, references)
+        for key in references.values():
+            self.resolve(key)
+        return self._substitute(value, references)
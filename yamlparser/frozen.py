@@ -0,0 +1,188 @@
+import keyword
+import threading
+
+from .backend import dump_yaml
+from .formatting import Formatter
+from .arrays import is_array
+from .namespace import NameSpace, _ignore_keys, _copy_content
+
+class FrozenNameSpace:
+    """A compact and immutable representation of a :class:`NameSpace`, which is created via :func:`NameSpace.compile`.
+
+    For each distinct set of keys, a dedicated subclass with `__slots__` is generated, so that values are stored without a `__dict__` and reading them is a plain slot access.
+    Sub-namespaces are compiled into nested `FrozenNameSpace` objects, and lists are stored as tuples.
+    Hence, frozen namespaces are hashable and can be compared efficiently.
+
+    The read API is identical to the :class:`NameSpace`: values can be accessed via indexing or attribution, and :func:`attributes`, :func:`dict` and :func:`dump` convert tuples back into lists.
+    Keys that are no valid identifiers or that collide with methods of this class can only be accessed via indexing.
+    A modifiable copy can be obtained via :func:`clone`.
+    """
+    __slots__ = ("_extra", "_hash", "_memo")
+
+    # the keys of this class, which are defined in the generated subclasses
+    _keys = ()
+    # the keys that are stored in slots
+    _slotted = frozenset()
+
+    def __new__(cls, *args, **kwargs):
+        raise TypeError("FrozenNameSpace objects cannot be created directly, please use NameSpace.compile()")
+
+    def keys(self):
+        """Returns the list of keys in this namespace"""
+        return dict.fromkeys(self._keys).keys()
+
+    def items(self):
+        """Returns (key, value) pairs of this namespace, in the order of the keys"""
+        return [(key, self[key]) for key in self._keys]
+
+    def attributes(self):
+        """Returns a list of attributes of this namespace including all sub-namespaces, see :func:`NameSpace.attributes`"""
+        return _copy_content(self._attribute_index())
+
+    def _memoized(self):
+        """Returns the dictionary of memoized results, which is created on first use"""
+        if self._memo is None:
+            object.__setattr__(self, "_memo", {})
+        return self._memo
+
+    def _attribute_index(self):
+        if "attributes" not in self._memoized():
+            attributes = {}
+            for key, value in self.items():
+                if isinstance(value, FrozenNameSpace):
+                    attributes.update({key+"."+k:v for k,v in value._attribute_index().items()})
+                else:
+                    attributes[key] = _thaw(value)
+            self._memo["attributes"] = attributes
+        return self._memo["attributes"]
+
+    def dict(self):
+        """Returns the entire configuration as a nested dictionary of plain containers.
+        The dictionaries are memoized, and a copy of them is returned."""
+        return _copy_content(self._dict())
+
+    def _dict(self):
+        """Returns the memoized nested dictionary, which must not be modified"""
+        if "dict" not in self._memoized():
+            self._memo["dict"] = {key: _thaw(value) for key, value in self.items()}
+        return self._memo["dict"]
+
+    def dump(self, indent=4, backend=None):
+        """Pretty-prints the config to a string, using the given or the process-wide YAML backend"""
+        key = ("dump", indent, backend)
+        if key not in self._memoized():
+            self._memo[key] = dump_yaml(self._dict(), backend, indent=indent)
+        return self._memo[key]
+
+    def format(self, string):
+        """Formats the given string and replaces keys with contents, see :func:`NameSpace.format`"""
+        return Formatter(self._attribute_index()).format(string)
+
+    def clone(self):
+        """Returns a modifiable :class:`NameSpace` with the contents of this namespace"""
+        return NameSpace(self.dict())
+
+    def __getitem__(self, key):
+        """Allows indexing with a key"""
+        if key in self._slotted:
+            return getattr(self, key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __getattr__(self, key):
+        """Only called for keys that are not stored in slots"""
+        extra = object.__getattribute__(self, "_extra")
+        if extra is not None and key in extra:
+            return extra[key]
+        raise AttributeError(f"The frozen namespace does not contain key {key}")
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"You are trying to set key {key} in a frozen namespace")
+
+    def __delattr__(self, key):
+        raise AttributeError(f"You are trying to delete key {key} from a frozen namespace")
+
+    def __hash__(self):
+        if self._hash is None:
+            object.__setattr__(self, "_hash", hash((self._keys, tuple(self[key] for key in self._keys))))
+        return self._hash
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, FrozenNameSpace):
+            return NotImplemented
+        if self._keys != other._keys or hash(self) != hash(other):
+            return False
+        return all(self[key] == other[key] for key in self._keys)
+
+    def __reduce__(self):
+        """The generated classes cannot be pickled, so we pickle the contents"""
+        return (compile_namespace, (self._dict(),))
+
+    def __repr__(self):
+        """Prints the contents of this namespace"""
+        return "FrozenNameSpace\n"+self.dump()
+
+
+_classes = {}
+_classes_lock = threading.Lock()
+
+def _slottable(key):
+    """Checks whether the given key can be stored in a slot"""
+    return isinstance(key, str) and key.isidentifier() and not keyword.iskeyword(key) and not key.startswith("__") and not hasattr(FrozenNameSpace, key)
+
+def _frozen_class(keys):
+    """Returns the subclass of FrozenNameSpace for the given keys, which is generated only once"""
+    cls = _classes.get(keys)
+    if cls is None:
+        with _classes_lock:
+            cls = _classes.get(keys)
+            if cls is None:
+                slotted = tuple(key for key in keys if _slottable(key))
+                cls = _classes[keys] = type("FrozenNameSpace", (FrozenNameSpace,), dict(
+                    __slots__ = slotted,
+                    __module__ = FrozenNameSpace.__module__,
+                    _keys = keys,
+                    _slotted = frozenset(slotted),
+                ))
+    return cls
+
+def _freeze(value):
+    """Converts the given value into its immutable representation"""
+    if isinstance(value, (NameSpace, dict)):
+        return compile_namespace(value)
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    if is_array(value):
+        return tuple(value.tolist())
+    return value
+
+def _thaw(value):
+    """Converts the given immutable value back into plain containers"""
+    if isinstance(value, FrozenNameSpace):
+        return value._dict()
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+def compile_namespace(config):
+    """Compiles the given :class:`NameSpace` or nested dictionary into a :class:`FrozenNameSpace`"""
+    if isinstance(config, NameSpace):
+        config._load_all_lazy()
+        items = [(k,v) for k,v in vars(config).items() if k not in _ignore_keys]
+    else:
+        items = list(config.items())
+    cls = _frozen_class(tuple(k for k,_ in items))
+    namespace = object.__new__(cls)
+    extra = {}
+    for key, value in items:
+        if key in cls._slotted:
+            object.__setattr__(namespace, key, _freeze(value))
+        else:
+            extra[key] = _freeze(value)
+    object.__setattr__(namespace, "_extra", extra or None)
+    object.__setattr__(namespace, "_hash", None)
+    object.__setattr__(namespace, "_memo", None)
+    return namespace
@@ -0,0 +1,165 @@
+import atexit
+import contextlib
+import json
+import os
+import threading
+import time
+
+class Collector:
+    """Collects timings of loading and resolving configurations.
+
+    Each measured operation is recorded as an event with a name, a category, its start time, duration and further arguments.
+    The categories are `read` and `parse` for configuration files, `sub_config` for loading sub-configurations, `registry` for registry lookups, and `argparse`, `format_self` and `config_parser`.
+    Events can be summarized via :func:`report` or written as Chrome trace file via :func:`write_trace`, which can be opened in `chrome://tracing` or https://ui.perfetto.dev.
+    """
+    def __init__(self):
+        self.events = []
+        self.cache_hits = {}
+        self.start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def record(self, name, category, start, duration, **args):
+        """Records an event that started at the given `time.perf_counter()` time and lasted for the given duration in seconds"""
+        with self._lock:
+            self.events.append((name, category, start, duration, threading.get_ident(), args))
+
+    def record_cache_hit(self, path):
+        """Records that the given file was taken from the file cache"""
+        with self._lock:
+            self.cache_hits[path] = self.cache_hits.get(path, 0) + 1
+
+    @contextlib.contextmanager
+    def span(self, name, category, **args):
+        """Records the time spent inside this context; the depth of nested spans of the same category is recorded as `depth`"""
+        depths = self._local.__dict__.setdefault("depths", {})
+        depths[category] = depth = depths.get(category, 0) + 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            depths[category] -= 1
+            self.record(name, category, start, duration, depth=depth, **args)
+
+    def report(self):
+        """Returns a summary of all recorded events as a dictionary with plain types, which can be written as JSON.
+
+        The summary contains the number of events and the total time in seconds per category, the read and parse times per file, the number and maximum depth of sub-configurations, and the hits and misses of registry lookups.
+        """
+        with self._lock:
+            events = list(self.events)
+            cache_hits = dict(self.cache_hits)
+        categories, files = {}, {}
+        sub_configs = dict(count=0, max_depth=0, time=0.)
+        registry = dict(lookups=0, hits=0, misses=0, time=0.)
+        for name, category, start, duration, thread, args in events:
+            summary = categories.setdefault(category, dict(count=0, time=0.))
+            summary["count"] += 1
+            summary["time"] += duration
+            if category in ("read", "parse"):
+                entry = files.setdefault(name, dict(loads=0, cache_hits=0, read_time=0., parse_time=0.))
+                entry[category+"_time"] += duration
+                entry["loads"] += category == "read"
+            elif category == "sub_config":
+                sub_configs["count"] += 1
+                sub_configs["max_depth"] = max(sub_configs["max_depth"], args["depth"])
+                # nested sub-configurations are included in the time of their parents
+                if args["depth"] == 1:
+                    sub_configs["time"] += duration
+            elif category == "registry":
+                registry["lookups"] += 1
+                registry["hits" if args.get("found") else "misses"] += 1
+                registry["time"] += duration
+        for path, hits in cache_hits.items():
+            files.setdefault(path, dict(loads=0, cache_hits=0, read_time=0., parse_time=0.))["cache_hits"] = hits
+        return dict(total_time=time.perf_counter() - self.start, categories=categories, files=files, sub_configs=sub_configs, registry=registry)
+
+    def write_report(self, filename):
+        """Writes the :func:`report` as JSON file"""
+        with open(filename, "w") as f:
+            json.dump(self.report(), f, indent=2, default=str)
+
+    def write_trace(self, filename):
+        """Writes all events in the Chrome trace event format"""
+        with self._lock:
+            events = list(self.events)
+        pid = os.getpid()
+        trace = [
+            dict(name=name, cat=category, ph="X", ts=(start - self.start) * 1e6, dur=duration * 1e6, pid=pid, tid=thread, args=args)
+            for name, category, start, duration, thread, args in events
+        ]
+        with open(filename, "w") as f:
+            json.dump(dict(traceEvents=trace, displayTimeUnit="ms"), f, default=str)
+
+
+# the collector that is currently active, or None if nothing is recorded
+_collector = None
+# the last collector that was active, which is reported by stats()
+_last_collector = None
+
+def get_collector():
+    """Returns the active :class:`Collector`, or None if instrumentation is disabled"""
+    return _collector
+
+
+@contextlib.contextmanager
+def collect_stats():
+    """Enables instrumentation inside this context and yields the :class:`Collector`; previously active collectors are restored afterwards.
+
+    Example:
+    ```
+    with yamlparser.collect_stats() as collector:
+        yamlparser.config_parser()
+    print(collector.report())
+    collector.write_trace("trace.json")
+    ```
+    """
+    global _collector, _last_collector
+    previous = _collector
+    _collector = _last_collector = Collector()
+    try:
+        yield _collector
+    finally:
+        _collector = previous
+
+
+def stats():
+    """Returns the report of the active collector, or of the last collector if instrumentation is disabled, see :func:`Collector.report`
+
+    Raises: RuntimeError
+    If instrumentation has never been enabled
+    """
+    collector = _collector or _last_collector
+    if collector is None:
+        raise RuntimeError("Instrumentation is disabled; please use 'with yamlparser.collect_stats():' or set the YAMLPARSER_STATS environment variable")
+    return collector.report()
+
+
+def span(name, category, **args):
+    """Returns a context that records its time in the active collector, or an empty context if instrumentation is disabled"""
+    if _collector is None:
+        return _disabled
+    return _collector.span(name, category, **args)
+
+_disabled = contextlib.nullcontext()
+
+
+def _enable_from_environment():
+    """Enables instrumentation for the whole process if the environment variables are set.
+
+    YAMLPARSER_STATS: "1" to enable, or a filename to which the report is written at exit
+    YAMLPARSER_TRACE: a filename to which the Chrome trace is written at exit
+    """
+    global _collector, _last_collector
+    report_file = os.environ.get("YAMLPARSER_STATS")
+    trace_file = os.environ.get("YAMLPARSER_TRACE")
+    if not report_file and not trace_file:
+        return
+    _collector = _last_collector = collector = Collector()
+    if report_file and report_file != "1":
+        atexit.register(collector.write_report, report_file)
+    if trace_file:
+        atexit.register(collector.write_trace, trace_file)
+
+_enable_from_environment()
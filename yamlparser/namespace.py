@@ -1,15 +1,44 @@
-import yaml
 import os
 import pathlib
-import importlib.resources
 import collections
+import functools
+import warnings
+import weakref
 
 from .registry import get_registered_variable
+from .backend import load_yaml, dump_yaml
+from .cache import get_file_cache
+from .resources import get_resource_index, find_config_file, is_resource
+from .formatting import Formatter
+from .scanner import scan_registry_keys, UnsupportedStructure
+from .scanindex import ScanIndex
+from .snapshot import _record_file, _file_signature
+from .instrumentation import span, get_collector
+from .prefetch import prefetch_files, aprefetch_files, use_prefetched, _take_prefetched, _not_prefetched
+from .arrays import is_array, copy_array, compact_list, compact_content, _array_settings
+from .sections import find_sections, load_sections
 
 _modifiable = "_modifiable"
 _sub_config_key = "_sub_config_key"
 _registry_key = "_registry_key"
-_ignore_keys = [_modifiable, _sub_config_key, _registry_key]
+_lazy = "_lazy"
+_ignore_keys = [_modifiable, _sub_config_key, _registry_key, _lazy]
+
+# the number of configuration files that have been loaded
+_loaded_file_count = 0
+
+def get_loaded_file_count():
+    """Returns the number of configuration files (including sub-configurations) that have been loaded since the last reset"""
+    return _loaded_file_count
+
+def _count_loaded_file():
+    global _loaded_file_count
+    _loaded_file_count += 1
+
+def reset_loaded_file_count():
+    """Resets the number of loaded configuration files to 0"""
+    global _loaded_file_count
+    _loaded_file_count = 0
 
 def list_config_files(package, configuration_file_extensions=[".yaml", ".yml"]):
     """Lists all configuration files found in the given package that have the given filename extensions.
@@ -26,18 +55,11 @@ def list_config_files(package, configuration_file_extensions=[".yaml", ".yml"]):
     A list of (configuration) files with relative paths from within the package.
 
     """
-    # read resource files within package
-    resource_files = importlib.resources.files(package).rglob("*")
+    # the resource files within package are indexed on first access
+    return get_resource_index(package).list(configuration_file_extensions)
 
-    # filter files with the given extensions
-    return [
-        resource_file
-        for resource_file in resource_files
-        if os.path.splitext(resource_file)[1] in configuration_file_extensions
-    ]
 
-
-def get_required_registration(paths_to_collect, registry_key="registry", configuration_file_extensions=[".yaml", ".yml"], verbose=0):
+def get_required_registration(paths_to_collect, registry_key="registry", configuration_file_extensions=[".yaml", ".yml"], verbose=0, jobs=1, executor="process", index_file=None, rebuild=False):
     """Goes through all configuration files that can be found in the given `paths_to_detect` and searches for entries that end with the given `registry_key`.
 
     `paths_to_collect` to search for can be specified in various ways.
@@ -63,6 +85,21 @@ def get_required_registration(paths_to_collect, registry_key="registry", configu
     verbose: int
     Be more verbose in the process. 0 = no prints, 1 = main prints, 2 = detailed prints
 
+    jobs: int or None
+    The number of workers that scan the configuration files in parallel. Use `None` or 0 to use one worker per CPU.
+    Independent of the number of workers, the results are sorted in the order of the files.
+
+    executor: str
+    The type of workers for parallel scans, either "process" or "thread".
+    Resources inside zipped packages cannot be sent to other processes, so they are always scanned in the current process.
+
+    index_file: str or None
+    If given, the registry keys found in each file are stored in this index, and only new or modified files are scanned again, see :class:`ScanIndex`.
+    When the index cannot be written, e.g., because its directory is not writable, a warning is issued.
+
+    rebuild: bool
+    If selected, the existing index is ignored and all files are scanned again.
+
     Returns: dict
     { REGISTRY_KEY: [(config_file,attribute)] }
 
@@ -100,18 +137,87 @@ def get_required_registration(paths_to_collect, registry_key="registry", configu
                 ValueError(f"The given path {path} is not a file or directory, and not a package")
 
     # now, go through all files and collect registry keys
+    if executor not in ("process", "thread"):
+        raise ValueError(f"Unknown executor {executor}, choose one of 'process' or 'thread'")
+    results = [None] * len(paths)
+    index = None
+    if index_file is not None:
+        index = ScanIndex(index_file, registry_key)
+        if not rebuild:
+            index.load()
+        for i, config in enumerate(paths):
+            results[i] = index.lookup(config)
+    pending = [i for i, found in enumerate(results) if found is None]
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs > 1 and len(pending) > 1:
+        if verbose:
+            print(f"Scanning {len(pending)} config files with {jobs} {executor} workers")
+        scanned = _scan_parallel([paths[i] for i in pending], registry_key, jobs, executor)
+    else:
+        scanned = []
+        for i in pending:
+            if verbose>1:
+                print(f"scanning config file {paths[i]}")
+            scanned.append(_scan_config_file(paths[i], registry_key))
+
+    for i, (found, indexable) in zip(pending, scanned):
+        results[i] = found
+        if index is not None:
+            index.update(paths[i], found, indexable)
+
+    if index is not None:
+        try:
+            index.save()
+        except OSError as e:
+            # the index only speeds up later scans, so that the keys are returned even if it cannot be written
+            warnings.warn(f"Could not write the scan index {index_file}: {e}")
+        if verbose:
+            stats = index.stats()
+            print(f"Scan index {index_file}: skipped {stats['skipped']} unchanged files, scanned {stats['scanned']} files, removed {stats['removed']} deleted files")
+
+    # merge the results in the order of the files
     required_keys = collections.defaultdict(list)
-    for config in paths:
-        if verbose>1:
-            print(f"scanning config file {config}")
-        namespace = NameSpace(str(config), modifiable=False, registry_key=None)
-        for attribute, value in namespace.attributes().items():
-#            if registry_key in attribute: breakpoint()
-            if attribute.split(".")[-1] == registry_key:
-                required_keys[value].append((config, attribute))
+    for config, found in zip(paths, results):
+        for value, attribute in found:
+            required_keys[value].append((config, attribute))
 
     return required_keys
 
+
+def _scan_config_file(config, registry_key):
+    """Returns the list of (value, attribute) pairs for all attributes of the given config file that end with the registry key,
+    and whether the result depends on the content of this file only.
+    The file is scanned as a stream of YAML events, and only loaded into a NameSpace when it contains structures such as sub-configurations."""
+    # files with @ are interpreted as package resources by the NameSpace
+    if is_resource(config) or "@" not in str(config):
+        try:
+            with (config.open("r") if is_resource(config) else open(config)) as stream:
+                return [(value, attribute) for attribute, value in scan_registry_keys(stream, registry_key)], True
+        except UnsupportedStructure:
+            pass
+    namespace = NameSpace(config if is_resource(config) else str(config), modifiable=False, registry_key=None)
+    return [(value, attribute) for attribute, value in namespace.attributes().items() if attribute.split(".")[-1] == registry_key], False
+
+
+def _scan_parallel(paths, registry_key, jobs, executor):
+    """Scans the given config files with a pool of workers and returns their results in the order of the files"""
+    import concurrent.futures
+    # resources inside zipped packages cannot be pickled, these are scanned in this process
+    local = [i for i, config in enumerate(paths) if executor == "process" and is_resource(config)]
+    remote = sorted(set(range(len(paths))) - set(local))
+    results = [None] * len(paths)
+    pool = concurrent.futures.ProcessPoolExecutor if executor == "process" else concurrent.futures.ThreadPoolExecutor
+    with pool(max_workers=jobs) as workers:
+        # process pools are more efficient when sending several files at once
+        chunksize = max(1, len(remote) // (jobs * 4)) if executor == "process" else 1
+        scanned = workers.map(_scan_config_file, [paths[i] for i in remote], [registry_key] * len(remote), chunksize=chunksize)
+        for i in local:
+            results[i] = _scan_config_file(paths[i], registry_key)
+        for i, found in zip(remote, scanned):
+            results[i] = found
+    return results
+
 class NameSpace:
     """This is the main class representing our configuration.
     This configuration can be loaded from a configuration file
@@ -146,7 +252,18 @@ class NameSpace:
     Note that currently, dictionaries contained in lists are not supported (will not be transformed into sub-namespaces).
 
     """
-    def __init__(self, config, modifiable=True, sub_config_key="yaml", registry_key="registry"):
+    # internal bookkeeping, which is not part of the configuration:
+    # _index: the flattened attributes of this namespace, which is built on first access and updated incrementally afterward
+    # _parents: the (namespace, key) pairs under which this namespace is stored, to propagate changes
+    # _memo: memoized results of dict() and dump() for frozen namespaces
+    # _deferred: the keys of sub-namespaces that are borrowed from another namespace (see clone()) or that are not loaded yet (see lazy)
+    # _borrowers: weak references to the clones that borrow this namespace, indexed by (id(clone), key)
+    # _sources: the files that this namespace was loaded from (key None), and for keys loaded from sub-configuration files, the (value, files) with the original value, see sources()
+    # _content_hash: the digest of the contents of frozen namespaces, which is computed on first use and reset when unfreezing, see fingerprint()
+    # _selected: the top-level keys that are selected when loading files into this namespace, see select
+    __slots__ = ("__dict__", "__weakref__", "_index", "_parents", "_memo", "_deferred", "_borrowers", "_sources", "_content_hash", "_selected")
+
+    def __init__(self, config, modifiable=True, sub_config_key="yaml", registry_key="registry", lazy=False, jobs=1, select=None):
         """Initializes this object with the given configuration, which can be a file name (for the yaml config file) or a dictionary
 
         Parameters
@@ -164,58 +281,269 @@ class NameSpace:
 
         registry_key: str
         When the configuration files contain this key, it is replaced with its value that is stored in the registry or provided in the environment
+
+        lazy: boolean or "sections"
+        If enabled, sub-configuration files referenced via the `sub_config_key` are only loaded when they are accessed for the first time.
+        Local overwrites are applied after loading.
+        Functions that work on the entire configuration, such as :func:`attributes`, :func:`dict`, :func:`dump` or :func:`format_self`, load all sub-configurations.
+        With "sections", configuration files are additionally scanned for the byte offsets of their top-level keys, see :func:`find_sections`, and the value of each top-level key is only parsed when it is accessed.
+        Hence, the memory depends on the parts of huge files that are used, not on the size of the files.
+        Files that cannot be split into sections, e.g., because they use anchors, are loaded completely.
+
+        jobs: int or None
+        If not 1, the configuration file and all its sub-configuration files are read concurrently with the given number of threads before the namespace is built, see :func:`prefetch_files`.
+        None selects the default number of threads.
+        This is useful when opening files is slow, e.g., on network file systems.
+        Files are not read in advance with `select` or lazy "sections".
+
+        select: [str] or None
+        If given, only these top-level keys (including dotted keys starting with them) are loaded from the configuration.
+        For files, only the sections of these keys are parsed, see :func:`find_sections`; the other keys are not constructed.
+        The same keys are selected when the namespace is reloaded, see :func:`reload`.
+
+        Raises: ValueError
+        If any of the selected keys is not contained in the configuration
         """
+        self._init_bookkeeping()
         self._sub_config_key = sub_config_key
         self._registry_key = registry_key
+        self._lazy = lazy
         self._modifiable = True
-        self.update(config)
+        if select is not None:
+            object.__setattr__(self, "_selected", tuple(select))
+        if jobs != 1 and select is None and lazy != "sections":
+            # lazy sub-configurations are not read in advance
+            with use_prefetched(prefetch_files([config], sub_config_key, not lazy, jobs)):
+                self.update(config)
+        else:
+            self.update(config, self._selected)
         self._modifiable = modifiable
 
+    @staticmethod
+    async def aload(config, modifiable=True, sub_config_key="yaml", registry_key="registry", lazy=False):
+        """Creates a namespace like the constructor, but reads the configuration file and all its sub-configuration files concurrently without blocking the event loop, see :func:`aprefetch_files`.
+        The namespace is built after all files have been read, in the same order as by the constructor.
+
+        Example:
+        ```
+        cfg = await NameSpace.aload(yaml_file_name)
+        ```
+        """
+        prefetched = await aprefetch_files([config], sub_config_key, not lazy)
+        with use_prefetched(prefetched):
+            return NameSpace(config, modifiable, sub_config_key, registry_key, lazy)
+
     def clone(self):
-        """Returns a copy of this namespace"""
-        return NameSpace(self.dict(), self._modifiable, self._sub_config_key, self._registry_key)
+        """Returns a copy of this namespace.
+
+        The copy shares all sub-namespaces with this namespace (copy-on-write).
+        A shared sub-namespace is copied only when it is accessed through the clone, or before it is modified in this namespace.
+        Hence, cloning only costs the number of keys in this namespace, and modifying a nested value in the clone copies only the sub-namespaces along the path to this value.
+        Lists inside shared sub-namespaces are copied for the clone as soon as they, or the sub-namespaces containing them, are accessed through this namespace, so that they can be modified in-place.
+        Only lists that have been obtained from this namespace before cloning must not be modified in-place afterward.
+        """
+        return self._copy(self._modifiable)
+
+    def sweep(self, parameters, mode="grid", count=None, seed=None, auto_format=True):
+        """Returns a :class:`Sweep`, which lazily generates variants of this namespace with the given values overridden.
+        Variants share all unmodified sub-namespaces with this namespace, and only the values that depend on the overridden keys are formatted again.
+
+        Example:
+        ```
+        for variant in cfg.sweep({"opt.lr": [0.1, 0.01], "model.depth": [18, 50]}):
+            train(variant)
+        cfg.sweep({"opt.lr": [0.1, 0.01]}).save("variants")
+        ```
+        """
+        from .sweep import Sweep
+        return Sweep(self, parameters, mode, count, seed, auto_format)
+
+    def _copy(self, modifiable):
+        """Returns a shallow copy of this namespace, which borrows all sub-namespaces"""
+        namespace = NameSpace.__new__(NameSpace)
+        namespace._init_bookkeeping()
+        contents = namespace.__dict__
+        contents[_sub_config_key] = self._sub_config_key
+        contents[_registry_key] = self._registry_key
+        contents[_lazy] = self._lazy
+        contents[_modifiable] = modifiable
+        if self._sources:
+            object.__setattr__(namespace, "_sources", dict(self._sources))
+        object.__setattr__(namespace, "_selected", self._selected)
+        if not modifiable:
+            # the copy has the same contents
+            object.__setattr__(namespace, "_content_hash", self._content_hash)
+        deferred = set()
+        reference, ident = weakref.ref(namespace), id(namespace)
+        for key, value in vars(self).items():
+            if key in _ignore_keys:
+                continue
+            if isinstance(value, NameSpace):
+                # borrow the sub-namespace
+                contents[key] = value
+                deferred.add(key)
+                value._lend(reference, ident, key)
+            elif isinstance(value, list):
+                contents[key] = _copy_list(value)
+            elif is_array(value):
+                contents[key] = copy_array(value)
+            else:
+                contents[key] = value
+                if isinstance(value, _LazySubConfig):
+                    deferred.add(key)
+        if deferred:
+            object.__setattr__(namespace, "_deferred", deferred)
+            object.__setattr__(namespace, "__class__", _DeferredNameSpace)
+        return namespace
+
+    def _defer(self, key):
+        """Marks the given key to be resolved on first access"""
+        if self._deferred is None:
+            object.__setattr__(self, "_deferred", set())
+        self._deferred.add(key)
+        if not isinstance(self, _DeferredNameSpace):
+            object.__setattr__(self, "__class__", _DeferredNameSpace)
+
+    def _undefer(self, key):
+        """Removes the given key from the deferred keys"""
+        self._deferred.discard(key)
+        if not self._deferred and not self._borrowers and isinstance(self, _DeferredNameSpace):
+            object.__setattr__(self, "__class__", NameSpace)
+
+    def _resolve(self, key):
+        """Loads or copies the deferred value for the given key"""
+        if isinstance(self.__dict__[key], _LazySubConfig):
+            return self._load_lazy(key)
+        return self._materialize(key)
+
+    def _load_lazy(self, key):
+        """Loads the lazy sub-configuration with the given key"""
+        placeholder = self.__dict__[key]
+        loaded, source = placeholder.load(self)
+        self._undefer(key)
+        if source is not None:
+            self._set_source(key, source)
+        # loading does not change the configuration, so no changes need to be propagated
+        self.__dict__[key] = loaded
+        if isinstance(loaded, NameSpace):
+            loaded._parents.append((self, key))
+            if not self._modifiable:
+                loaded.freeze()
+        return loaded
+
+    def _load_all_lazy(self):
+        """Loads all lazy sub-configurations of this namespace, but not of its sub-namespaces"""
+        if self._deferred:
+            for key in [key for key in self._deferred if isinstance(self.__dict__[key], _LazySubConfig)]:
+                self._load_lazy(key)
+
+    def _materialize(self, key):
+        """Replaces the borrowed sub-namespace with the given key by a copy that is owned by this namespace"""
+        borrowed = self.__dict__[key]
+        self._unlink(key, borrowed)
+        copy = borrowed._copy(self._modifiable)
+        self.__dict__[key] = copy
+        copy._parents.append((self, key))
+        return copy
+
+    def _lend(self, reference, ident, key):
+        """Registers the clone with the given weak reference and id, which borrows this namespace under the given key"""
+        borrowers = self._borrowers
+        if borrowers is None:
+            borrowers = {}
+            object.__setattr__(self, "_borrowers", borrowers)
+            # lists and sub-namespaces that are accessed through this namespace are copied for the clones first
+            if not isinstance(self, _DeferredNameSpace):
+                object.__setattr__(self, "__class__", _DeferredNameSpace)
+        else:
+            # clones are only referenced weakly; references to garbage-collected clones are removed regularly
+            count = len(borrowers)
+            if count >= 64 and not count & (count-1):
+                for dead in [k for k, r in borrowers.items() if r() is None]:
+                    del borrowers[dead]
+        borrowers[(ident, key)] = reference
+
+    def _detach(self):
+        """Makes sure that no clone shares this namespace, neither directly nor via any of its parents, before this namespace is modified"""
+        for parent, _ in self._parents:
+            parent._detach()
+        if self._borrowers:
+            self._detach_borrowers()
+
+    def _detach_borrowers(self):
+        """Hands out copies of this namespace to all clones that borrow it, before this namespace is modified"""
+        for (_, key), reference in list(self._borrowers.items()):
+            borrower = reference()
+            if borrower is None:
+                continue
+            copy = self._copy(borrower._modifiable)
+            borrower._undefer(key)
+            borrower.__dict__[key] = copy
+            copy._parents.append((borrower, key))
+        object.__setattr__(self, "_borrowers", None)
+        if not self._deferred and isinstance(self, _DeferredNameSpace):
+            object.__setattr__(self, "__class__", NameSpace)
+
+    def _unlink(self, key, old):
+        """Removes the link of the sub-namespace or placeholder that is currently stored under the given key"""
+        if self._deferred and key in self._deferred:
+            self._undefer(key)
+            if isinstance(old, NameSpace):
+                old._borrowers.pop((id(self), key), None)
+        elif isinstance(old, NameSpace):
+            old._parents[:] = [(p,k) for p,k in old._parents if p is not self or k != key]
 
     def keys(self):
         """Returns the current list of keys in this namespace"""
-        return self.dict().keys()
+        return {key:None for key in vars(self) if key not in _ignore_keys}.keys()
 
 
     def add(self, key, config):
         """Adds the given configuration as a sub-namespace.
         This is identical to `self.key = NameSpace(config)`"""
         # adds a different config file into a sub-namespace
-        self[key] = NameSpace(config, self._modifiable, self._sub_config_key, self._registry_key)
+        self[key] = NameSpace(config, self._modifiable, self._sub_config_key, self._registry_key, self._lazy)
+
+    def get(self, key, default=None):
+        """Returns the value for the given key, or the default if this namespace does not contain the key.
+        The key can contain periods, which are parsed to index sub-namespaces"""
+        return _compile_path(key).get(self, default)
 
     def set(self, key, value):
         """Sets a value for a given key. This key can contain periods, which are parsed to index sub-namespaces"""
-        if not self._modifiable:
-            raise AttributeError(f"You are trying to overwrite key {key} in a frozen namespace")
-        keys = key.split(".")
-        if len(keys) > 1:
-            getattr(self,keys[0]).set(".".join(keys[1:]), value)
-        else:
-            self[key] = value
+        _compile_path(key).set(self, value)
 
     def delete(self, key):
         """Removes the given key from this namespace. The key can contain periods, which are parsed into sub-namespaces"""
-        if not self._modifiable:
-            raise AttributeError(f"You are trying to delete key {key} from a frozen namespace")
-
-        keys = key.split(".")
-        if len(keys) > 1:
-            self[keys[0]].delete(".".join(keys[1:]))
-        else:
-            delattr(self, key)
+        _compile_path(key).delete(self)
+
+    @staticmethod
+    def path(key):
+        """Returns the precompiled :class:`AttributePath` for the given key, which can contain periods.
+        Paths are cached, so that applying the same key repeatedly does not parse it again.
+
+        Example:
+        ```
+        path = NameSpace.path("nested.email")
+        path.get(cfg) -> "name@host.domain"
+        path.set(cfg, "other@host.domain")
+        ```
+        """
+        return _compile_path(key)
 
-    def _load_subconfig(self, name, value):
+    def _load_subconfig(self, name, value, files=None):
         # create sub-config
-        namespace = NameSpace(value, self._modifiable, self._sub_config_key, self._registry_key)
+        namespace = NameSpace(value, self._modifiable, self._sub_config_key, self._registry_key, self._lazy)
         # check if there is a sub-config file listed
         if self._sub_config_key in namespace.keys():
             if not isinstance(namespace[self._sub_config_key], str):
                 raise ValueError(f"The '{self._sub_config_key}' keyword requires a file name, but we got '{namespace[self._sub_config_key]}' instead")
             # load config file
-            sub_config = NameSpace(namespace[self._sub_config_key], self._modifiable, self._sub_config_key, self._registry_key)
+            with span(str(namespace[self._sub_config_key]), "sub_config", key=name):
+                sub_config = NameSpace(namespace[self._sub_config_key], self._modifiable, self._sub_config_key, self._registry_key, self._lazy)
+            if files is not None:
+                # remember the file for reloading
+                files.extend(sub_config._sources[None])
             keys = list(sub_config.keys())
             if name in keys:
                 # set this as the config
@@ -226,6 +554,9 @@ class NameSpace:
                     namespace = sub_config[keys[0]]
                 else:
                     raise ValueError(f"The sub configuration file {namespace[self._sub_config_key]} has several keys, but not including  '{name}'")
+            if isinstance(namespace, NameSpace):
+                # detach from the sub configuration, which is not needed any more
+                namespace._parents[:] = [(p,k) for p,k in namespace._parents if p is not sub_config]
             # apply any overwrites from this config file
             namespace.update({k:v for k,v in value.items() if k != self._sub_config_key})
 
@@ -237,13 +568,44 @@ class NameSpace:
         return namespace
 
 
-    def update(self, config):
-        """Updates this namespace with the given configuration. Sub-namespaces will be entirely overwritten, not updated."""
+    def update(self, config, select=None):
+        """Updates this namespace with the given configuration. Sub-namespaces will be entirely overwritten, not updated.
+        If `select` is given, only these top-level keys are loaded from the configuration, see the constructor."""
         # Updates this namespace with the given config
         # read from yaml file, if it is a file
-        loaded_config = self.load(config)
+        if isinstance(config, (str, pathlib.Path)) or is_resource(config):
+            config = _find_config_file(config)
+            # the signature is taken before reading, so that later changes are always detected by reload
+            source = (config, _source_signature(config))
+            loaded_config = None
+            if select is not None or self._lazy == "sections" and not self._tracked():
+                # only parse the requested sections, or defer parsing until they are accessed
+                loaded_config = _load_sections(config, select, self._lazy == "sections" and not self._tracked())
+            if loaded_config is None:
+                loaded_config = _load_found_file(config)
+            self._set_source(None, (self._sources or {}).get(None, ()) + (source,))
+        else:
+            loaded_config = self.load(config)
+        if select is not None:
+            loaded_config = _select(loaded_config, select, config)
+        config, sources = self._convert(loaded_config)
+
+        # update configuration
+        for name, value in config.items():
+            self._store(name, value)
+            if name in sources:
+                self._set_source(name, sources[name])
+
+    def _convert(self, loaded_config):
+        """Converts the loaded configuration into the values of this namespace
+
+        Returns:
+        The values as {key: value}, and the original values and files of the keys that are loaded from sub-configuration files as {key: (value, files)}
+        """
         # recurse through configuration dictionary to build nested namespaces
         config = {}
+        # the original values of keys that are loaded from sub-configuration files
+        sources = {}
         for name, value in loaded_config.items():
             # if the name contains at least one period, we have a nested namespace
             if "." in name:
@@ -251,72 +613,202 @@ class NameSpace:
                 first, rest = name.split(".", 1)
                 # create a new namespace if not existing
                 if first not in config.keys():
-                    config[first] = NameSpace({}, self._modifiable, self._sub_config_key, self._registry_key)
+                    config[first] = NameSpace({}, self._modifiable, self._sub_config_key, self._registry_key, self._lazy)
                 # update the sub-namespace
                 config[first].update({rest:value})
             else:
 
-                if isinstance(value, dict):
-                    config[name] = self._load_subconfig(name, value)
+                if isinstance(value, _LazySubConfig):
+                    config[name] = value
+                elif isinstance(value, dict):
+                    if self._lazy and self._sub_config_key in value and not self._tracked():
+                        # load the sub-configuration on first access
+                        config[name] = _LazySubConfig(name, value)
+                    else:
+                        files = []
+                        config[name] = self._load_subconfig(name, value, files)
+                        if files:
+                            sources[name] = (value, tuple(files))
                 elif isinstance(value, list):
+                    compact = compact_list(value)
+                    if compact is not value:
+                        # long numeric lists are stored as arrays, see set_array_storage
+                        config[name] = compact
+                        continue
                     config[name] = []
+                    files = []
                     for element in value:
                         if isinstance(element, dict):
-                            config[name].append(self._load_subconfig(name, element))
+                            config[name].append(self._load_subconfig(name, element, files))
                         else:
                             config[name].append(element)
+                    if files:
+                        sources[name] = (value, tuple(files))
                 else:
                     config[name] = value
+        return config, sources
 
-        # update configuration
-        self.__dict__.update(config)
+    def sources(self):
+        """Returns the configuration files that this namespace and its sub-namespaces were loaded from, including sub-configuration files and package resources.
 
-    def freeze(self):
-        """Freezes this namespace recursively."""
-        # recursively freeze all sub-namespaces
-        for value in vars(self).values():
+        Returns:
+          sources: dict[attribute->[file]]
+          The files for each attribute that was loaded from files; the files loaded into this namespace itself are listed under the empty attribute ""
+        """
+        sources = {}
+        for attribute, config, _ in self._walk_sources():
+            sources.setdefault(attribute, []).append(config)
+        return sources
+
+    def reload(self):
+        """Reloads all parts of this namespace whose configuration files have changed since they were loaded, see :func:`sources`.
+
+        Only the sub-configurations whose files have changed are loaded again, including the overwrites of the sub-configuration and all its nested sub-configurations; unchanged files are taken from the file cache.
+        When a file that was loaded into a namespace directly has changed, all keys of this namespace are replaced by the contents of its files, so that values that were set afterward are lost.
+        Files inside zipped packages are not reloaded.
+        When a file cannot be loaded, e.g., because it is currently written, the error is raised and the contents of the namespace that were loaded from this file are kept, so that reloading can be tried again.
+
+        Returns:
+          changed: set of attributes that have been changed, added or removed
+
+        Raises: AttributeError
+          if this namespace is frozen
+        """
+        if not self._modifiable:
+            raise AttributeError("You are trying to reload a frozen namespace")
+        changed = set()
+        self._reload("", changed)
+        return changed
+
+    def _reload(self, name, changed):
+        """Reloads the changed sources of this namespace, which is stored under the given attribute, and adds the changed attributes"""
+        sources = self._sources or {}
+        if any(_source_changed(signature) for _, signature in sources.get(None, ())):
+            # load the files into a new namespace first, so that this namespace is not modified when loading fails
+            loaded = NameSpace({}, self._modifiable, self._sub_config_key, self._registry_key, self._lazy)
+            for config, _ in sources[None]:
+                NameSpace.update(loaded, config, self._selected)
+            # replace the entire contents
+            old = dict(self._attribute_index())
+            for key in list(NameSpace.keys(self)):
+                self._remove(key)
+            loaded_sources = dict(loaded._sources) if loaded._sources else None
+            for key in list(NameSpace.keys(loaded)):
+                value = loaded.__dict__[key]
+                loaded._remove(key)
+                self._store(key, value)
+            object.__setattr__(self, "_sources", loaded_sources)
+            _diff(name, old, self._attribute_index(), changed)
+            return
+        for key in list(NameSpace.keys(self)):
+            value = self.__dict__[key]
+            source = sources.get(key)
+            if source is not None and (any(_source_changed(signature) for _, signature in source[1]) or isinstance(value, list) and any(isinstance(element, NameSpace) and element._has_changed_sources() for element in value)):
+                # load the sub-configuration again
+                old = self._flatten(key, value)
+                NameSpace.update(self, {key: source[0]})
+                _diff(name, old, self._flatten(key, self.__dict__[key]), changed)
+            elif isinstance(value, NameSpace) and value._has_changed_sources():
+                self[key]._reload(f"{name}.{key}" if name else key, changed)
+
+    def _has_changed_sources(self):
+        """Checks whether any file that this namespace or its sub-namespaces were loaded from has changed"""
+        return any(_source_changed(signature) for _, _, signature in self._walk_sources())
+
+    def _walk_sources(self, name=""):
+        """Yields the (attribute, file, signature) of all files that this namespace, which is stored under the given attribute, and its sub-namespaces were loaded from"""
+        if self._sources:
+            for key, source in self._sources.items():
+                attribute = name if key is None else f"{name}.{key}" if name else key
+                for config, signature in (source if key is None else source[1]):
+                    yield attribute, config, signature
+        # borrowed sub-namespaces are not copied
+        for key, value in vars(self).items():
+            if key in _ignore_keys:
+                continue
+            for element in (value if isinstance(value, list) else (value,)):
+                if isinstance(element, NameSpace):
+                    yield from element._walk_sources(f"{name}.{key}" if name else key)
+
+    def _set_source(self, key, source):
+        """Records the source of the given key, or of this namespace for key None"""
+        if self._sources is None:
+            object.__setattr__(self, "_sources", {})
+        self._sources[key] = source
+
+    def compile(self):
+        """Returns a compact, immutable and hashable copy of this namespace, see :class:`FrozenNameSpace`.
+        Reading values from the compiled namespace is as fast as a plain attribute lookup."""
+        from .frozen import compile_namespace
+        return compile_namespace(self)
+
+    def freeze(self, compact=False):
+        """Freezes this namespace recursively, including namespaces stored in lists.
+        If `compact` is selected, a compiled copy of the frozen namespace is returned, see :func:`compile`."""
+        # recursively freeze all sub-namespaces; borrowed and lazy sub-namespaces obtain the new state when accessed
+        for key, value in vars(self).items():
+            if self._deferred and key in self._deferred:
+                continue
             if isinstance (value, NameSpace):
                 value.freeze()
+            elif isinstance(value, list):
+                for element in value:
+                    if isinstance(element, NameSpace):
+                        element.freeze()
         self._modifiable = False
+        if compact:
+            return NameSpace.compile(self)
 
     def unfreeze(self):
-        """Unfreezes this namespace recursively."""
+        """Unfreezes this namespace recursively, including namespaces stored in lists."""
         self._modifiable = True
-        for value in vars(self).values():
+        self._memo.clear()
+        object.__setattr__(self, "_content_hash", None)
+        for parent, _ in self._parents:
+            parent._reset_content_hash()
+        for key, value in vars(self).items():
+            if self._deferred and key in self._deferred:
+                continue
             if isinstance (value, NameSpace):
                 value.unfreeze()
+            elif isinstance(value, list):
+                for element in value:
+                    if isinstance(element, NameSpace):
+                        element.unfreeze()
 
-    def load(self, config):
-        """Loads the configuration from the given YAML filename, which might include package @ filename"""
-        if isinstance(config, (str, pathlib.Path)):
-            return self._load_config_file(config)
+    def load(self, config, backend=None):
+        """Loads the configuration from the given YAML filename, which might include package @ filename.
+        The YAML `backend` ("c" or "python") can be selected, by default the process-wide backend is used, see :func:`set_yaml_backend`"""
+        if isinstance(config, (str, pathlib.Path)) or is_resource(config):
+            return self._load_config_file(config, backend)
 
         if not isinstance(config,dict):
             raise ValueError(f"The configuration should be a dictionary")
         return config
 
-    def save(self, yaml_file, indent=4):
+    def save(self, yaml_file, indent=4, backend=None):
         """Saves the configuration to a yaml file"""
         with open(yaml_file, "w") as f:
-            f.write(self.dump(indent))
+            f.write(self.dump(indent, backend))
+        # make sure that we do not read outdated content from the cache
+        get_file_cache().invalidate(yaml_file)
 
     def format(self, string):
         """Formats the given string and replaces keys with contents
 
         This function replaces all occurrences of `{KEY}` values in the given string with the value stored in this `NameSpace` instance.
         Here, `KEY` can be any fully-quoted string as returned by the :func:`attributes` function.
+        When the referenced values contain `{KEY}` values themselves, these are resolved first.
 
         If the given string is a list, formatting is applied to all elements of that list (recursively).
 
         Returns:
           the formatted string
-        """
-        if isinstance(string, list):
-            return [self.format(s) if isinstance(s, (str, list)) else s for s in string]
 
-        for k,v in self.attributes().items():
-            string = string.replace(f"{{{k}}}", str(v))
-        return string
+        Raises: ValueError
+          if the referenced values contain cyclic references
+        """
+        return Formatter(self._attribute_index()).format(string)
 
     def format_self(self):
         """Formats all internal string variables (and list of string variables) using the :func:`format` function.
@@ -329,56 +821,247 @@ class NameSpace:
             key2: {key}
 
         both nested.key1 and nested.key2 will be evaluated as "value".
-        """
-        # format all strings and lists of strings
-        for key, value in self.attributes().items():
-            if isinstance (value, (str,list)):
-                self.set(key, self.format(value))
-        # recursively freeze all sub-namespaces
-        for value in vars(self).values():
-            if isinstance (value, NameSpace):
-                value.format_self()
+        Fully-quoted keys have precedence over nested keys.
 
+        All placeholders are scanned only once, and values are resolved in the order of their dependencies, so that chained references are resolved completely.
 
-    def dump(self, indent=4):
-        """Pretty-prints the config to a string"""
-        return yaml.dump(self.dict(), indent=indent)
+        Raises: ValueError
+          if the values contain cyclic references
+        """
+        # resolve all strings and lists of strings, and write back the changed ones
+        with span("format_self", "format_self"):
+            for key, value in Formatter(self._attribute_index()).resolve_all().items():
+                self.set(key, value)
+
+
+    def dump(self, indent=4, backend=None):
+        """Pretty-prints the config to a string, using the given or the process-wide YAML backend.
+        For frozen namespaces, the result is memoized until the namespace is unfrozen."""
+        if self._modifiable:
+            return dump_yaml(self._dict(), backend, indent=indent)
+        key = ("dump", indent, backend)
+        if key not in self._memo:
+            self._memo[key] = dump_yaml(self._dict(), backend, indent=indent)
+        return self._memo[key]
 
     def attributes(self):
         """Returns a list of attributes of this NameSpace including all sub-namespaces
 
-        For sub-namespaces, a period is used to separate namespace and subnamespace
+        For sub-namespaces, a period is used to separate namespace and subnamespace.
+        The attributes are maintained incrementally when the namespace is modified, so that this function only needs to copy them.
 
         Returns:
           attributes: dict[attribute->value]
         """
-        attributes = {}
-        for key in vars(self):
-            if isinstance(self[key], NameSpace):
-                attributes.update({
-                    key+"."+k:v for k,v in (self[key].attributes()).items()
-                })
-            elif key not in _ignore_keys:
-                attributes[key] = self[key]
-        return attributes
+        return dict(self._attribute_index())
 
     def dict(self):
-        """Returns the entire configuration as a nested dictionary, by converting sub-namespaces"""
+        """Returns the entire configuration as a nested dictionary, by converting sub-namespaces.
+        For frozen namespaces, the nested dictionaries are memoized until the namespace is unfrozen, and a copy of them is returned."""
+        if self._modifiable:
+            return self._dict()
+        return _copy_content(self._dict())
+
+    def _dict(self):
+        """Returns the nested dictionary of this namespace, which is memoized for frozen namespaces and must not be modified then"""
+        if not self._modifiable and "dict" in self._memo:
+            return self._memo["dict"]
+        self._load_all_lazy()
+        # the memoized dictionaries of frozen sub-namespaces are only shared with the memoized dictionary of this namespace
+        convert = NameSpace.dict if self._modifiable else NameSpace._dict
         d = {}
         for k,v in vars(self).items():
             if not k in _ignore_keys:
                 if isinstance(v, NameSpace):
-                    d[k] = v.dict()
+                    d[k] = convert(v)
                 elif isinstance(v, list):
-                    d[k] = [i.dict() if isinstance(i, NameSpace) else i for i in v]
+                    d[k] = [convert(i) if isinstance(i, NameSpace) else i for i in v]
+                elif is_array(v):
+                    d[k] = v.tolist()
                 else:
                     d[k] = v
+        if not self._modifiable:
+            self._memo["dict"] = d
         return d
 
+    def fingerprint(self):
+        """Returns a fingerprint of the contents of this namespace as a hexadecimal string.
+
+        The fingerprint is stable across processes and does not depend on the order of the keys, but on the types of the values, i.e., `1` and `1.0` have different fingerprints.
+        Sets and dictionaries are hashed in sorted order, and other values that YAML cannot represent are hashed via their `repr`, which needs to be stable for the fingerprint to be stable.
+        It is computed as a hash tree over all sub-namespaces.
+        For frozen namespaces, the hashes are cached until the namespace is unfrozen, so that they are computed only once.
+        Modifiable namespaces are hashed again for each call, since their lists can be modified in-place.
+        """
+        return self._content_digest().hex()
+
+    def diff(self, other):
+        """Returns the attributes whose values differ between this and the other namespace, including attributes that exist only in one of them.
+        Sub-namespaces with identical contents are skipped by comparing their hashes, see :func:`fingerprint`.
+
+        Returns:
+          changed: set of attributes
+        """
+        changed = set()
+        self._diff_namespace(other, "", changed, {})
+        return changed
+
+    def _diff_namespace(self, other, prefix, changed, memo):
+        if self._content_digest(memo) == other._content_digest(memo):
+            return
+        mine, theirs = vars(self), vars(other)
+        for key in mine.keys() | theirs.keys():
+            if key in _ignore_keys:
+                continue
+            # lazy sub-configurations have been loaded for the digests, and borrowed sub-namespaces are not copied
+            value = mine.get(key, _no_value)
+            other_value = theirs.get(key, _no_value)
+            if isinstance(value, NameSpace) and isinstance(other_value, NameSpace):
+                value._diff_namespace(other_value, prefix+key+".", changed, memo)
+            elif value is _no_value or other_value is _no_value or _value_digest(value, memo) != _value_digest(other_value, memo):
+                for side in (value, other_value):
+                    if isinstance(side, NameSpace):
+                        changed.update(prefix+key+"."+k for k in side._attribute_index())
+                    elif side is not _no_value:
+                        changed.add(prefix+key)
+
+    def _content_digest(self, memo=None):
+        """Returns the digest of the contents of this namespace, which is cached for frozen namespaces.
+        The digests of modifiable namespaces are kept in the given `memo` as {id: digest}, which must only be used while the namespaces are not modified, e.g., during one comparison."""
+        if self._content_hash is not None:
+            return self._content_hash
+        if memo is not None and id(self) in memo:
+            return memo[id(self)]
+        import hashlib
+        self._load_all_lazy()
+        digest = hashlib.blake2b(digest_size=16)
+        contents = vars(self)
+        for key in sorted(key for key in contents if key not in _ignore_keys):
+            digest.update(_encode_value(key))
+            digest.update(_value_digest(contents[key], memo))
+        result = b"n" + digest.digest()
+        if not self._modifiable:
+            object.__setattr__(self, "_content_hash", result)
+        elif memo is not None:
+            memo[id(self)] = result
+        return result
+
+    def _reset_content_hash(self):
+        """Resets the cached digest of this namespace and its parents"""
+        if self._content_hash is not None:
+            object.__setattr__(self, "_content_hash", None)
+            for parent, _ in self._parents:
+                parent._reset_content_hash()
+
+    def _init_bookkeeping(self):
+        object.__setattr__(self, "_index", None)
+        object.__setattr__(self, "_parents", [])
+        object.__setattr__(self, "_memo", {})
+        object.__setattr__(self, "_deferred", None)
+        object.__setattr__(self, "_borrowers", None)
+        object.__setattr__(self, "_sources", None)
+        object.__setattr__(self, "_content_hash", None)
+        object.__setattr__(self, "_selected", None)
+
+    def _attribute_index(self):
+        """Returns the flattened attributes of this namespace, which are built on first access.
+        The returned dictionary is updated with any modification of this namespace, and it must not be modified."""
+        if self._index is None:
+            self._load_all_lazy()
+            index = {}
+            for key, value in vars(self).items():
+                if key not in _ignore_keys:
+                    index.update(self._flatten(key, value))
+            object.__setattr__(self, "_index", index)
+        return self._index
+
+    def _loaded_attributes(self):
+        """Returns the flattened attributes of this namespace like :func:`attributes`, but without loading lazy sub-configurations"""
+        attributes = {}
+        for key, value in vars(self).items():
+            if key in _ignore_keys or isinstance(value, _LazySubConfig):
+                continue
+            if isinstance(value, NameSpace):
+                attributes.update({key+"."+k:v for k,v in value._loaded_attributes().items()})
+            else:
+                attributes[key] = value
+        return attributes
+
+    def _load_path(self, key):
+        """Loads all lazy sub-configurations along the given key, which can contain periods"""
+        _compile_path(key).get(self)
+
+    def _flatten(self, key, value):
+        """Returns the flattened attributes of the given value stored under the given key"""
+        if isinstance(value, NameSpace):
+            return {key+"."+k:v for k,v in value._attribute_index().items()}
+        return {key:value}
+
+    def _tracked(self):
+        """Checks whether this namespace or any of its parents keeps flattened attributes or memoized results that need to be updated"""
+        return self._index is not None or bool(self._memo) or any(parent._tracked() for parent, _ in self._parents)
+
+    def _store(self, key, value):
+        """Stores the given value under the given key, and updates the flattened attributes of this namespace and all its parents"""
+        self._detach()
+        self._reset_content_hash()
+        missing = key not in self.__dict__
+        old = self.__dict__.get(key)
+        self._unlink(key, old)
+        if self._sources and key in self._sources:
+            del self._sources[key]
+        self.__dict__[key] = value
+        if isinstance(value, NameSpace):
+            value._parents.append((self, key))
+        elif isinstance(value, _LazySubConfig):
+            self._defer(key)
+        if self._tracked():
+            added = self._flatten(key, value)
+            removed = [] if missing else [k for k in self._flatten(key, old) if k not in added]
+            self._changed(removed, added)
+
+    def _remove(self, key):
+        """Removes the given key, and updates the flattened attributes of this namespace and all its parents"""
+        self._detach()
+        self._reset_content_hash()
+        old = self.__dict__.pop(key)
+        self._unlink(key, old)
+        if self._sources and key in self._sources:
+            del self._sources[key]
+        if self._tracked():
+            self._changed(list(self._flatten(key, old)), {})
+
+    def _changed(self, removed, added):
+        """Applies the given changes of flattened attributes to the index, and propagates them to all parents"""
+        self._memo.clear()
+        if self._index is not None:
+            for k in removed:
+                self._index.pop(k, None)
+            self._index.update(added)
+        for parent, name in self._parents:
+            if parent._tracked():
+                parent._changed([name+"."+k for k in removed], {name+"."+k:v for k,v in added.items()})
+
     def __repr__(self):
         """Prints the contents of this namespace"""
         return "NameSpace\n"+self.dump()
 
+    def __eq__(self, other):
+        """Frozen namespaces are equal when they have the same contents, which is checked by comparing their cached hashes, see :func:`fingerprint`.
+        Modifiable namespaces are only equal to themselves; their contents can be compared via :func:`fingerprint` or :func:`diff`."""
+        if self is other:
+            return True
+        if not isinstance(other, NameSpace) or self._modifiable or other._modifiable:
+            return NotImplemented
+        return self._content_digest() == other._content_digest()
+
+    def __hash__(self):
+        """Frozen namespaces are hashed by their contents, and modifiable namespaces by their identity.
+        Hence, namespaces that are used in sets or as dictionary keys must not be frozen or unfrozen."""
+        if self._modifiable:
+            return object.__hash__(self)
+        return hash(self._content_digest())
+
     def __getitem__(self, key):
         """Allows indexing with a key"""
         # get nested NameSpace by key
@@ -390,13 +1073,13 @@ class NameSpace:
         if not self._modifiable:
             raise AttributeError(f"You are trying to set key {key} in a frozen namespace")
         if isinstance(value, dict):
-            self.__dict__.update({key:NameSpace(value, self._modifiable, self._sub_config_key, self._registry_key)})
+            self._store(key, NameSpace(value, self._modifiable, self._sub_config_key, self._registry_key))
         else:
-            self.__dict__.update({key:value})
+            self._store(key, compact_list(value))
 
     def __getattr__(self, key):
         """Allows adding new sub-namespaces inline"""
-        if key in _ignore_keys:
+        if key in _ignore_keys or key in NameSpace.__slots__:
             return self.__getattribute__(key)
         if not self._modifiable:
             raise AttributeError(f"You are trying to add new key {key} to a frozen namespace")
@@ -409,47 +1092,355 @@ class NameSpace:
         """Allows adding new sub-namespaces inline"""
         if key != _modifiable and hasattr(self, _modifiable) and not self._modifiable:
             raise AttributeError(f"You are trying to add new key {key} to a frozen namespace")
-        # call  the original setattr function
-        super(NameSpace, self).__setattr__(key,value)
+        if key in _ignore_keys:
+            # call  the original setattr function
+            super(NameSpace, self).__setattr__(key,value)
+        else:
+            self._store(key, compact_list(value))
+
+    def __delattr__(self, key):
+        """Removes the given key from this namespace"""
+        if key in _ignore_keys:
+            super(NameSpace, self).__delattr__(key)
+        elif key in self.__dict__:
+            self._remove(key)
+        else:
+            raise AttributeError(f"The namespace does not contain key {key}")
 
     def __getstate__(self):
-        """No idea why this is required"""
+        """Only the contents of the namespace are pickled, not the internal bookkeeping"""
+        self._load_all_lazy()
         return self.__dict__
 
     def __setstate__(self, value):
-        """No idea why this is required"""
+        """Restores the contents of the namespace and re-links the sub-namespaces"""
+        if not hasattr(self, "_parents"):
+            self._init_bookkeeping()
+        if isinstance(self, _DeferredNameSpace):
+            # the restored namespace owns all of its contents
+            object.__setattr__(self, "__class__", NameSpace)
         self.__dict__.update(value)
+        for key, child in value.items():
+            if isinstance(child, NameSpace):
+                if not hasattr(child, "_parents"):
+                    child._init_bookkeeping()
+                child._parents.append((self, key))
 
-    def _load_config_file(self, config):
+    def _load_config_file(self, config, backend=None):
         """Finds the configuration file within a package and loads the configuration"""
-        assert isinstance(config, str), f"The given configuration {config} is not a file name"
-        splits = config.split("@")
-
-        if len(splits) == 1:
-            # load config file directly
-            config = splits[0].strip()
-
-        elif len(splits) == 2:
-            # load config from package resources
-            package = splits[0].strip()
-            resource = pathlib.Path(splits[1].strip())
-            # list all resource files within the package
-            package_files = list_config_files(package, [resource.suffix])
-            # find possible candidates for resource files
-            candidates = [f for f in package_files if str(f).endswith(str(resource))]
-            if not len(candidates):
-                raise ValueError(f"Could not find configuration file {resource} in package {package}; possible files are: {package_files}")
-            if len(candidates) > 1:
-                raise ValueError(f"The given config file {resource} is not unique in package {package}; candidates are: {candidates}")
-            # take the unique file
-            config = candidates[0]
+        return _load_found_file(_find_config_file(config), backend)
 
-        else:
-            raise ValueError(f"Could not interpret configuration file {config}")
 
-        if not os.path.isfile(config):
-            raise IOError(f"Could not find config file {config}")
+def _find_config_file(config):
+    """Returns the configuration file for the given filename, which might include package @ filename, or the resource inside a zipped package
 
-        with open(config, 'r') as f:
-            # return the loaded yaml file, or an empty dictionary in case safe_load returns None
-            return yaml.safe_load(f) or {}
+    Raises: ValueError
+    If the filename cannot be interpreted
+
+    Raises: IOError
+    If the file does not exist
+    """
+    if is_resource(config):
+        return config
+
+    config = str(config)
+    splits = config.split("@")
+
+    if len(splits) == 1:
+        # load config file directly
+        config = splits[0].strip()
+
+    elif len(splits) == 2:
+        # load config from package resources
+        package = splits[0].strip()
+        resource = pathlib.Path(splits[1].strip())
+        # find the unique file in the index of the package
+        config = find_config_file(package, resource)
+        if is_resource(config):
+            return config
+
+    else:
+        raise ValueError(f"Could not interpret configuration file {config}")
+
+    if not os.path.isfile(config):
+        raise IOError(f"Could not find config file {config}")
+    return config
+
+
+def _load_found_file(config, backend=None):
+    """Loads the configuration from the given file or resource, see :func:`_find_config_file`"""
+    _count_loaded_file()
+    _record_file(config)
+    if is_resource(config):
+        # resource inside a zipped package, which cannot be opened as a file
+        return _read_config_file(config, backend)
+
+    # files that have been read concurrently in advance
+    content = _take_prefetched(config)
+    if content is not _not_prefetched:
+        return content
+
+    # the files that are not taken from the cache
+    misses = []
+    def read_file(path):
+        misses.append(path)
+        return _read_config_file(path, backend)
+
+    # parsed files are cached, and the cache returns a copy of the content
+    content = get_file_cache().load(config, read_file, _array_settings())
+    if not misses and get_collector() is not None:
+        get_collector().record_cache_hit(os.path.realpath(config))
+    return content
+
+
+def _load_sections(config, select, lazy):
+    """Loads the selected top-level keys of the given configuration file, or all keys if `select` is None.
+    If `lazy`, placeholders are returned instead, which parse the sections on first access.
+
+    Returns:
+    The loaded configuration, or None if the file cannot be split into sections, see :func:`find_sections`
+    """
+    found = None if is_resource(config) else find_sections(config)
+    if found is None:
+        return None
+    _count_loaded_file()
+    _record_file(config)
+    signature, sections = found
+    names = [name for name in sections if select is None or name in select]
+    if lazy:
+        return {name: _LazySection(name, os.path.realpath(config), signature, sections[name]) for name in names}
+    ranges = sorted(section for name in names for section in sections[name])
+    return load_sections(config, ranges) if ranges else {}
+
+def _select(loaded_config, select, config):
+    """Returns the selected top-level keys of the loaded configuration, including dotted keys starting with them
+
+    Raises: ValueError
+    If any of the selected keys is missing
+    """
+    selected = {k:v for k,v in loaded_config.items() if k.split(".", 1)[0] in select}
+    missing = set(select) - {k.split(".", 1)[0] for k in selected}
+    if missing:
+        raise ValueError(f"The configuration {config if isinstance(config, str) else 'dictionary'} does not contain the selected keys {sorted(missing)}")
+    return selected
+
+def _source_signature(config):
+    """Returns the real path and the (modification time, size) of the given file, or None for resources inside zipped packages, which cannot be reloaded"""
+    if is_resource(config):
+        return None
+    path = os.path.realpath(config)
+    return path, _file_signature(path)
+
+def _source_changed(signature):
+    """Checks whether the file with the given signature has changed, see :func:`_source_signature`"""
+    return signature is not None and _file_signature(signature[0]) != signature[1]
+
+def _diff(name, old, new, changed):
+    """Adds the attributes that differ between the old and new flattened attributes, prefixed with the given attribute"""
+    prefix = name + "." if name else ""
+    changed.update(prefix+key for key in old.keys() | new.keys() if not _equal(old.get(key, _no_value), new.get(key, _no_value)))
+
+def _equal(value, other):
+    """Checks whether the given values are equal; arrays and lists are compared via their digests, since NumPy arrays are compared element-wise, and modifiable namespaces inside lists by identity"""
+    if is_array(value) or is_array(other) or isinstance(value, list) or isinstance(other, list):
+        return _value_digest(value) == _value_digest(other)
+    return value == other
+
+
+def _read_config_file(config, backend):
+    """Reads and parses the given file or resource, and records the times for both steps, see :func:`collect_stats`"""
+    name = str(config)
+    with span(name, "read"):
+        with config.open('r') if is_resource(config) else open(config, 'r') as f:
+            content = f.read()
+    with span(name, "parse"):
+        # return the loaded yaml file, or an empty dictionary in case the file is empty
+        # long numeric lists are converted before caching, see set_array_storage
+        return compact_content(load_yaml(content, backend))
+
+
+class AttributePath:
+    """A precompiled key, which can contain periods to index sub-namespaces, see :func:`NameSpace.path`.
+
+    The key is split only once, and accessing the value walks through the sub-namespaces without creating any intermediate keys.
+    Hence, the cost of each access only depends on the depth of the key.
+    Reading via :func:`get` and :func:`exists` also works for :class:`FrozenNameSpace` objects.
+
+    Parameters:
+    key: str
+    The key, where periods separate the keys of the sub-namespaces
+    """
+    __slots__ = ("key", "parts")
+
+    def __init__(self, key):
+        self.key = key
+        self.parts = tuple(key.split("."))
+
+    def get(self, namespace, default=None):
+        """Returns the value of this key in the given namespace, or the default if the namespace does not contain it"""
+        for part in self.parts:
+            if part in _ignore_keys:
+                return default
+            try:
+                namespace = namespace[part]
+            except (KeyError, TypeError, IndexError):
+                # the key does not exist, or the value is not a namespace; NumPy arrays raise an IndexError for keys that are no integers
+                return default
+        return namespace
+
+    def exists(self, namespace):
+        """Checks whether the given namespace contains this key"""
+        return self.get(namespace, _no_value) is not _no_value
+
+    def set(self, namespace, value):
+        """Sets the value of this key in the given namespace; missing sub-namespaces are created"""
+        for part in self.parts[:-1]:
+            if not namespace._modifiable:
+                raise AttributeError(f"You are trying to overwrite key {self.key} in a frozen namespace")
+            # existing sub-namespaces are accessed via indexing, which resolves borrowed and lazy sub-namespaces
+            namespace = namespace[part] if part in namespace.__dict__ else namespace.__getattr__(part)
+            if not isinstance(namespace, NameSpace):
+                raise AttributeError(f"You are trying to set key {self.key}, but {part} is not a namespace")
+        if not namespace._modifiable:
+            raise AttributeError(f"You are trying to overwrite key {self.key} in a frozen namespace")
+        namespace[self.parts[-1]] = value
+
+    def delete(self, namespace):
+        """Removes this key from the given namespace"""
+        for part in self.parts[:-1]:
+            if not namespace._modifiable:
+                raise AttributeError(f"You are trying to delete key {self.key} from a frozen namespace")
+            namespace = namespace[part]
+            if not isinstance(namespace, NameSpace):
+                raise AttributeError(f"You are trying to delete key {self.key}, but {part} is not a namespace")
+        if not namespace._modifiable:
+            raise AttributeError(f"You are trying to delete key {self.key} from a frozen namespace")
+        delattr(namespace, self.parts[-1])
+
+    def __repr__(self):
+        return f"AttributePath({self.key!r})"
+
+# a marker for values that do not exist
+_no_value = object()
+
+@functools.lru_cache(maxsize=2**16)
+def _compile_path(key):
+    """Returns the cached :class:`AttributePath` for the given key"""
+    return AttributePath(key)
+
+
+class _DeferredNameSpace(NameSpace):
+    """A namespace with deferred sub-namespaces, which are either borrowed from another namespace (see :func:`NameSpace.clone`) or not loaded yet (see `lazy`), or a namespace that is lent to clones.
+    Accessing a borrowed sub-namespace replaces it by a copy that is owned by this namespace, and accessing a lazy sub-configuration loads it.
+    Accessing a list or a sub-namespace of a lent namespace hands out copies of this namespace to the clones first, so that in-place modifications are not visible in the clones.
+    As soon as no sub-namespaces are deferred or lent any more, the class of this object is switched back to :class:`NameSpace`."""
+    __slots__ = ()
+
+    def __getattribute__(self, key):
+        deferred = object.__getattribute__(self, "_deferred")
+        if deferred and key in deferred:
+            return object.__getattribute__(self, "_resolve")(key)
+        if object.__getattribute__(self, "_borrowers"):
+            object.__getattribute__(self, "_detach_mutable")(key)
+        return object.__getattribute__(self, key)
+
+    def __getitem__(self, key):
+        if self._deferred and key in self._deferred:
+            return self._resolve(key)
+        if self._borrowers:
+            self._detach_mutable(key)
+        return NameSpace.__getitem__(self, key)
+
+    def _detach_mutable(self, key):
+        """Hands out copies of this namespace to the clones before the value with the given key, which might be modified in-place, is returned"""
+        value = object.__getattribute__(self, "__dict__").get(key)
+        if isinstance(value, (NameSpace, list)) or is_array(value):
+            self._detach_borrowers()
+
+
+class _LazySubConfig:
+    """A placeholder for a sub-configuration that is loaded on first access"""
+    __slots__ = ("name", "value")
+
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
+
+    def load(self, namespace):
+        """Loads the sub-configuration into the given namespace
+
+        Returns:
+        The loaded value, and the original value and files if the value was loaded from sub-configuration files, or None otherwise
+        """
+        files = []
+        loaded = namespace._load_subconfig(self.name, self.value, files)
+        return loaded, (self.value, tuple(files)) if files else None
+
+
+class _LazySection(_LazySubConfig):
+    """A placeholder for the value of a top-level key of a configuration file, which is parsed on first access, see :func:`find_sections`"""
+    __slots__ = ("path", "signature", "ranges")
+
+    def __init__(self, name, path, signature, ranges):
+        super().__init__(name, None)
+        self.path = path
+        self.signature = signature
+        self.ranges = ranges
+
+    def load(self, namespace):
+        """Parses the section and converts its value like :func:`NameSpace.update`
+
+        Raises: IOError
+        If the file has changed since it was scanned
+        """
+        if _file_signature(self.path) != self.signature:
+            raise IOError(f"Could not load key {self.name}, since the configuration file {self.path} has changed after it was opened")
+        config, sources = namespace._convert(load_sections(self.path, self.ranges))
+        value = config[self.name]
+        if isinstance(value, _LazySubConfig):
+            # a lazy sub-configuration inside the section
+            return value.load(namespace)
+        return value, sources.get(self.name)
+
+
+def _encode_value(value):
+    """Encodes the given value including its type, so that encodings of different values cannot be confused.
+    Elements of sets and items of dictionaries are encoded in sorted order, so that the encoding does not depend on the hash order of the process; other values are encoded via their `repr`."""
+    if isinstance(value, (set, frozenset)):
+        content = b"".join(sorted(_encode_value(element) for element in value))
+    elif isinstance(value, dict):
+        content = b"".join(sorted(_encode_value(key) + _value_digest(element) for key, element in value.items()))
+    elif isinstance(value, tuple):
+        content = b"".join(_value_digest(element) for element in value)
+    else:
+        content = repr(value).encode()
+    encoded = type(value).__name__.encode() + b":" + content
+    return b"v%d:%s" % (len(encoded), encoded)
+
+def _value_digest(value, memo=None):
+    """Returns the digest of the given value, see :func:`NameSpace.fingerprint`"""
+    if isinstance(value, NameSpace):
+        return value._content_digest(memo)
+    if isinstance(value, list):
+        import hashlib
+        digest = hashlib.blake2b(digest_size=16)
+        for element in value:
+            digest.update(_value_digest(element, memo))
+        return b"l" + digest.digest()
+    if is_array(value):
+        # arrays have the same digest as the corresponding lists
+        return _value_digest(value.tolist())
+    return _encode_value(value)
+
+
+def _copy_content(value):
+    """Copies the given nested dictionaries and lists, without copying the contained values"""
+    if isinstance(value, dict):
+        return {k: _copy_content(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_content(v) for v in value]
+    return value
+
+def _copy_list(value):
+    """Copies the given (nested) list, cloning the contained namespaces"""
+    return [_copy_list(v) if isinstance(v, list) else NameSpace.clone(v) if isinstance(v, NameSpace) else v for v in value]
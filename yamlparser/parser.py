@@ -1,13 +1,26 @@
-import argparse
+import contextlib
+import contextvars
 import sys
 import warnings
 
 from .namespace import NameSpace, get_required_registration
 from .registry import set_registry_file,get_registry_file,registry_content,set_registered_variable,delete_registered_variable
+from .scanindex import get_scan_index_file
+from .snapshot import Snapshot, snapshot_key
+from .instrumentation import span
+from .reloader import Reloader
+from .prefetch import prefetch_files, use_prefetched
+from .arrays import is_array, _array_settings
 
 global _config
 _config = None
 
+# the reloader of the configuration, see config_parser(watch=True)
+_reloader = None
+
+# the configuration of the current thread or asyncio task, see use_config; None falls back to the global _config
+_context_config = contextvars.ContextVar("yamlparser_config", default=None)
+
 def config_parser(
         parser=None,
         default_config_files=None,
@@ -19,7 +32,11 @@ def config_parser(
         auto_format=True,
         sub_config_key="yaml",
         registry_key="registry",
-        registry_file=None
+        registry_file=None,
+        lazy=False,
+        snapshot_dir=None,
+        watch=False,
+        jobs=1
     ):
     """Creates or updates an `argparse.ArgumentParser` with the option to load configuration files (YAML).
     These files will be automatically parsed and each configuration will be added as a separate option to the command line.
@@ -66,6 +83,26 @@ def config_parser(
     registry_file: str or None
     If given, the provided registry file will be used. Otherwise, the default file `~/.yamlparser.yaml` will be used
 
+    lazy: bool
+    If selected, sub-configuration files are only loaded when accessed, see :class:`NameSpace`.
+    Options are added only for loaded sub-configurations, and sub-configurations are loaded when options inside of them are given on the command line.
+    Note that `auto_format` and the `--help` option load all sub-configurations.
+
+    snapshot_dir: str or None
+    If given, the resulting configuration is stored as a snapshot in this directory, see :class:`Snapshot`.
+    Later calls with the same command line options load the snapshot instead of parsing the configuration files, as long as none of the loaded files and registry variables has changed.
+    Note that, when loading a snapshot, the given `parser` is not extended with the options of the configuration.
+    Snapshots are not used with `lazy` loading or when `--help` is requested.
+
+    watch: bool
+    If selected, a :class:`Reloader` is created for the configuration, which can be obtained via :func:`get_reloader`.
+    It reloads the configuration when any of its files have changed, re-applies the command line options and formatting, and replaces the global configuration.
+    Snapshots are not used in this case.
+
+    jobs: int or None
+    If not 1, all configuration files and their sub-configuration files are read concurrently with the given number of threads before the configuration is built, see :func:`prefetch_files`.
+    None selects the default number of threads.
+
     Returns:
     namespace: NameSpace
     A namespace object containing all options taken from configuration file and command line.
@@ -81,37 +118,153 @@ def config_parser(
         # ask for the help of the given parser
         parser.parse_args(command_line_options)
 
-    _config_parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter, add_help=requests_help and not default_config_files, usage='%(prog)s [arguments] [options]')
-    _config_parser.add_argument("configuration_files", nargs="+", default=default_config_files, help="The configuration files to parse. From the second config onward, it can be key=value pairs to create sub-configurations")
+    with span("config_parser", "config_parser"):
+        if snapshot_dir is not None and not lazy and not watch and "-h" not in command_line_options and "--help" not in command_line_options:
+            # the fingerprint of all inputs except for the configuration files and registry variables, which are validated by the snapshot
+            key = snapshot_key(list(command_line_options), default_config_files, _describe_parser(parser), infer_types, list(ignore_keys), add_config_files, auto_format, sub_config_key, registry_key, str(get_registry_file()), _array_settings())
+            snapshot = Snapshot(snapshot_dir, key)
+            namespace = snapshot.load()
+            if namespace is None:
+                with snapshot.record():
+                    namespace, _ = _load_configuration(parser, command_line_options, requests_help, default_config_files, infer_types, ignore_keys, add_config_files, auto_format, sub_config_key, registry_key, lazy, jobs=jobs)
+                snapshot.save(namespace)
+        else:
+            namespace, loaded = _load_configuration(parser, command_line_options, requests_help, default_config_files, infer_types, ignore_keys, add_config_files, auto_format, sub_config_key, registry_key, lazy, watch, jobs)
+
+    if store_config:
+        global _config
+        if _config is not None:
+            warnings.warn("The configuration has already been set, overwriting it.")
+        _config = namespace
+        _config.freeze()
+
+    if watch:
+        global _reloader
+        _reloader = Reloader(*loaded, auto_format=auto_format, freeze=store_config, config=namespace)
+
+    return namespace
+
+
+def _load_configuration(parser, command_line_options, requests_help, default_config_files, infer_types, ignore_keys, add_config_files, auto_format, sub_config_key, registry_key, lazy, watch=False, jobs=1):
+    """Loads the configuration files and applies the command line options, see :func:`config_parser`.
+    Returns the configuration, and if `watch` is selected, the namespace loaded from the files and the command line options for the :class:`Reloader`."""
+    # argparse is imported on first use, which keeps importing this package fast
+    import argparse
+    with span("configuration files", "argparse"):
+        _config_parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter, add_help=requests_help and not default_config_files, usage='%(prog)s [arguments] [options]')
+        _config_parser.add_argument("configuration_files", nargs="+", default=default_config_files, help="The configuration files to parse. From the second config onward, it can be key=value pairs to create sub-configurations")
+
+        # parse the known args, which should only be config files in our case
+        config_file_options = []
+        for option in command_line_options:
+            if option[0] == "-" and (not requests_help or option not in ("-h", "--help")): break
+            config_file_options.append(option)
+        args = _config_parser.parse_args(config_file_options)
+
+    # read all files concurrently in advance, and build the configuration in the usual order
+    files = [file for cfg in args.configuration_files for file in cfg.split("=")[1:] or [cfg]]
+    prefetched = prefetch_files(files, sub_config_key, not lazy, jobs) if jobs != 1 else None
+    with use_prefetched(prefetched):
+        namespace = NameSpace(args.configuration_files[0], True, sub_config_key, registry_key, lazy)
+        for cfg in args.configuration_files[1:]:
+            splits = cfg.split("=")
+            if len(splits)>1:
+                namespace.add(splits[0], splits[1])
+                for s in splits[2:]:
+                    namespace[splits[0]].update(s)
+            else:
+                namespace.update(splits[0])
+
+    # the namespace before applying the command line options, which shares all sub-namespaces that are not changed
+    loaded = NameSpace.clone(namespace) if watch else None
+
+    with span("options", "argparse"):
+        # create a parser entry for these types
+        if parser is None:
+            parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter, usage='%(prog)s configuration_files [options]')
+
+        existing_options = list(parser._option_string_actions.keys())
+
+        parser.add_argument("configuration_files", nargs="*", default=default_config_files, help="The configuration files to parse. From the second config onward, it be key=value pairs to create sub-configurations")
+
+        if "-h" in command_line_options or "--help" in command_line_options:
+            # compute the types of all nested configurations for the help
+            _add_options(parser, namespace.attributes(), existing_options, ignore_keys, infer_types)
+        else:
+            # only add options for the attributes given on the command line, and for options that exist in the parser
+            # with lazy loading, this loads the sub-configurations of these attributes
+            attributes = _select_attributes(namespace, _mentioned_options(command_line_options), lazy)
+            for option in existing_options:
+                value = _lookup_attribute(namespace, option[2:]) if option.startswith("--") else _missing
+                if value is not _missing:
+                    attributes[option[2:]] = value
+            _add_options(parser, attributes, existing_options, ignore_keys, infer_types)
+
+        # parse arguments
+        args = parser.parse_args(command_line_options)
+
+    # overwrite values in config
+    overrides = {}
+    for k,v in vars(args).items():
+        if add_config_files or k != "configuration_files":
+            if v is not None:
+                namespace.set(k,v)
+                overrides[k] = v
 
-    # parse the known args, which should only be config files in our case
-    config_file_options = []
+    if auto_format:
+        namespace.format_self()
+
+    return namespace, (loaded, overrides) if watch else None
+
+
+def _mentioned_options(command_line_options):
+    """Returns the keys of all --key or --key=value options on the command line"""
+    keys = []
     for option in command_line_options:
-        if option[0] == "-" and (not requests_help or option not in ("-h", "--help")): break
-        config_file_options.append(option)
-    args = _config_parser.parse_args(config_file_options)
-
-    namespace = NameSpace(args.configuration_files[0], True, sub_config_key, registry_key)
-    for cfg in args.configuration_files[1:]:
-        splits = cfg.split("=")
-        if len(splits)>1:
-            namespace.add(splits[0], splits[1])
-            for s in splits[2:]:
-                namespace[splits[0]].update(s)
+        if option == "--":
+            break
+        if option.startswith("--"):
+            keys.append(option[2:].split("=", 1)[0])
+    return keys
+
+
+# marks keys that are not attributes of the namespace
+_missing = object()
+
+def _lookup_attribute(namespace, key):
+    """Returns the value of the given attribute, which can contain periods, or `_missing` if the namespace does not contain this attribute"""
+    value = NameSpace.path(key).get(namespace, _missing)
+    return _missing if isinstance(value, NameSpace) else value
+
+
+def _select_attributes(namespace, keys, lazy):
+    """Returns the attributes of the namespace for the given keys.
+    Keys that are no attributes are interpreted as abbreviations, which argparse allows for unique prefixes of options; these select all attributes with the given prefix."""
+    selected = {}
+    prefixes = []
+    for key in keys:
+        value = _lookup_attribute(namespace, key)
+        if value is _missing:
+            prefixes.append(key)
         else:
-            namespace.update(splits[0])
+            selected[key] = value
+    if prefixes:
+        # keep the order of the attributes, as argparse reports ambiguous abbreviations in the order of the options
+        attributes = namespace._loaded_attributes() if lazy else namespace._attribute_index()
+        prefixes = tuple(prefixes)
+        selected = {k:v for k,v in attributes.items() if k in selected or k.startswith(prefixes)}
+    return selected
 
-    # compute the types of the nested configurations
-    attributes = namespace.attributes()
 
-    # create a parser entry for these types
+def _describe_parser(parser):
+    """Returns a deterministic description of the options of the given parser"""
     if parser is None:
-        parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter, usage='%(prog)s configuration_files [options]')
-
-    existing_options = list(parser._option_string_actions.keys())
+        return None
+    return [(action.option_strings, action.dest, repr(action.default), action.nargs, getattr(action.type, "__name__", repr(action.type))) for action in parser._actions]
 
-    parser.add_argument("configuration_files", nargs="*", default=default_config_files, help="The configuration files to parse. From the second config onward, it be key=value pairs to create sub-configurations")
 
+def _add_options(parser, attributes, existing_options, ignore_keys, infer_types):
+    """Adds one option for each of the given attributes to the parser"""
     for k,v in attributes.items():
         if k in ignore_keys: continue
         metavar = k.split(".")[-1].upper()
@@ -124,34 +277,29 @@ def config_parser(
         elif isinstance(v, list):
             requested_type = type(v[0]) if infer_types and v[0] is not None else None
             parser.add_argument(option, metavar=metavar, nargs="+", type=requested_type, help=f"Overwrite list of values for {k}, default={v}")
+        elif is_array(v):
+            # arrays contain only floats or only integers, see set_array_storage
+            requested_type = type(v[:1].tolist()[0]) if infer_types else None
+            parser.add_argument(option, metavar=metavar, nargs="+", type=requested_type, help=f"Overwrite list of values for {k}, default=[{len(v)} values]")
         else:
             requested_type = type(v) if infer_types and v is not None else None
             parser.add_argument(option, metavar=metavar, type=requested_type, help=f"Overwrite value for {k}, content of configuration file: `{v}`")
 
-    # parse arguments again
-    args = parser.parse_args(command_line_options)
-
-    # overwrite values in config
-    for k,v in vars(args).items():
-        if add_config_files or k != "configuration_files":
-            if v is not None:
-                namespace.set(k,v)
-
-    if auto_format:
-        namespace.format_self()
 
-    if store_config:
-        global _config
-        if _config is not None:
-            warnings.warn("The configuration has already been set, overwriting it.")
-        _config = namespace
-        _config.freeze()
+def get_reloader():
+    """Returns the :class:`Reloader` of the latest call to py:func:`config_parser` with `watch` selected.
 
-    return namespace
+    Raises: RuntimeError
+    If no configuration is watched.
+    """
+    if _reloader is None:
+        raise RuntimeError("Please call 'config_parser(..., watch=True)' before trying to reload the configuration")
+    return _reloader
 
 
 def get_config():
-    """Returns the global configuration object, which is the result of (the latest call to) py:func:`config_parser`.
+    """Returns the configuration of the current context, see :func:`use_config`.
+    Outside of any such context, it returns the global configuration object, which is the result of (the latest call to) py:func:`config_parser`.
 
     Returns:
     config: NameSpace
@@ -160,10 +308,38 @@ def get_config():
     Raises: RuntimeError
     If the configuration has not been loaded yet.
     """
-    global _config
-    if _config is None:
-        raise RuntimeError("Please call 'config_parser(..., store_config=True)' before trying to access the configuration")
-    return _config
+    config = _context_config.get()
+    if config is None:
+        config = _config
+        if config is None:
+            raise RuntimeError("Please call 'config_parser(..., store_config=True)' or use 'use_config(...)' before trying to access the configuration")
+    return config
+
+
+@contextlib.contextmanager
+def use_config(config):
+    """Makes :func:`get_config` return the given configuration inside this context, without changing the global configuration.
+
+    The configuration is stored in a context variable, so that each thread and each asyncio task can use its own configuration concurrently.
+    Asyncio tasks and `contextvars.copy_context().run` inherit the configuration that is active when they are created, while new threads start without one and, hence, obtain the global configuration.
+    Contexts can be nested; the previous configuration is restored when leaving the context.
+    Note that the configuration is shared and not copied, so it should not be modified while other threads or tasks use it.
+
+    Parameters:
+    config: NameSpace or FrozenNameSpace
+    The configuration to be returned by :func:`get_config`
+
+    Example:
+    ```
+    with yamlparser.use_config(tenant_config):
+        handle_request()  # get_config() returns tenant_config
+    ```
+    """
+    token = _context_config.set(config)
+    try:
+        yield config
+    finally:
+        _context_config.reset(token)
 
 
 def registry_parser(
@@ -191,6 +367,7 @@ def registry_parser(
     For debugging purposes, a list of command line options is accepted. This is mainly a debug and test feature.
     If not present, `sys.argv[1:]` is selected, as usual.
     """
+    import argparse
     if registry_file is not None:
         set_registry_file(registry_file)
 
@@ -205,6 +382,9 @@ def registry_parser(
     parser.add_argument("--collect", "-c", nargs="*", help = f"If given, search the given list of config files or directories for config files and provides all elements that contain the registry keyword; default: {default_packages}")
     parser.add_argument("--extensions", "-x", nargs="+", default=[".yaml", ".yml"], help = "Search for configuration files with the given extension(s)")
     parser.add_argument("--verbose", "-v", action="count", default=0, help = "Print more verbose information, use -vv to be even more verbose")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help = "The number of workers that --collect config files in parallel; use 0 for one worker per CPU")
+    parser.add_argument("--executor", choices=["process", "thread"], default="process", help = "The type of workers that are used with --jobs")
+    parser.add_argument("--rebuild", action="store_true", help = "Ignore the index of previously collected config files and --collect all files again")
 
     parser.add_argument("--key", "-k", help = "The key to read or write")
     parser.add_argument("--entry", "-e", help = "The entry to write")
@@ -239,7 +419,7 @@ def registry_parser(
     if args.collect:
         if args.verbose:
             print(f"Searching for configuration files containing registry key '{registry_key}'")
-        required_keys = get_required_registration(args.collect, registry_key, args.extensions, args.verbose)
+        required_keys = get_required_registration(args.collect, registry_key, args.extensions, args.verbose, args.jobs, args.executor, get_scan_index_file(get_registry_file()), args.rebuild)
         for key, occurrences in required_keys.items():
             print(f"Found required key '{key}'")
             if args.verbose:
@@ -0,0 +1,140 @@
+import contextlib
+import contextvars
+import os
+
+# the files that have been read in advance for the configuration that is currently loaded, as {real path: content}, see use_prefetched
+_prefetched = contextvars.ContextVar("yamlparser_prefetched", default=None)
+
+# a marker for files that have not been read in advance
+_not_prefetched = object()
+
+def _take_prefetched(config):
+    """Returns the content of the given configuration file if it has been read in advance, or `_not_prefetched` otherwise.
+    The content is handed out only once, later loads of the same file are served by the file cache."""
+    prefetched = _prefetched.get()
+    if not prefetched:
+        return _not_prefetched
+    return prefetched.pop(os.path.realpath(config), _not_prefetched)
+
+
+@contextlib.contextmanager
+def use_prefetched(prefetched):
+    """Uses the given contents of configuration files, see :func:`prefetch_files`, for all configurations loaded inside this context in the current thread or asyncio task"""
+    token = _prefetched.set(prefetched)
+    try:
+        yield prefetched
+    finally:
+        _prefetched.reset(token)
+
+
+def _sub_config_files(content, sub_config_key):
+    """Yields all sub-configuration files that are referenced in the given (nested) dictionary or list"""
+    if isinstance(content, dict):
+        if isinstance(content.get(sub_config_key), str):
+            yield content[sub_config_key]
+        for value in content.values():
+            yield from _sub_config_files(value, sub_config_key)
+    elif isinstance(content, list):
+        for value in content:
+            yield from _sub_config_files(value, sub_config_key)
+
+
+def _read(config):
+    """Finds, reads and parses the given configuration file via the file cache.
+
+    Returns:
+    The real path and the content of the file, or (None, `_not_prefetched`) for resources inside zipped packages, which are read when they are loaded, and in case of errors, which are reported when the file is loaded
+    """
+    from .namespace import _find_config_file, _read_config_file
+    from .resources import is_resource
+    from .cache import get_file_cache
+    from .arrays import _array_settings
+    try:
+        config = _find_config_file(config)
+        if is_resource(config):
+            return None, _not_prefetched
+        path = os.path.realpath(config)
+        return path, get_file_cache().load(path, lambda path: _read_config_file(path, None), _array_settings())
+    except Exception:
+        return None, _not_prefetched
+
+
+class _Discovery:
+    """Keeps track of the files that are read, and finds the sub-configuration files of the files that have been read"""
+    def __init__(self, sub_config_key, recursive):
+        self.sub_config_key = sub_config_key
+        self.recursive = recursive
+        self.prefetched = {}
+        self._seen = set()
+
+    def start(self, configs):
+        """Returns the given configuration files and the sub-configuration files of given dictionaries"""
+        files = []
+        for config in configs:
+            files.extend(self._new(_sub_config_files(config, self.sub_config_key) if isinstance(config, dict) else [config]))
+        return files
+
+    def done(self, path, content):
+        """Stores the content of the given file and returns its sub-configuration files that need to be read"""
+        if content is _not_prefetched:
+            return []
+        self.prefetched[path] = content
+        return self._new(_sub_config_files(content, self.sub_config_key)) if self.recursive else []
+
+    def _new(self, configs):
+        """Returns the files that have not been seen before; finding the files is left to the threads, since it accesses the file system"""
+        files = []
+        for config in configs:
+            if str(config) not in self._seen:
+                self._seen.add(str(config))
+                files.append(config)
+        return files
+
+
+def prefetch_files(configs, sub_config_key="yaml", recursive=True, jobs=None):
+    """Reads and parses the given configuration files and, if `recursive`, all their sub-configuration files concurrently in a thread pool.
+
+    Sub-configuration files are discovered as soon as the file referencing them has been parsed, so that all independent files are read at the same time.
+    Files that cannot be found or parsed are skipped; the errors are raised when loading the configuration.
+    The result is used by :func:`use_prefetched`, so that the configuration can be built in the usual order without waiting for any file.
+
+    Parameters:
+    configs: [str or dict]
+    The configuration files, which might include package @ filename, or dictionaries that reference sub-configuration files
+
+    sub_config_key: str
+    The key that references sub-configuration files
+
+    recursive: bool
+    Whether sub-configuration files are read as well
+
+    jobs: int or None
+    The number of threads, by default the number of CPUs plus 4, but at most 32
+
+    Returns:
+    prefetched: dict
+    The content of all files that have been read, indexed by their real paths
+    """
+    import concurrent.futures
+    discovery = _Discovery(sub_config_key, recursive)
+    with concurrent.futures.ThreadPoolExecutor(jobs) as executor:
+        pending = {executor.submit(_read, config) for config in discovery.start(configs)}
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                pending.update(executor.submit(_read, config) for config in discovery.done(*future.result()))
+    return discovery.prefetched
+
+
+async def aprefetch_files(configs, sub_config_key="yaml", recursive=True):
+    """Reads and parses the given configuration files and their sub-configuration files concurrently without blocking the event loop, see :func:`prefetch_files`.
+    The files are read in the default executor of the event loop."""
+    import asyncio
+    loop = asyncio.get_running_loop()
+    discovery = _Discovery(sub_config_key, recursive)
+    pending = {loop.run_in_executor(None, _read, config) for config in discovery.start(configs)}
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for future in done:
+            pending.update(loop.run_in_executor(None, _read, config) for config in discovery.done(*future.result()))
+    return discovery.prefetched
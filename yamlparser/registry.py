@@ -1,12 +1,22 @@
+import copy
 import os
 import pathlib
+import time
 import warnings
 
+from .arrays import is_array
+from .snapshot import _record_variable
+from .instrumentation import get_collector
+
 _registry_file = pathlib.Path.home() / ".yamlparser.yaml"
 
+# in-memory snapshot of the flattened registry content, as (signature, attributes)
+_registry_snapshot = None
+
 def set_registry_file(registry_file):
     global _registry_file
     _registry_file = pathlib.Path(registry_file)
+    invalidate_registry()
 
 def get_registry_file():
     return _registry_file
@@ -25,18 +35,64 @@ def registry_content():
     return namespace
 
 
+def _registry_signature():
+    """Returns a signature of the current registry file that changes whenever the file is modified"""
+    try:
+        stat = _registry_file.stat()
+        return (_registry_file, stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return (_registry_file, None, None)
+
+
+def registry_attributes():
+    """Returns the flattened content of the registry as a dictionary of fully-quoted keys to values.
+
+    The content is kept in memory and only re-read when the registry file is changed or replaced.
+    The returned dictionary is shared and must not be modified.
+    """
+    global _registry_snapshot
+    signature = _registry_signature()
+    if _registry_snapshot is None or _registry_snapshot[0] != signature:
+        _registry_snapshot = (signature, registry_content().attributes())
+    return _registry_snapshot[1]
+
+
+def invalidate_registry():
+    """Drops the in-memory snapshot of the registry, so that it is re-read with the next lookup"""
+    global _registry_snapshot
+    _registry_snapshot = None
+
+
 def get_registered_variable(variable):
+    collector = get_collector()
+    start = time.perf_counter()
+    state = _registered_state(variable)
+    if collector is not None:
+        collector.record(variable, "registry", start, time.perf_counter() - start, found=state is not None)
+    _record_variable(variable, state)
+    if state is None:
+        warnings.warn(f"The given variable {variable} was neither found in the registry file {_registry_file} nor has it been set as environment variable")
+        return variable
+    value = state[0]
+    if isinstance(value, (list, dict, set)) or is_array(value):
+        # the values of the registry snapshot are shared, so that configurations obtain copies of them
+        value = copy.deepcopy(value)
+    return value
+
+
+def _registered_state(variable):
+    """Returns the value of the given variable from the registry or the environment as a 1-tuple, or None if it is not found.
+    Values of the registry are shared with the snapshot of the registry and must not be modified."""
     # check registry file
-    namespace = registry_content()
-    if variable in namespace.attributes():
-        return namespace[variable]
+    attributes = registry_attributes()
+    if variable in attributes:
+        return (attributes[variable],)
 
     # check environment
     if variable in os.environ:
-        return os.environ[variable]
+        return (os.environ[variable],)
 
-    warnings.warn(f"The given variable {variable} was neither found in the registry file {_registry_file} nor has it been set as environment variable")
-    return variable
+    return None
 
 
 def set_registered_variable(variable, value):
@@ -46,6 +102,7 @@ def set_registered_variable(variable, value):
 
     # dump registry
     namespace.save(_registry_file)
+    invalidate_registry()
 
 
 def delete_registered_variable(variable):
@@ -63,3 +120,4 @@ def delete_registered_variable(variable):
 
     # dump registry
     namespace.save(_registry_file)
+    invalidate_registry()
@@ -0,0 +1,121 @@
+import threading
+import warnings
+
+from .namespace import NameSpace
+from .snapshot import _file_signature
+
+class Reloader:
+    """Reloads a configuration when any of the files that it was loaded from change, see :func:`NameSpace.reload`.
+
+    The reloader owns the namespace as it was loaded from the configuration files.
+    The configuration is derived from this namespace by applying the overrides (e.g., given on the command line), formatting and freezing it.
+    When files have changed, only the affected sub-configurations are loaded again, and a new configuration is derived, which replaces the previous one.
+    The previous configuration is not modified, so that code that still uses it sees a consistent state.
+    If the previous configuration is the global configuration of :func:`get_config`, it is replaced as well.
+    Changes of registry variables are not detected.
+
+    Parameters:
+    namespace: NameSpace
+    The modifiable namespace loaded from the configuration files, which must not be modified by others
+
+    overrides: dict or None
+    The values that are set after loading, as {attribute: value}
+
+    auto_format: bool
+    Whether :func:`NameSpace.format_self` is called for the configuration
+
+    freeze: bool
+    Whether the configuration is frozen
+
+    config: NameSpace or None
+    The current configuration, if it has been derived already
+    """
+    def __init__(self, namespace, overrides=None, auto_format=True, freeze=True, config=None):
+        self.namespace = namespace
+        self.overrides = dict(overrides or {})
+        self.auto_format = auto_format
+        self.freeze = freeze
+        self.config = self._derive() if config is None else config
+        self._files = self._signatures()
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def _derive(self):
+        """Returns a new configuration derived from the namespace; unchanged sub-namespaces are shared with the namespace until they are modified"""
+        # the functions are called unbound, since keys of the configuration might shadow them
+        config = NameSpace.clone(self.namespace)
+        for key, value in self.overrides.items():
+            NameSpace.set(config, key, value)
+        if self.auto_format:
+            NameSpace.format_self(config)
+        if self.freeze:
+            NameSpace.freeze(config)
+        return config
+
+    def _signatures(self):
+        """Returns the (modification time, size) of all files that the namespace was loaded from"""
+        return {signature[0]: signature[1] for _, _, signature in self.namespace._walk_sources() if signature is not None}
+
+    def subscribe(self, callback):
+        """Registers a function that is called as `callback(config, changed)` after each reload that changed the configuration, where `changed` is the set of changed attributes.
+        Callbacks are called in the thread that reloads the configuration."""
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        """Removes the given callback"""
+        self._subscribers.remove(callback)
+
+    def changed_files(self):
+        """Returns the list of files that have changed since they were loaded; only the modification times and sizes of the files are checked"""
+        return [path for path, signature in self._files.items() if _file_signature(path) != signature]
+
+    def reload(self, force=False):
+        """Reloads the configuration if any of its files has changed, or if `force` is selected, and notifies the subscribers.
+        If loading fails, the error is raised and the current configuration is kept, so that the files are reloaded again with the next call.
+
+        Returns:
+          changed: set of attributes whose values have changed, including added and removed ones
+        """
+        with self._lock:
+            if not force and not self.changed_files():
+                return set()
+            NameSpace.reload(self.namespace)
+            old, config = self.config, self._derive()
+            changed = NameSpace.diff(old, config)
+            self.config = config
+            self._files = self._signatures()
+            # replace the global configuration at once
+            from . import parser
+            if parser._config is old:
+                parser._config = config
+        if changed:
+            for callback in list(self._subscribers):
+                callback(config, changed)
+        return changed
+
+    def watch(self, interval=1.):
+        """Starts a daemon thread that checks the files every `interval` seconds and reloads the configuration when they have changed.
+        Errors while reloading, e.g., of files that are currently written, are reported as warnings, and loading is tried again with the next check."""
+        if self._thread is not None:
+            raise RuntimeError("The configuration is already watched")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, args=(interval,), name="yamlparser-reloader", daemon=True)
+        self._thread.start()
+        return self
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.reload()
+            except Exception as e:
+                warnings.warn(f"Could not reload the configuration: {e}")
+
+    def stop(self):
+        """Stops watching the files"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
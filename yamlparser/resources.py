@@ -0,0 +1,96 @@
+import collections
+import importlib.resources
+import os
+import pathlib
+import threading
+
+class ResourceIndex:
+    """An index of all resource files contained in a package.
+
+    The package is walked only once, when the index is created.
+    Files are indexed by their filename extension and by their base name, so that looking up a file does not require to walk the package again.
+    Since the package is traversed via `importlib.resources`, this also works for packages installed as zip files or wheels.
+
+    Parameters:
+    package: str
+    The name of the package to index
+    """
+    def __init__(self, package):
+        self.package = package
+        # all files as (relative parts, resource)
+        self.files = []
+        self.by_extension = collections.defaultdict(list)
+        self.by_name = collections.defaultdict(list)
+        self._walk(importlib.resources.files(package), ())
+
+    def _walk(self, directory, parts):
+        for resource in directory.iterdir():
+            relative = parts + (resource.name,)
+            if resource.is_dir():
+                self._walk(resource, relative)
+            elif resource.is_file():
+                entry = (relative, resource)
+                self.files.append(entry)
+                self.by_extension[os.path.splitext(resource.name)[1]].append(entry)
+                self.by_name[resource.name].append(entry)
+
+    def list(self, extensions):
+        """Returns all resource files with the given filename extensions"""
+        return [resource for extension in extensions for _, resource in self.by_extension.get(extension, [])]
+
+    def candidates(self, resource):
+        """Returns all files whose relative path ends with the given relative path to a resource.
+        Complete path components are matched first; only when no file matches, files are searched whose path ends with the given string."""
+        parts = pathlib.PurePath(resource).parts
+        candidates = [
+            file for relative, file in self.by_name.get(parts[-1], [])
+            if relative[-len(parts):] == parts
+        ] if parts else []
+        if not candidates:
+            candidates = [file for _, file in self.by_extension.get(pathlib.PurePath(resource).suffix, []) if str(file).endswith(str(resource))]
+        return candidates
+
+
+_resource_indexes = {}
+_resource_lock = threading.Lock()
+
+def get_resource_index(package):
+    """Returns the :class:`ResourceIndex` for the given package, which is created on first access"""
+    with _resource_lock:
+        index = _resource_indexes.get(package)
+        if index is None:
+            index = _resource_indexes[package] = ResourceIndex(package)
+        return index
+
+def invalidate_resource_index(package=None):
+    """Removes the index of the given package, or of all packages, such that it is rebuilt with the next access"""
+    with _resource_lock:
+        if package is None:
+            _resource_indexes.clear()
+        else:
+            _resource_indexes.pop(package, None)
+
+def find_config_file(package, resource):
+    """Finds the unique configuration file within the given package whose path ends with the given relative path.
+    If the file cannot be found, the index of the package is rebuilt once, in case the file has been added in the meantime.
+
+    Returns:
+    The resource file, either a `pathlib.Path` or a resource inside a zipped package
+
+    Raises: ValueError
+    If no or more than one file matches
+    """
+    candidates = get_resource_index(package).candidates(resource)
+    if not candidates:
+        invalidate_resource_index(package)
+        candidates = get_resource_index(package).candidates(resource)
+    if not len(candidates):
+        package_files = get_resource_index(package).list([pathlib.PurePath(resource).suffix])
+        raise ValueError(f"Could not find configuration file {resource} in package {package}; possible files are: {package_files}")
+    if len(candidates) > 1:
+        raise ValueError(f"The given config file {resource} is not unique in package {package}; candidates are: {candidates}")
+    return candidates[0]
+
+def is_resource(config):
+    """Checks whether the given object is a resource file that is not a string or a path, e.g., a file inside a zipped package"""
+    return not isinstance(config, (str, pathlib.PurePath)) and hasattr(config, "is_file") and hasattr(config, "open")
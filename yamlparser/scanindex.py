@@ -0,0 +1,97 @@
+import json
+import os
+import pathlib
+
+from .resources import is_resource
+
+# increase when the format of the index or the scanning results change
+_index_version = 1
+
+class ScanIndex:
+    """A persistent index of the registry keys found in configuration files, see :func:`get_required_registration`.
+
+    For each scanned file, the index stores the modification time and size, and the (value, attribute) pairs of all registry keys.
+    Files whose modification time and size did not change are not scanned again, and files that no longer exist are dropped when the index is saved.
+    The index is stored as a JSON file.
+    Files that include sub-configurations or whose registry values cannot be represented in JSON, as well as resources inside zipped packages, are always scanned.
+
+    Parameters:
+    index_file: str or pathlib.Path
+    The JSON file to store the index in
+
+    registry_key: str
+    The registry key that is searched for; an index that was created for another key is ignored
+    """
+    def __init__(self, index_file, registry_key="registry"):
+        self.index_file = pathlib.Path(index_file)
+        self.registry_key = registry_key
+        self.entries = {}
+        # statistics of the current scan
+        self.skipped = 0
+        self.scanned = 0
+        self.removed = 0
+
+    def load(self):
+        """Loads the index from file, if it exists and was created with the same registry key"""
+        try:
+            with open(self.index_file) as f:
+                content = json.load(f)
+        except (OSError, ValueError):
+            return
+        if content.get("version") == _index_version and content.get("registry_key") == self.registry_key:
+            self.entries = content["files"]
+
+    def save(self):
+        """Drops the entries of deleted files and writes the index atomically to file"""
+        for path in [path for path in self.entries if not os.path.exists(path)]:
+            del self.entries[path]
+            self.removed += 1
+        temporary = self.index_file.with_name(self.index_file.name + ".tmp")
+        with open(temporary, "w") as f:
+            json.dump(dict(version=_index_version, registry_key=self.registry_key, files=self.entries), f)
+        os.replace(temporary, self.index_file)
+
+    def _signature(self, config):
+        """Returns the path and the (modification time, size) of the given config file, or None for resources inside zipped packages"""
+        if is_resource(config):
+            return None, None
+        path = os.path.realpath(config)
+        stat = os.stat(path)
+        return path, [stat.st_mtime_ns, stat.st_size]
+
+    def lookup(self, config):
+        """Returns the list of (value, attribute) pairs of the given config file, or None if the file needs to be scanned"""
+        path, signature = self._signature(config)
+        entry = self.entries.get(path)
+        if entry is None or entry["signature"] != signature:
+            return None
+        self.skipped += 1
+        return [tuple(found) for found in entry["keys"]]
+
+    def update(self, config, found, indexable=True):
+        """Stores the (value, attribute) pairs that were found in the given config file.
+        Results that are not `indexable`, e.g., since they depend on sub-configuration files, are not stored."""
+        self.scanned += 1
+        path, signature = self._signature(config)
+        if path is None:
+            return
+        if not indexable:
+            self.entries.pop(path, None)
+            return
+        try:
+            json.dumps(found)
+        except (TypeError, ValueError):
+            # values that cannot be stored, such as dates, require to scan the file again
+            self.entries.pop(path, None)
+            return
+        self.entries[path] = dict(signature=signature, keys=found)
+
+    def stats(self):
+        """Returns the statistics of the current scan as a dictionary with keys `skipped`, `scanned`, `removed` and `size`"""
+        return dict(skipped=self.skipped, scanned=self.scanned, removed=self.removed, size=len(self.entries))
+
+
+def get_scan_index_file(registry_file):
+    """Returns the path of the scan index that belongs to the given registry file, which is stored next to it"""
+    registry_file = pathlib.Path(registry_file)
+    return registry_file.with_name(registry_file.stem + ".scan.json")
@@ -0,0 +1,214 @@
+import yaml
+
+from .backend import parse_yaml
+
+_tag_prefix = "tag:yaml.org,2002:"
+_str_tag = _tag_prefix + "str"
+
+class UnsupportedStructure(Exception):
+    """Raised by :func:`scan_registry_keys` when the file contains a structure that requires to build the full :class:`NameSpace`, e.g., sub-configurations"""
+
+
+class _Mapping:
+    """The state of a mapping that is currently scanned"""
+    __slots__ = ("path", "key", "expects_key", "names")
+
+    def __init__(self, path):
+        # the attribute of this mapping
+        self.path = path
+        # the last key that was read, whose value is expected next
+        self.key = None
+        self.expects_key = True
+        # the first components of all keys, to detect keys that are merged by the NameSpace
+        self.names = set()
+
+
+def _scalar_constructor():
+    """Returns a function that constructs the value of a scalar event like the safe loader"""
+    resolver = yaml.resolver.Resolver()
+    constructor = yaml.constructor.SafeConstructor()
+
+    def construct(event):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = resolver.resolve(yaml.ScalarNode, event.value, event.implicit)
+        if tag == _str_tag:
+            return event.value
+        node = yaml.ScalarNode(tag, event.value, style=event.style)
+        if tag in constructor.yaml_constructors:
+            # call the constructor directly, as construct_object would keep all constructed objects
+            return constructor.yaml_constructors[tag](constructor, node)
+        return constructor.construct_object(node)
+
+    return construct
+
+
+def scan_registry_keys(stream, registry_key="registry", sub_config_key="yaml", backend=None):
+    """Scans the given YAML stream for attributes that end with the given `registry_key`, without building a :class:`NameSpace`.
+
+    The stream is processed as a sequence of parser events, while only the path to the current key is kept in memory.
+    The results are identical to iterating through :func:`NameSpace.attributes`; in particular, the contents of lists are not considered.
+    Structures whose interpretation depend on other parts of the file raise an :class:`UnsupportedStructure`, in which case the file needs to be loaded completely.
+    These are sub-configurations, anchors and aliases, multiple documents, non-string keys, keys that occur more than once (including the first part of dotted keys), and list values of registry keys.
+
+    Parameters:
+    stream: str or file
+    The YAML content to scan
+
+    registry_key: str
+    The key to search for
+
+    sub_config_key: str
+    The key that indicates sub-configuration files
+
+    backend: str or None
+    The YAML backend to use, see :func:`set_yaml_backend`
+
+    Returns: [(str, object)]
+    The list of (attribute, value) pairs in the order of the file
+    """
+    construct = _scalar_constructor()
+    found = []
+    # the stack of mappings that are currently open; None represents a list, whose contents are ignored
+    stack = []
+    documents = 0
+    for event in parse_yaml(stream, backend):
+        kind = type(event)
+        if kind is yaml.ScalarEvent:
+            if event.anchor is not None:
+                raise UnsupportedStructure("anchors and aliases")
+            if event.tag is not None and event.tag != "!" and not event.tag.startswith(_tag_prefix):
+                raise UnsupportedStructure("explicit tags")
+        elif kind is yaml.MappingStartEvent or kind is yaml.SequenceStartEvent:
+            if event.anchor is not None:
+                raise UnsupportedStructure("anchors and aliases")
+            if not event.implicit:
+                raise UnsupportedStructure("explicit tags")
+        elif kind is yaml.AliasEvent:
+            raise UnsupportedStructure("anchors and aliases")
+        elif kind is yaml.DocumentStartEvent:
+            documents += 1
+            if documents > 1:
+                raise UnsupportedStructure("multiple documents")
+            continue
+        elif kind is not yaml.MappingEndEvent and kind is not yaml.SequenceEndEvent:
+            # start or end of stream or document
+            continue
+
+        current = stack[-1] if stack else None
+        if stack and current is None:
+            # inside a list, only keep track of the nesting
+            if kind is yaml.MappingStartEvent or kind is yaml.SequenceStartEvent:
+                stack.append(None)
+            elif kind is yaml.MappingEndEvent or kind is yaml.SequenceEndEvent:
+                stack.pop()
+                if stack and stack[-1] is not None:
+                    stack[-1].expects_key = True
+            elif event.value == sub_config_key:
+                # a sub-configuration inside a list would be loaded
+                raise UnsupportedStructure("sub-configuration")
+            continue
+
+        if kind is yaml.MappingEndEvent or kind is yaml.SequenceEndEvent:
+            stack.pop()
+            if stack:
+                stack[-1].expects_key = True
+            continue
+
+        if current is not None and current.expects_key:
+            # a key of the current mapping
+            if kind is not yaml.ScalarEvent:
+                raise UnsupportedStructure("complex key")
+            if event.value == "<<" and event.implicit[0]:
+                raise UnsupportedStructure("merge key")
+            key = construct(event)
+            if not isinstance(key, str):
+                raise UnsupportedStructure("non-string key")
+            if current.path and key == sub_config_key:
+                raise UnsupportedStructure("sub-configuration")
+            name = key.split(".", 1)[0]
+            if name in current.names:
+                raise UnsupportedStructure("repeated key")
+            current.names.add(name)
+            current.key = key
+            current.expects_key = False
+            continue
+
+        # a value, either of the current mapping or the document
+        if kind is yaml.MappingStartEvent:
+            stack.append(_Mapping(current.path + current.key + "." if current is not None else ""))
+        elif kind is yaml.SequenceStartEvent:
+            if current is None:
+                raise UnsupportedStructure("document is a list")
+            if current.key.rsplit(".", 1)[-1] == registry_key:
+                raise UnsupportedStructure("list of registry keys")
+            stack.append(None)
+        else:
+            if current is None:
+                if construct(event) is not None:
+                    raise UnsupportedStructure("document is a scalar")
+                continue
+            if current.key.rsplit(".", 1)[-1] == registry_key:
+                found.append((current.path + current.key, construct(event)))
+            current.expects_key = True
+
+    return found
+
+
+def scan_top_level_keys(stream, backend=None):
+    """Scans the given YAML stream for the keys of its top-level mapping, without constructing any of the values.
+
+    Only the nesting depth is kept in memory, so that the memory does not depend on the size of the stream.
+    The section of each key ranges from the line of the key to the line of the next key, and it can be loaded independently of the other sections.
+    Structures that prevent this raise an :class:`UnsupportedStructure`.
+    These are documents that are no block mapping, keys that do not start at the beginning of a line, complex and non-string keys, anchors and aliases, tag directives, and multiple documents.
+
+    Parameters:
+    stream: str or file
+    The YAML content to scan
+
+    backend: str or None
+    The YAML backend to use, see :func:`set_yaml_backend`
+
+    Returns: [(str, int)]
+    The keys and the zero-based lines at which they start, in the order of the stream
+    """
+    construct = _scalar_constructor()
+    keys = []
+    depth = 0
+    documents = 0
+    expects_key = True
+    for event in parse_yaml(stream, backend):
+        kind = type(event)
+        if kind is yaml.DocumentStartEvent:
+            documents += 1
+            if documents > 1:
+                raise UnsupportedStructure("multiple documents")
+            if event.tags:
+                raise UnsupportedStructure("tag directives")
+        elif kind is yaml.AliasEvent or getattr(event, "anchor", None) is not None:
+            raise UnsupportedStructure("anchors and aliases")
+        elif kind is yaml.MappingStartEvent or kind is yaml.SequenceStartEvent:
+            if depth == 0 and (kind is yaml.SequenceStartEvent or event.flow_style or not event.implicit):
+                raise UnsupportedStructure("document is no block mapping")
+            if depth == 1 and expects_key:
+                raise UnsupportedStructure("complex key")
+            depth += 1
+            expects_key = True
+        elif kind is yaml.MappingEndEvent or kind is yaml.SequenceEndEvent:
+            depth -= 1
+            # the next event of the top-level mapping is a key
+            expects_key = True
+        elif kind is yaml.ScalarEvent:
+            if depth == 0:
+                raise UnsupportedStructure("document is no mapping")
+            if depth == 1:
+                if expects_key:
+                    if event.start_mark.column != 0:
+                        raise UnsupportedStructure("indented keys")
+                    key = construct(event)
+                    if not isinstance(key, str):
+                        raise UnsupportedStructure("non-string key")
+                    keys.append((key, event.start_mark.line))
+                expects_key = not expects_key
+    return keys
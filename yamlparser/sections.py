@@ -0,0 +1,99 @@
+import os
+
+from .backend import load_yaml
+from .cache import get_file_cache
+from .arrays import compact_content
+from .instrumentation import span
+from .scanner import scan_top_level_keys, UnsupportedStructure
+from .snapshot import _file_signature
+
+# line breaks other than "\n" and "\r\n" in UTF-8, which YAML counts as lines as well
+_other_line_breaks = (b"\xc2\x85", b"\xe2\x80\xa8", b"\xe2\x80\xa9")
+
+# the size of the chunks in which files are searched for lines
+_chunk_size = 1 << 16
+
+def find_sections(path):
+    """Returns the byte ranges of the top-level keys of the given UTF-8 encoded configuration file, which can be loaded independently via :func:`load_sections`.
+
+    The file is scanned once in a stream, without constructing any values, see :func:`scan_top_level_keys`.
+    Scanned files are cached like parsed files, see :class:`FileCache`.
+
+    Returns:
+    The (modification time, size) of the file when it was scanned, and the sections as {name: [(start, end)]}, where `name` is the first part of dotted keys, and `end` is None for the last section of the file.
+    None is returned if the file cannot be split into sections, in which case it needs to be loaded completely.
+    """
+    path = os.path.realpath(path)
+    signature = _file_signature(path)
+    try:
+        return signature, get_file_cache().load(path, _scan_sections, "sections")
+    except UnsupportedStructure:
+        return None
+
+
+def _scan_sections(path):
+    with span(path, "parse", sections=True):
+        with open(path, "rb") as f:
+            if f.read(2) in (b"\xff\xfe", b"\xfe\xff"):
+                raise UnsupportedStructure("UTF-16 encoding")
+            f.seek(0)
+            keys = scan_top_level_keys(f)
+    offsets = _line_offsets(path, [line for _, line in keys])
+    sections = {}
+    for index, (key, line) in enumerate(keys):
+        start = offsets[line]
+        end = offsets[keys[index+1][1]] if index+1 < len(keys) else None
+        ranges = sections.setdefault(key.split(".", 1)[0], [])
+        if ranges and ranges[-1][1] == start:
+            # merge adjacent sections
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+    return sections
+
+
+def _line_offsets(path, lines):
+    """Returns the byte offsets of the given lines in the given file as {line: offset}
+
+    Raises: UnsupportedStructure
+    If the file contains line breaks other than "\\n" and "\\r\\n", so that lines would be counted differently than by YAML
+    """
+    targets = sorted(set(lines))
+    offsets = {}
+    index, line, offset, tail = 0, 0, 0, b""
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_chunk_size), b""):
+            if chunk.endswith(b"\r"):
+                # keep "\r\n" in one chunk
+                chunk += f.read(1)
+            if chunk.count(b"\r") != chunk.count(b"\r\n") or any(line_break in chunk or line_break in tail + chunk[:2] for line_break in _other_line_breaks):
+                raise UnsupportedStructure("line breaks other than \\n and \\r\\n")
+            # the position in the chunk at which the current line starts, and the number of line breaks after it
+            start, remaining = 0, chunk.count(b"\n")
+            while index < len(targets) and targets[index] - line <= remaining:
+                while line < targets[index]:
+                    start = chunk.index(b"\n", start) + 1
+                    line += 1
+                    remaining -= 1
+                offsets[line] = offset + start
+                index += 1
+            line += remaining
+            offset += len(chunk)
+            tail = chunk[-2:]
+    return offsets
+
+
+def load_sections(path, ranges, backend=None):
+    """Loads the given byte ranges of the configuration file, see :func:`find_sections`, as one YAML document.
+    Long numeric lists are stored according to :func:`set_array_storage`.
+
+    Returns: dict
+    The contents of the sections
+    """
+    with span(str(path), "parse", sections=len(ranges)):
+        parts = []
+        with open(path, "rb") as f:
+            for start, end in ranges:
+                f.seek(start)
+                parts.append(f.read() if end is None else f.read(end - start))
+        return compact_content(load_yaml(b"".join(parts), backend))
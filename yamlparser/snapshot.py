@@ -0,0 +1,96 @@
+import contextlib
+import os
+import pathlib
+
+# increase when the format of the snapshots changes
+_snapshot_version = 1
+
+# the inputs that are recorded while a configuration is loaded, see Snapshot.record
+_recording = None
+
+def _record_file(config):
+    """Records that the given configuration file has been loaded"""
+    if _recording is not None:
+        if isinstance(config, (str, pathlib.PurePath)):
+            path = os.path.realpath(config)
+            _recording["files"][path] = _file_signature(path)
+        else:
+            # resources inside zipped packages cannot be validated
+            _recording["valid"] = False
+
+def _record_variable(variable, state):
+    """Records that the given variable has been read from the registry or the environment"""
+    if _recording is not None:
+        _recording["variables"][variable] = state
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+
+def snapshot_key(*inputs):
+    """Returns a fingerprint of the given inputs, which need to have a deterministic `repr`, and of the current working directory"""
+    import hashlib
+    return hashlib.sha256(repr((_snapshot_version, os.getcwd()) + inputs).encode()).hexdigest()
+
+
+class Snapshot:
+    """A snapshot of a fully resolved configuration, which can be loaded without parsing any YAML file.
+
+    Snapshots are stored as pickle files in the given directory, one file per key.
+    Together with the configuration, the snapshot stores the modification time and size of all configuration files that were loaded, including the transitive sub-configurations, and the values of all variables that were read from the registry or the environment.
+    A snapshot is only loaded when none of these inputs has changed; otherwise it is ignored and replaced when saving.
+
+    Parameters:
+    directory: str or pathlib.Path
+    The directory to store the snapshots in, which is created if required
+
+    key: str
+    The fingerprint of all other inputs, see :func:`snapshot_key`
+    """
+    def __init__(self, directory, key):
+        self.directory = pathlib.Path(directory)
+        self.key = key
+        self.snapshot_file = self.directory / (key + ".pickle")
+        self.inputs = None
+
+    def load(self):
+        """Returns the stored configuration, or None if it does not exist or any of its inputs has changed"""
+        import pickle
+        from .registry import _registered_state
+        try:
+            with open(self.snapshot_file, "rb") as f:
+                files, variables, namespace = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, AttributeError, ImportError):
+            # snapshots that are unreadable or refer to classes that no longer exist are ignored
+            return None
+        if any(_file_signature(path) != signature for path, signature in files.items()):
+            return None
+        if any(_registered_state(variable) != state for variable, state in variables.items()):
+            return None
+        return namespace
+
+    @contextlib.contextmanager
+    def record(self):
+        """Records all inputs that are used while loading a configuration inside this context"""
+        global _recording
+        _recording = dict(files={}, variables={}, valid=True)
+        try:
+            yield
+        finally:
+            self.inputs, _recording = _recording, None
+
+    def save(self, namespace):
+        """Stores the given namespace together with the recorded inputs; nothing is stored if any of the inputs cannot be validated"""
+        if self.inputs is None or not self.inputs["valid"]:
+            return
+        import pickle
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # several processes might write the same snapshot at the same time
+        temporary = self.snapshot_file.with_name(f"{self.snapshot_file.name}.{os.getpid()}.tmp")
+        with open(temporary, "wb") as f:
+            pickle.dump((self.inputs["files"], self.inputs["variables"], namespace), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, self.snapshot_file)
@@ -0,0 +1,207 @@
+import collections
+import itertools
+import os
+import random
+
+from .formatting import Formatter, _placeholder
+from .namespace import NameSpace
+
+class Sweep:
+    """Generates variants of a configuration by overriding some of its values, e.g., for hyperparameter sweeps, see :func:`NameSpace.sweep`.
+
+    Variants are created lazily while iterating.
+    Each variant is a copy-on-write clone (see :func:`NameSpace.clone`) of one formatted copy of the base namespace, so that variants share all unmodified sub-namespaces.
+    When formatting, only the overridden values and the values whose placeholders depend on them are formatted again for each variant.
+    Hence, the cost of a variant depends on the number of overridden keys and on the number of keys in the top-level namespace, but not on the size of the configuration.
+    The base namespace is formatted and analyzed at the start of each iteration, so it should not be modified while iterating.
+    Variants of a frozen namespace are frozen, too.
+
+    Parameters:
+    namespace: NameSpace
+    The base configuration, which is not modified
+
+    parameters: dict
+    The values for each overridden key, as {attribute: [value, ...]}, where attributes can contain periods
+
+    mode: str
+    "grid" to generate all combinations of values, "zip" to combine the i-th values of all keys, or "random" to sample `count` distinct combinations
+
+    count: int or None
+    The number of sampled combinations, required for the "random" mode
+
+    seed: int or None
+    The seed of the random sampling
+
+    auto_format: bool
+    Whether the variants are formatted, see :func:`NameSpace.format_self`
+
+    Raises: ValueError
+    If the mode is unknown, the values of the "zip" mode have different lengths, or the "random" mode requests more combinations than available
+    """
+    def __init__(self, namespace, parameters, mode="grid", count=None, seed=None, auto_format=True):
+        self.namespace = namespace
+        self.parameters = {key: list(values) for key, values in parameters.items()}
+        self.mode = mode
+        self.count = count
+        self.seed = seed
+        self.auto_format = auto_format
+        sizes = [len(values) for values in self.parameters.values()]
+        if mode == "zip":
+            if len(set(sizes)) > 1:
+                raise ValueError(f"All parameters of a zipped sweep need the same number of values, but got {dict(zip(self.parameters, sizes))}")
+        elif mode == "random":
+            if count is None:
+                raise ValueError("Random sweeps require the number of sampled combinations")
+            if count > self._grid_size():
+                raise ValueError(f"Cannot sample {count} distinct combinations from {self._grid_size()} available ones")
+        elif mode != "grid":
+            raise ValueError(f"Unknown sweep mode {mode}, please select grid, zip or random")
+
+    def _grid_size(self):
+        size = 1
+        for values in self.parameters.values():
+            size *= len(values)
+        return size
+
+    def __len__(self):
+        """Returns the number of variants"""
+        if self.mode == "zip":
+            return min((len(values) for values in self.parameters.values()), default=0)
+        if self.mode == "random":
+            return self.count
+        return self._grid_size()
+
+    def combinations(self):
+        """Yields the overridden values of each variant, as {attribute: value}"""
+        keys, values = list(self.parameters), list(self.parameters.values())
+        if self.mode == "zip":
+            for combination in zip(*values):
+                yield dict(zip(keys, combination))
+        elif self.mode == "random":
+            # sample distinct positions in the grid without generating the grid
+            for index in random.Random(self.seed).sample(range(self._grid_size()), self.count):
+                combination = []
+                for options in reversed(values):
+                    index, position = divmod(index, len(options))
+                    combination.append(options[position])
+                yield dict(zip(keys, reversed(combination)))
+        else:
+            for combination in itertools.product(*values):
+                yield dict(zip(keys, combination))
+
+    def items(self):
+        """Yields the overridden values and the variant, as ({attribute: value}, NameSpace), for each variant"""
+        base = self.namespace
+        template = base._copy(True)
+        if self.auto_format:
+            raw = base._attribute_index()
+            NameSpace.format_self(template)
+            affected = _affected_keys(raw, self.parameters)
+            formatted = template._attribute_index()
+            # the keys of the base that are replaced when overriding each key
+            replaced = {key: [k for k in raw if k == key or k.startswith(key+".")] for key in self.parameters}
+        # frozen sub-namespaces memoize their dictionaries, which are shared when dumping the variants
+        NameSpace.freeze(template)
+        # the functions are called unbound, since keys of the configuration might shadow them
+        for combination in self.combinations():
+            variant = template._copy(True)
+            for key, value in combination.items():
+                NameSpace.set(variant, key, value)
+            if self.auto_format:
+                self._format(variant, combination, raw, formatted, affected, replaced)
+            if not base._modifiable:
+                NameSpace.freeze(variant)
+            yield combination, variant
+
+    def __iter__(self):
+        """Yields the variants"""
+        for _, variant in self.items():
+            yield variant
+
+    def _format(self, variant, combination, raw, formatted, affected, replaced):
+        """Formats the overridden values of the variant and the values that depend on them"""
+        overridden = {}
+        for key in combination:
+            value = NameSpace.get(variant, key)
+            overridden.update({key+"."+k: v for k, v in value._attribute_index().items()} if isinstance(value, NameSpace) else {key: value})
+        hidden = {k for key in combination for k in replaced[key] if k not in overridden}
+        values = {k: raw[k] for k in affected if k not in hidden}
+        values.update(overridden)
+        formatter = Formatter(_Overlay(formatted, values, hidden))
+        # values that are not affected are already formatted
+        formatter.resolved = collections.ChainMap({}, _Overlay(formatted, {}, hidden | values.keys()))
+        for key, value in values.items():
+            if isinstance(value, (str, list)):
+                resolved = formatter.resolve(key)
+                if resolved != (overridden[key] if key in overridden else formatted[key]):
+                    NameSpace.set(variant, key, resolved)
+
+    def save(self, directory, file_name="variant_{index}.yaml", indent=4, backend=None):
+        """Writes all variants into the given directory, which is created if needed.
+
+        Parameters:
+        file_name: str
+        The name of the files, where `{index}` is replaced by the index of the variant
+
+        Returns: [str]
+        The paths of the written files, in the order of the variants
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for index, variant in enumerate(self):
+            path = os.path.join(directory, file_name.format(index=index))
+            NameSpace.save(variant, path, indent, backend)
+            paths.append(path)
+        return paths
+
+
+class _Overlay:
+    """A read-only view of the flattened attributes, where the given values replace the original ones and the hidden keys are removed"""
+    __slots__ = ("attributes", "values", "hidden")
+
+    def __init__(self, attributes, values, hidden):
+        self.attributes = attributes
+        self.values = values
+        self.hidden = hidden
+
+    def __contains__(self, key):
+        return key in self.values or (key not in self.hidden and key in self.attributes)
+
+    def __getitem__(self, key):
+        if key in self.values:
+            return self.values[key]
+        if key in self.hidden:
+            raise KeyError(key)
+        return self.attributes[key]
+
+
+def _affected_keys(attributes, parameters):
+    """Returns the keys of the flattened attributes whose placeholders depend, directly or indirectly, on any of the overridden keys or the keys inside them"""
+    # all keys that a placeholder might refer to, including keys that do not exist yet
+    dependents = collections.defaultdict(list)
+    for key, value in attributes.items():
+        if isinstance(value, (str, list)):
+            scope = key.split(".")[:-1]
+            for name in _placeholders(value):
+                prefix = ""
+                dependents[name].append(key)
+                for part in scope:
+                    prefix += part + "."
+                    dependents[prefix+name].append(key)
+    pending = [k for k in dependents if any(k == key or k.startswith(key+".") for key in parameters)]
+    affected = set()
+    while pending:
+        for dependent in dependents.get(pending.pop(), ()):
+            if dependent not in affected:
+                affected.add(dependent)
+                pending.append(dependent)
+    return affected
+
+
+def _placeholders(value):
+    """Yields the names of all placeholders in the given string or (nested) list"""
+    if isinstance(value, list):
+        for element in value:
+            yield from _placeholders(element)
+    elif isinstance(value, str):
+        yield from _placeholder.findall(value)
@@ -1,6 +1,15 @@
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import random
 import yamlparser
 import os
+import tempfile
+import threading
+import time
 import unittest
+import unittest.mock
 
 class TestArgparse(unittest.TestCase):
 
@@ -76,6 +85,235 @@ class TestArgparse(unittest.TestCase):
         config = yamlparser.get_config()
         self.assertIs(config, namespace)
 
+    def test_use_config(self):
+        tenants = [yamlparser.NameSpace(dict(tenant=i)) for i in range(64)]
+        default = yamlparser.NameSpace(dict(tenant=-1))
+        previous, yamlparser.parser._config = yamlparser.parser._config, default
+        try:
+            # nested contexts restore the previous configuration
+            with yamlparser.use_config(tenants[0]):
+                self.assertIs(yamlparser.get_config(), tenants[0])
+                with yamlparser.use_config(tenants[1]):
+                    self.assertIs(yamlparser.get_config(), tenants[1])
+                self.assertIs(yamlparser.get_config(), tenants[0])
+            self.assertIs(yamlparser.get_config(), default)
+
+            def handle(i):
+                tenant = tenants[i % len(tenants)]
+                with yamlparser.use_config(tenant):
+                    for _ in range(100):
+                        if yamlparser.get_config() is not tenant:
+                            return False
+                        time.sleep(random.random() * 1e-5)
+                # threads without context use the global configuration
+                return yamlparser.get_config() is default
+
+            with concurrent.futures.ThreadPoolExecutor(16) as executor:
+                self.assertTrue(all(executor.map(handle, range(256))))
+
+            async def handle_async(i):
+                tenant = tenants[i % len(tenants)]
+                with yamlparser.use_config(tenant):
+                    for _ in range(20):
+                        await asyncio.sleep(0)
+                        if yamlparser.get_config().tenant != tenant.tenant:
+                            return False
+                return yamlparser.get_config() is default
+
+            async def handle_all():
+                return await asyncio.gather(*(handle_async(i) for i in range(1000)))
+
+            self.assertTrue(all(asyncio.run(handle_all())))
+
+            # without any configuration, an error is raised
+            yamlparser.parser._config = None
+            self.assertRaises(RuntimeError, yamlparser.get_config)
+        finally:
+            yamlparser.parser._config = previous
+
+    def test_reload(self):
+        previous, yamlparser.parser._config = yamlparser.parser._config, None
+        with tempfile.TemporaryDirectory() as directory:
+            def write(name, content):
+                path = os.path.join(directory, name)
+                yamlparser.NameSpace(content, sub_config_key=None).save(path)
+                write.time += 10**9
+                os.utime(path, ns=(write.time, write.time))
+                return path
+            write.time = os.stat(directory).st_mtime_ns
+            sub_config = write("sub.yaml", dict(nested=dict(value=1, other="{name}")))
+            config = write("config.yaml", dict(name="test", nested={"yaml": sub_config}))
+            try:
+                namespace = yamlparser.config_parser(command_line_options=[config, "--nested.value", "10"], watch=True)
+                reloader = yamlparser.get_reloader()
+                self.assertIs(reloader.config, namespace)
+                notifications = []
+                reloader.subscribe(lambda config, changed: notifications.append((config, changed)))
+                self.assertEqual(reloader.reload(), set())
+
+                # command line options and formatting are applied again, and the global configuration is replaced
+                write("sub.yaml", dict(nested=dict(value=2, other="{name}!")))
+                self.assertEqual(reloader.changed_files(), [os.path.realpath(sub_config)])
+                self.assertEqual(reloader.reload(), {"nested.other"})
+                config_1 = yamlparser.get_config()
+                self.assertIsNot(config_1, namespace)
+                self.assertEqual(notifications, [(config_1, {"nested.other"})])
+                self.assertEqual(config_1.nested.value, 10)
+                self.assertEqual(config_1.nested.other, "test!")
+                self.assertRaises(AttributeError, config_1.set, "name", "frozen")
+                # the previous configuration is not changed
+                self.assertEqual(namespace.nested.other, "test")
+                self.assertEqual(reloader.reload(), set())
+
+                # formatted values depend on changes in other files
+                write("config.yaml", dict(name="changed", nested={"yaml": sub_config}))
+                self.assertEqual(reloader.reload(), {"name", "nested.other"})
+                self.assertEqual(yamlparser.get_config().nested.other, "changed!")
+
+                # watching reloads changes in the background
+                reloaded = threading.Event()
+                reloader.subscribe(lambda config, changed: reloaded.set())
+                reloader.watch(interval=0.01)
+                try:
+                    write("sub.yaml", dict(nested=dict(value=3, other="{name}?")))
+                    self.assertTrue(reloaded.wait(10))
+                finally:
+                    reloader.stop()
+                self.assertEqual(yamlparser.get_config().nested.other, "changed?")
+
+                # keys that are named like functions of the namespace do not affect watching
+                shadowing = write("shadowing.yaml", dict(clone=1, name="test"))
+                namespace = yamlparser.config_parser(command_line_options=[shadowing, "--name", "changed"], store_config=False, watch=True)
+                self.assertEqual(namespace.clone, 1)
+                self.assertEqual(yamlparser.get_reloader().namespace.name, "test")
+            finally:
+                yamlparser.parser._config = previous
+
+    def test_lazy(self):
+        yaml_file = os.path.join(os.path.dirname(__file__), "test_config.yaml")
+        try:
+            file_descriptor,filename = tempfile.mkstemp(".yaml")
+            yamlparser.NameSpace(dict(name="umbrella", nested={"yaml": yaml_file, "name": "overwritten"})).save(filename)
+
+            # sub-configurations are not loaded when not required
+            yamlparser.reset_loaded_file_count()
+            command_line_options = (filename, "--name", "UPDATED")
+            namespace = yamlparser.config_parser(command_line_options=command_line_options, store_config=False, auto_format=False, lazy=True)
+            self.assertEqual(namespace.name, "UPDATED")
+            self.assertEqual(yamlparser.get_loaded_file_count(), 1)
+
+            # options in sub-configurations load them
+            command_line_options = (filename, "--nested.pi", "3")
+            namespace = yamlparser.config_parser(command_line_options=command_line_options, store_config=False, auto_format=False, lazy=True)
+            self.assertEqual(yamlparser.get_loaded_file_count(), 2)
+            self.assertEqual(namespace.nested.pi, 3.)
+            self.assertEqual(namespace.nested.name, "overwritten")
+        finally:
+            os.close(file_descriptor)
+            os.remove(filename)
+
+    def test_mentioned_options(self):
+        yaml_file = os.path.join(os.path.dirname(__file__), "test_config.yaml")
+        parser = argparse.ArgumentParser()
+        parser.add_argument("--name", default="default")
+        command_line_options = (yaml_file, "--nested.pi", "3", "--int=7")
+        namespace = yamlparser.config_parser(parser, command_line_options=command_line_options, store_config=False)
+        # only the given options are added to the parser, abbreviations are resolved as before
+        self.assertEqual(set(parser._option_string_actions), {"-h", "--help", "--name", "--nested.pi", "--int_value"})
+        self.assertEqual(namespace.nested.pi, 3.)
+        self.assertEqual(namespace.int_value, 7)
+        # options of the parser obtain their defaults from the configuration
+        self.assertEqual(namespace.name, "test")
+
+        # ambiguous abbreviations are rejected
+        with self.assertRaises(SystemExit):
+            yamlparser.config_parser(command_line_options=(yaml_file, "--nested.", "3"), store_config=False)
+
+
+    @unittest.mock.patch.dict(os.environ, {"SNAPSHOT_KEY": "first"})
+    def test_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            sub_config = os.path.join(directory, "sub.yaml")
+            config = os.path.join(directory, "config.yaml")
+            yamlparser.NameSpace(dict(nested=dict(value=1, other="{name}"))).save(sub_config)
+            yamlparser.NameSpace(dict(name="test", nested={"yaml": sub_config}, data={"registry": "SNAPSHOT_KEY"}), sub_config_key=None, registry_key=None).save(config)
+            snapshots = os.path.join(directory, "snapshots")
+
+            def parse(*options):
+                yamlparser.reset_loaded_file_count()
+                return yamlparser.config_parser(command_line_options=[config, *options], store_config=False, snapshot_dir=snapshots)
+
+            # the first call writes the snapshot, the second one reads it
+            namespace = parse("--nested.value", "2")
+            self.assertEqual(yamlparser.get_loaded_file_count(), 2)
+            self.assertEqual(parse("--nested.value", "2").dict(), namespace.dict())
+            self.assertEqual(yamlparser.get_loaded_file_count(), 0)
+            self.assertEqual(namespace.nested.other, "test")
+            self.assertEqual(namespace.data, "first")
+
+            # other command line options require another snapshot
+            self.assertEqual(parse("--nested.value", "3").nested.value, 3)
+            self.assertEqual(yamlparser.get_loaded_file_count(), 2)
+
+            # changes of any of the inputs invalidate the snapshot
+            yamlparser.NameSpace(dict(nested=dict(value=1, other="{name}!"))).save(sub_config)
+            self.assertEqual(parse("--nested.value", "2").nested.other, "test!")
+            self.assertEqual(yamlparser.get_loaded_file_count(), 2)
+            os.environ["SNAPSHOT_KEY"] = "second"
+            self.assertEqual(parse("--nested.value", "2").data, "second")
+            self.assertEqual(yamlparser.get_loaded_file_count(), 2)
+            parse("--nested.value", "2")
+            self.assertEqual(yamlparser.get_loaded_file_count(), 0)
+
+            # snapshots that refer to missing modules or classes are rebuilt
+            for content in (b"cyamlparser_missing_module\nNameSpace\n.", b"cyamlparser\nMissingNameSpace\n."):
+                for snapshot in os.listdir(snapshots):
+                    with open(os.path.join(snapshots, snapshot), "wb") as f:
+                        f.write(content)
+                self.assertEqual(parse("--nested.value", "2").nested.value, 2)
+                self.assertEqual(yamlparser.get_loaded_file_count(), 2)
+
+    @unittest.mock.patch.dict(os.environ, {"STATS_KEY": "found"})
+    def test_stats(self):
+        with tempfile.TemporaryDirectory() as directory:
+            inner = os.path.join(directory, "inner.yaml")
+            sub_config = os.path.join(directory, "sub.yaml")
+            config = os.path.join(directory, "config.yaml")
+            yamlparser.NameSpace(dict(inner=dict(value=1))).save(inner)
+            yamlparser.NameSpace(dict(nested=dict(inner={"yaml": inner}, other="{name}")), sub_config_key=None).save(sub_config)
+            yamlparser.NameSpace(dict(name="test", nested={"yaml": sub_config}, data={"registry": "STATS_KEY"}, missing={"registry": "STATS_MISSING_KEY"}), sub_config_key=None, registry_key=None).save(config)
+
+            with yamlparser.collect_stats() as collector:
+                with self.assertWarns(UserWarning):
+                    namespace = yamlparser.config_parser(command_line_options=[config, "--nested.inner.value", "2"], store_config=False)
+            self.assertEqual(namespace.nested.inner.value, 2)
+            self.assertEqual(namespace.nested.other, "test")
+
+            report = yamlparser.stats()
+            self.assertEqual(set(report["files"]), {os.path.realpath(path) for path in (config, sub_config, inner)})
+            for entry in report["files"].values():
+                self.assertEqual(entry["loads"] + entry["cache_hits"], 1)
+                if entry["loads"]:
+                    self.assertGreater(entry["parse_time"], 0)
+            self.assertEqual(report["sub_configs"]["count"], 2)
+            self.assertEqual(report["sub_configs"]["max_depth"], 2)
+            self.assertEqual(report["registry"]["lookups"], 2)
+            self.assertEqual(report["registry"]["hits"], 1)
+            self.assertEqual(report["registry"]["misses"], 1)
+            for category in ("argparse", "format_self", "config_parser"):
+                self.assertIn(category, report["categories"])
+
+            trace = os.path.join(directory, "trace.json")
+            collector.write_trace(trace)
+            with open(trace) as f:
+                events = json.load(f)["traceEvents"]
+            self.assertEqual(len(events), len(collector.events))
+            self.assertTrue(all(event["ph"] == "X" for event in events))
+
+            # nothing is recorded outside of the context
+            yamlparser.config_parser(command_line_options=[sub_config], store_config=False)
+            self.assertEqual(len(collector.events), len(events))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,52 @@
+import yamlparser
+from yamlparser import bench
+import json
+import os
+import tempfile
+import unittest
+
+class TestBench(unittest.TestCase):
+
+    def test_generate_config(self):
+        config = bench.generate_config(width=6, depth=3, list_size=4, placeholders=0.5, registry=0.2)
+        self.assertEqual(len(config), 7)
+        self.assertEqual(config["list"], [0, 1, 2, 3])
+        self.assertEqual(len(config["key1"]["key1"]), 7)
+        self.assertEqual(config, bench.generate_config(width=6, depth=3, list_size=4, placeholders=0.5, registry=0.2))
+        # placeholders refer to existing keys
+        namespace = yamlparser.NameSpace(bench.generate_config(width=6, depth=3, placeholders=0.5))
+        namespace.format_self()
+        self.assertNotIn("{", namespace.dump())
+
+
+    def test_run_and_compare(self):
+        results = bench.run_benchmarks(["tiny"], names=["NameSpace", "load", "get_required_registration"], repeat=1)
+        self.assertIn("NameSpace.update", results["results"])
+        self.assertNotIn("config_parser", results["results"])
+        measurement = results["results"]["load.sub_configs"]["tiny"]
+        self.assertGreater(measurement["median"], 0)
+        self.assertGreater(measurement["peak_memory"], 0)
+        self.assertGreater(measurement["retained_memory"], 0)
+        self.assertGreaterEqual(measurement["peak_memory"], measurement["retained_memory"])
+
+        # a slower result is reported as regression
+        slower = json.loads(json.dumps(results))
+        slower["results"]["NameSpace.update"]["tiny"]["median"] *= 2
+        regressions = [row for row in bench.compare(results, slower, 0.5) if row[-1]]
+        self.assertEqual([row[:3] for row in regressions], [("NameSpace.update", "tiny", "median")])
+        # results without the retained memory can still be compared
+        del slower["results"]["NameSpace.update"]["tiny"]["retained_memory"]
+        self.assertEqual([row[2] for row in bench.compare(slower, results) if row[:2] == ("NameSpace.update", "tiny")], ["median", "peak_memory"])
+
+        with tempfile.TemporaryDirectory() as directory:
+            baseline, current = os.path.join(directory, "baseline.json"), os.path.join(directory, "current.json")
+            bench.main(["run", "--sizes", "tiny", "--filter", "NameSpace.dict", "--repeat", "1", "--output", baseline])
+            with open(baseline) as f:
+                self.assertIn("NameSpace.dict", json.load(f)["results"])
+            with open(current, "w") as f:
+                json.dump(slower, f)
+            self.assertEqual(bench.main(["compare", current, current]), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
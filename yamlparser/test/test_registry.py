@@ -3,7 +3,9 @@ from yamlparser.registry import set_registry_file, get_registered_variable, set_
 from yamlparser.namespace import get_required_registration
 import os
 import tempfile
+import yaml
 import unittest
+from unittest import mock
 
 class TestRegistry(unittest.TestCase):
 
@@ -78,6 +80,105 @@ class TestRegistry(unittest.TestCase):
             assert str(registry_contents["TEST_KEY"][0][0]).endswith("registry_config.yaml")
 
 
+    def test_registry_snapshot(self):
+        yamlparser.registry_parser(self.registry_file, command_line_options=["-a", "-k", "TEST_KEY", "-e", "test_variable"])
+
+        # the registry file is read only once, independent of the number of references
+        with mock.patch("yamlparser.registry.registry_content", wraps=registry_content) as content:
+            namespace = yamlparser.NameSpace({f"data{i}": {"registry": "TEST_KEY"} for i in range(200)})
+            self.assertEqual(content.call_count, 1)
+        self.assertTrue(all(value == "test_variable" for value in namespace.dict().values()))
+
+        # modifications of the registry invalidate the snapshot
+        yamlparser.registry_parser(self.registry_file, command_line_options=["-a", "-k", "TEST_KEY", "-e", "other_variable"])
+        assert get_registered_variable("TEST_KEY") == "other_variable"
+        yamlparser.registry_parser(self.registry_file, command_line_options=["-a", "-k", "nested.key", "-e", "nested_variable"])
+        assert get_registered_variable("nested.key") == "nested_variable"
+
+        # modifications of registered lists do not affect the snapshot
+        set_registry_file(self.registry_file)
+        set_registered_variable("TEST_LIST", ["a", "b"])
+        namespace = yamlparser.NameSpace(dict(x={"registry": "TEST_LIST"}))
+        namespace.x.append("c")
+        self.assertEqual(yamlparser.NameSpace(dict(x={"registry": "TEST_LIST"})).x, ["a", "b"])
+        self.assertEqual(get_registered_variable("TEST_LIST"), ["a", "b"])
+
+
+    def test_parallel_collection(self):
+        # create a synthetic tree of config files
+        with tempfile.TemporaryDirectory() as directory:
+            for i in range(20):
+                subdirectory = os.path.join(directory, f"dir{i%3}")
+                os.makedirs(subdirectory, exist_ok=True)
+                yamlparser.NameSpace({"name": f"config{i}", "data": {"registry": f"KEY{i%4}"}, "other": {"registry": "SHARED"}}, registry_key=None).save(os.path.join(subdirectory, f"config{i}.yaml"))
+
+            sequential = get_required_registration([directory, "@yamlparser"])
+            self.assertEqual(len(sequential["SHARED"]), 20)
+            self.assertEqual(len(sequential["KEY0"]), 5)
+            self.assertIn("TEST_KEY", sequential)
+            for executor in ("thread", "process"):
+                parallel = get_required_registration([directory, "@yamlparser"], jobs=3, executor=executor)
+                self.assertEqual(list(parallel.items()), list(sequential.items()))
+
+            with self.assertRaises(ValueError):
+                get_required_registration([directory], jobs=2, executor="unknown")
+
+    def test_scan_index(self):
+        index_file = yamlparser.get_scan_index_file(self.registry_file)
+        with tempfile.TemporaryDirectory() as directory:
+            files = [os.path.join(directory, f"config{i}.yaml") for i in range(5)]
+            for i, filename in enumerate(files):
+                yamlparser.NameSpace({"data": {"registry": f"KEY{i}"}}, registry_key=None).save(filename)
+            try:
+                with mock.patch("yamlparser.namespace._scan_config_file", wraps=yamlparser.namespace._scan_config_file) as scan:
+                    first = get_required_registration([directory], index_file=index_file)
+                    self.assertEqual(scan.call_count, 5)
+                    # unchanged files are not scanned again
+                    self.assertEqual(get_required_registration([directory], index_file=index_file), first)
+                    self.assertEqual(scan.call_count, 5)
+
+                    # modified, new and deleted files
+                    yamlparser.NameSpace({"data": {"registry": "CHANGED"}, "name": "new"}, registry_key=None).save(files[0])
+                    yamlparser.NameSpace({"data": {"registry": "NEW"}}, registry_key=None).save(os.path.join(directory, "new.yaml"))
+                    os.remove(files[1])
+                    second = get_required_registration([directory], index_file=index_file)
+                    self.assertEqual(scan.call_count, 7)
+                    self.assertEqual(set(second.keys()), {"CHANGED", "NEW", "KEY2", "KEY3", "KEY4"})
+
+                    # rebuilding the index scans all files
+                    self.assertEqual(get_required_registration([directory], index_file=index_file, rebuild=True), second)
+                    self.assertEqual(scan.call_count, 12)
+
+                # the index is used by the registry parser
+                yamlparser.registry_parser(self.registry_file, command_line_options=["--collect", directory, "--rebuild"])
+                self.assertTrue(os.path.exists(index_file))
+
+                # indexes that cannot be written do not prevent collecting
+                with self.assertWarns(UserWarning):
+                    self.assertEqual(get_required_registration([directory], index_file=os.path.join(directory, "missing", "scan.json")), second)
+            finally:
+                if os.path.exists(index_file):
+                    os.remove(index_file)
+
+
+    def test_registry_scanner(self):
+        from yamlparser.scanner import scan_registry_keys, UnsupportedStructure
+        contents = [
+            "name: test\ndata:\n  registry: TEST_KEY\n  nested: {registry: 42}\n",
+            "registry: top\nx.y.registry: 'quoted'\nlist: [{registry: ignored}, 2]\nother:\n  registry:\n    registry: deep\n",
+            "a:\n  - x\nb:\n  c: [{d: 1}]\n  registry: null\n",
+            "",
+        ]
+        for content in contents:
+            namespace = yamlparser.NameSpace(yaml.safe_load(content) or {}, modifiable=False, registry_key=None)
+            expected = [(k,v) for k,v in namespace.attributes().items() if k.split(".")[-1] == "registry"]
+            self.assertEqual(scan_registry_keys(content), expected)
+
+        # structures that require to build the NameSpace
+        for content in ("a: {yaml: file.yaml}\n", "a.b: 1\na.c: 2\n", "a: &x {registry: 1}\nb: *x\n", "registry: [1, 2]\n"):
+            with self.assertRaises(UnsupportedStructure):
+                scan_registry_keys(content)
+
 
 
 if __name__ == "__main__":
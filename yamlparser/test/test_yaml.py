@@ -1,7 +1,11 @@
+import asyncio
 import yamlparser
 import os
+import subprocess
+import sys
 import tempfile
 import unittest
+import zipfile
 
 class TestYaml(unittest.TestCase):
 
@@ -25,6 +29,24 @@ class TestYaml(unittest.TestCase):
         with self.assertRaises(IOError):
             yamlparser.NameSpace("path/to/nowhere.yaml")
 
+    def test_import(self):
+        # import the package in a fresh interpreter and report the imported modules and the cumulative import time in microseconds
+        script = "import sys; import yamlparser; print(int('yaml' in sys.modules), int('argparse' in sys.modules))"
+        package_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        environment = dict(os.environ, PYTHONPATH=os.pathsep.join([package_dir, os.environ.get("PYTHONPATH", "")]))
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", script], capture_output=True, text=True, env=environment, check=True)
+        self.assertEqual(result.stdout.split(), ["0", "0"])
+        import_time = [int(line.split("|")[1]) for line in result.stderr.splitlines() if line.split("|")[-1].strip() == "yamlparser"]
+        self.assertEqual(len(import_time), 1)
+        self.assertLess(import_time[0], 50000)
+
+        # heavy modules are imported on first use
+        self.assertIsNotNone(yamlparser.NameSpace)
+        self.assertIn("yamlparser.namespace", sys.modules)
+        with self.assertRaises(AttributeError):
+            yamlparser.unknown_function
+
+
     def test_load_yaml_attributes(self):
         """test that all attributes and their values are loaded correctly from the yaml file"""
 
@@ -151,6 +173,33 @@ class TestYaml(unittest.TestCase):
         self.assertEqual(namespace.nested["new_email"], ["name@host.domain"])
 
 
+    def test_format_dependencies(self):
+        # chained references are resolved independently of the order of keys
+        namespace = yamlparser.NameSpace(dict(a="{b}", b="{nested.c}", nested=dict(c="{d}-{unknown}", d="{e}"), e=1))
+        self.assertEqual(namespace.format("{a}"), "1-{unknown}")
+        namespace.format_self()
+        self.assertEqual(namespace.a, "1-{unknown}")
+        self.assertEqual(namespace.b, "1-{unknown}")
+        self.assertEqual(namespace.nested.c, "1-{unknown}")
+        self.assertEqual(namespace.nested.d, "1")
+
+        # long chains of references are resolved without recursion
+        count = 50000
+        namespace = yamlparser.NameSpace({f"key{i}" : f"{{key{i+1}}}" for i in range(count)})
+        namespace[f"key{count}"] = "value"
+        namespace.format_self()
+        self.assertEqual(namespace.key0, "value")
+        self.assertEqual(namespace[f"key{count//2}"], "value")
+
+        # cycles are reported
+        namespace = yamlparser.NameSpace(dict(a="{b}", b="{nested.c}", nested=dict(c="{a}"), d="{d}"))
+        with self.assertRaises(ValueError) as context:
+            namespace.format_self()
+        self.assertIn("a -> b -> nested.c -> a", str(context.exception))
+        with self.assertRaises(ValueError):
+            namespace.format("{d}")
+
+
     def test_freeze(self):
         namespace = yamlparser.NameSpace(dict(name="Name", nested=dict(email="name@host.domain"), value=1.))
         # freeze the namespace
@@ -173,6 +222,545 @@ class TestYaml(unittest.TestCase):
         namespace.new_name = "New Name"
 
 
+    def test_attribute_index(self):
+        namespace = yamlparser.NameSpace(dict(name="Name", nested=dict(email="name@host.domain", deep=dict(value=1))))
+        expected = {"name": "Name", "nested.email": "name@host.domain", "nested.deep.value": 1}
+        self.assertEqual(namespace.attributes(), expected)
+
+        # the index is updated with all kinds of modifications, also of sub-namespaces
+        namespace.set("nested.deep.value", 2)
+        namespace.nested.deep.other = 3
+        namespace.nested["new"] = dict(a=4)
+        namespace.delete("nested.email")
+        namespace.update({"more.b": 5})
+        del namespace.name
+        expected = {"nested.deep.value": 2, "nested.deep.other": 3, "nested.new.a": 4, "more.b": 5}
+        self.assertEqual(namespace.attributes(), expected)
+        self.assertEqual(namespace.nested.attributes(), {"deep.value": 2, "deep.other": 3, "new.a": 4})
+
+        # replacing a sub-namespace removes its attributes
+        deep = namespace.nested.deep
+        namespace["nested"] = dict(c=6)
+        deep.value = 7
+        self.assertEqual(namespace.attributes(), {"nested.c": 6, "more.b": 5})
+        self.assertEqual(namespace.attributes(), yamlparser.NameSpace(namespace.dict()).attributes())
+        self.assertEqual(list(namespace.keys()), ["nested", "more"])
+
+        # pickled namespaces keep their index
+        import pickle
+        restored = pickle.loads(pickle.dumps(namespace))
+        restored.nested.d = 8
+        self.assertEqual(restored.attributes(), {"nested.c": 6, "more.b": 5, "nested.d": 8})
+
+        # dict and dump of frozen namespaces are memoized until unfreezing, and modifying the returned dictionaries does not affect them
+        namespace.freeze()
+        self.assertIsNot(namespace.dict(), namespace.dict())
+        self.assertIs(namespace.dump(), namespace.dump())
+        namespace.dict()["nested"]["c"] = 99
+        namespace.nested.dict()["c"] = 99
+        self.assertEqual(namespace.dict()["nested"]["c"], 6)
+        self.assertEqual(namespace.nested.dict()["c"], 6)
+        self.assertNotIn("99", namespace.dump())
+        mixed = yamlparser.NameSpace(dict(frozen=dict(v=1)))
+        mixed.frozen.freeze()
+        mixed.dict()["frozen"]["v"] = 99
+        self.assertEqual(mixed.frozen.dict()["v"], 1)
+        namespace.unfreeze()
+        namespace.nested.c = 9
+        self.assertEqual(namespace.dict()["nested"]["c"], 9)
+        self.assertIn("c: 9", namespace.dump())
+
+
+    def test_clone(self):
+        yaml_file = os.path.join(os.path.dirname(__file__), "test_config.yaml")
+        namespace = yamlparser.NameSpace(yaml_file)
+        namespace.nested["values"] = [1, 2, 3]
+        original = namespace.dump()
+
+        # sub-namespaces are shared until they are accessed
+        clone = namespace.clone()
+        self.assertIs(vars(clone)["nested"], namespace.nested)
+        self.assertEqual(clone.dump(), original)
+        self.assertEqual(clone.attributes(), namespace.attributes())
+
+        # modifications of the clone do not leak into the original
+        clone.set("nested.sub_nested.name", "changed")
+        clone.nested.another.dot.attribute = 0
+        clone["some"]["dot"].attribute = 1
+        clone.nested["values"].append(4)
+        clone.list_value.append(5)
+        clone.delete("nested.pi")
+        clone.update({"name": "changed"})
+        clone.new.value = 1
+        self.assertEqual(namespace.dump(), original)
+        self.assertEqual(clone.nested.sub_nested.name, "changed")
+        self.assertEqual(clone.nested["values"], [1, 2, 3, 4])
+        self.assertEqual(clone.attributes()["nested.another.dot.attribute"], 0)
+        self.assertNotIn("nested.pi", clone.attributes())
+        self.assertIsNot(clone.nested, namespace.nested)
+        self.assertIs(vars(clone.nested)["name"], vars(namespace.nested)["name"])
+
+        # modifications of the original do not leak into the clone
+        clone = namespace.clone()
+        clone.attributes()
+        held = namespace.nested.sub_nested
+        held.name = "changed"
+        namespace.some.dot.attribute = 0
+        namespace.delete("nested.another")
+        self.assertEqual(clone.nested.sub_nested.name, "subnested")
+        self.assertEqual(clone.some.dot.attribute, 42)
+        self.assertEqual(clone.nested.another.dot.attribute, 37)
+        self.assertEqual(clone.attributes()["nested.sub_nested.name"], "subnested")
+        self.assertEqual(namespace.attributes()["nested.sub_nested.name"], "changed")
+
+        # namespaces inside lists that contain keys named like functions of the namespace
+        items = yamlparser.NameSpace(dict(items=[dict(clone=1)])).clone()
+        self.assertEqual(items["items"][0].clone, 1)
+
+        # in-place modifications of lists in shared sub-namespaces of the original do not leak into the clone
+        namespace.nested.sub_nested["deep"] = [1]
+        earlier = namespace.clone()
+        namespace.nested["values"].append(99)
+        namespace.nested.sub_nested.deep.append(2)
+        namespace["nested"]["sub_nested"]["deep"].append(3)
+        self.assertEqual(earlier.nested["values"], [1, 2, 3])
+        self.assertEqual(earlier.nested.sub_nested.deep, [1])
+        self.assertEqual(namespace.nested.sub_nested.deep, [1, 2, 3])
+        self.assertIs(type(namespace.nested), yamlparser.NameSpace)
+
+        # clones of clones, and frozen clones
+        clone2 = clone.clone()
+        clone2.nested.name = "clone2"
+        clone.freeze()
+        with self.assertRaises(AttributeError):
+            clone.nested.name = "frozen"
+        self.assertEqual(clone.nested.name, "nested_test")
+        self.assertEqual(clone2.nested.name, "clone2")
+        namespace.nested.name = "original"
+        self.assertEqual(namespace.nested.name, "original")
+        self.assertEqual(clone.nested.name, "nested_test")
+        self.assertIsInstance(clone, yamlparser.NameSpace)
+
+
+    def test_sections(self):
+        """test loading selected top-level keys and parsing top-level keys lazily"""
+        from yamlparser.sections import find_sections
+        with tempfile.TemporaryDirectory() as directory:
+            sub_config = os.path.join(directory, "sub.yaml")
+            with open(sub_config, "w") as f:
+                f.write("trainer:\n  epochs: 10\n  name: trainer\n")
+            yaml_file = os.path.join(directory, "config.yaml")
+            with open(yaml_file, "w") as f:
+                f.write(f"# comment\nmodel:\n  depth: 18\n  layers: [1, 2,\n    3]\nmodel.width: 64\ntext: |\n  multi\n  line\ntrainer:\n  yaml: {sub_config}\n  epochs: 20\nmanifest:\n  - a\n  - b\nlast: end\n")
+            full = yamlparser.NameSpace(yaml_file)
+            sections = find_sections(yaml_file)[1]
+            self.assertEqual(list(sections), ["model", "text", "trainer", "manifest", "last"])
+            self.assertEqual(len(sections["model"]), 1)
+
+            # selected keys
+            namespace = yamlparser.NameSpace(yaml_file, select=["model", "trainer"])
+            self.assertEqual(namespace.dict(), dict(model=full.model.dict(), trainer=dict(epochs=20, name="trainer")))
+            self.assertEqual(yamlparser.NameSpace(full.dict(), select=["last"]).dict(), dict(last="end"))
+            with self.assertRaises(ValueError):
+                yamlparser.NameSpace(yaml_file, select=["model", "unknown"])
+
+            # lazy sections are parsed when they are accessed
+            namespace = yamlparser.NameSpace(yaml_file, lazy="sections")
+            self.assertEqual(namespace._loaded_attributes(), {})
+            self.assertEqual(namespace.model.width, 64)
+            self.assertEqual(set(namespace._loaded_attributes()), {"model.depth", "model.layers", "model.width"})
+            self.assertEqual(namespace.trainer.name, "trainer")
+            self.assertEqual(namespace.fingerprint(), full.fingerprint())
+            self.assertEqual(yamlparser.NameSpace(yaml_file, lazy="sections", select=["last"]).last, "end")
+
+            # changed files are detected
+            namespace = yamlparser.NameSpace(yaml_file, lazy="sections")
+            with open(yaml_file, "a") as f:
+                f.write("new: value\n")
+            with self.assertRaises(IOError):
+                namespace.model
+
+            # files that cannot be split are loaded completely
+            with open(yaml_file, "w") as f:
+                f.write("model: &model\n  depth: 18\ncopy: *model\n")
+            self.assertIsNone(find_sections(yaml_file))
+            self.assertEqual(yamlparser.NameSpace(yaml_file, select=["copy"]).dict(), dict(copy=dict(depth=18)))
+            self.assertEqual(yamlparser.NameSpace(yaml_file, lazy="sections").copy.depth, 18)
+
+    def test_sweep(self):
+        namespace = yamlparser.NameSpace({
+            "opt": {"lr": 0.1, "name": "lr{lr}"},
+            "model": {"depth": 18, "path": "{out}/{model.depth}"},
+            "out": "/tmp/{opt.name}",
+            "other": {"value": "{missing}", "list": [1, "{out}"]},
+            "data": {"size": 10},
+        })
+        original = namespace.dump()
+        parameters = {"opt.lr": [0.1, 0.01], "model.depth": [18, 50, 101], "missing": ["found"]}
+
+        # each variant is identical to a formatted clone with the overridden values
+        sweep = namespace.sweep(parameters)
+        self.assertEqual(len(sweep), 6)
+        count = 0
+        for values, variant in sweep.items():
+            expected = namespace.clone()
+            for key, value in values.items():
+                expected.set(key, value)
+            expected.format_self()
+            self.assertEqual(variant.fingerprint(), expected.fingerprint())
+            count += 1
+        self.assertEqual(count, 6)
+        self.assertEqual(namespace.dump(), original)
+        variants = list(sweep)
+        self.assertEqual(variants[-1].model.path, "/tmp/lr0.01/101")
+        self.assertEqual(variants[-1].other.list, [1, "/tmp/lr0.01"])
+        self.assertEqual(variants[0].other.value, "found")
+
+        # unmodified sub-namespaces are shared, and variants are independent
+        self.assertIs(vars(variants[0])["data"], vars(variants[1])["data"])
+        variants[0].opt.lr = 1
+        self.assertEqual(variants[1].opt.lr, 0.1)
+
+        # replaced sub-namespaces
+        variant = next(iter(namespace.sweep({"model": [{"depth": 1}]})))
+        self.assertEqual(variant.model.dict(), {"depth": 1})
+
+        # zip, random and unformatted sweeps
+        zipped = list(namespace.sweep({"opt.lr": [1, 2], "model.depth": [3, 4]}, mode="zip").combinations())
+        self.assertEqual(zipped, [{"opt.lr": 1, "model.depth": 3}, {"opt.lr": 2, "model.depth": 4}])
+        sampled = list(namespace.sweep(parameters, mode="random", count=4, seed=42).combinations())
+        self.assertEqual(len(sampled), 4)
+        self.assertEqual(len({tuple(values.values()) for values in sampled}), 4)
+        self.assertEqual(sampled, list(namespace.sweep(parameters, mode="random", count=4, seed=42).combinations()))
+        self.assertEqual(next(iter(namespace.sweep({"opt.lr": [1]}, auto_format=False))).out, "/tmp/{opt.name}")
+        with self.assertRaises(ValueError):
+            namespace.sweep({"opt.lr": [1, 2], "model.depth": [3]}, mode="zip")
+        with self.assertRaises(ValueError):
+            namespace.sweep(parameters, mode="random", count=7)
+        with self.assertRaises(ValueError):
+            namespace.sweep(parameters, mode="unknown")
+
+        # variants of frozen namespaces are frozen
+        namespace.freeze()
+        variant = next(iter(namespace.sweep({"opt.lr": [1]})))
+        self.assertEqual(variant.opt.name, "lr1")
+        with self.assertRaises(AttributeError):
+            variant.opt.lr = 2
+
+        # writing variant files
+        with tempfile.TemporaryDirectory() as directory:
+            paths = namespace.sweep({"opt.lr": [1, 2, 3]}).save(os.path.join(directory, "variants"))
+            self.assertEqual([os.path.basename(path) for path in paths], ["variant_0.yaml", "variant_1.yaml", "variant_2.yaml"])
+            self.assertEqual(yamlparser.NameSpace(paths[2]).opt.name, "lr3")
+
+            # keys that are named like functions of the namespace do not affect sweeps
+            shadowing = yamlparser.NameSpace(dict(get=1, set=2, freeze=3, save=4, a=dict(b="{a.c}", c=1)), modifiable=False)
+            paths = shadowing.sweep({"a.c": [2]}, auto_format=False).save(os.path.join(directory, "shadowing"))
+            self.assertEqual(yamlparser.NameSpace(paths[0]).a.c, 2)
+        variant = next(iter(yamlparser.NameSpace(dict(get=1, a=dict(b="{a.c}", c=1))).sweep({"a.c": [2]})))
+        self.assertEqual(variant.a.b, "2")
+
+    def test_lazy(self):
+        yaml_file = os.path.join(os.path.dirname(__file__), "test_config.yaml")
+        yamlparser.reset_loaded_file_count()
+        namespace = yamlparser.NameSpace(dict(
+            name="Name",
+            nested={"yaml": yaml_file, "name": "new_name"},
+        ), lazy=True)
+        self.assertEqual(yamlparser.get_loaded_file_count(), 0)
+        self.assertIn("nested", namespace.keys())
+
+        # accessing the sub-configuration loads it and applies the overwrites
+        self.assertEqual(namespace.nested.name, "new_name")
+        self.assertEqual(namespace.nested.sub_nested.name, "subnested")
+        self.assertEqual(yamlparser.get_loaded_file_count(), 1)
+        self.assertEqual(namespace["nested"].pi, 3.14159265)
+        self.assertEqual(yamlparser.get_loaded_file_count(), 1)
+
+        # functions on the whole configuration load everything
+        namespace = yamlparser.NameSpace(dict(nested={"yaml": yaml_file}), lazy=True)
+        clone = namespace.clone()
+        namespace.freeze()
+        self.assertEqual(yamlparser.get_loaded_file_count(), 1)
+        self.assertEqual(namespace.attributes()["nested.pi"], 3.14159265)
+        self.assertEqual(yamlparser.get_loaded_file_count(), 2)
+        with self.assertRaises(AttributeError):
+            namespace.nested.pi = 3
+        self.assertEqual(clone.dict(), namespace.dict())
+        self.assertEqual(yamlparser.get_loaded_file_count(), 3)
+
+
+    def test_reload(self):
+        with tempfile.TemporaryDirectory() as directory:
+            def write(name, content):
+                path = os.path.join(directory, name)
+                yamlparser.NameSpace(content, sub_config_key=None).save(path)
+                # make sure that the modification time changes
+                write.time += 10**9
+                os.utime(path, ns=(write.time, write.time))
+                return path
+            write.time = os.stat(directory).st_mtime_ns
+
+            deep = write("deep.yaml", dict(deeper=dict(x=1)))
+            sub = write("sub.yaml", dict(nested=dict(value=1, deeper={"yaml": deep})))
+            item = write("item.yaml", dict(items=dict(y=1)))
+            main = write("main.yaml", dict(name="Name", nested={"yaml": sub, "extra": 2}, items=[{"yaml": item}, 3]))
+
+            namespace = yamlparser.NameSpace(main)
+            self.assertEqual(namespace.sources(), {"": [main], "nested": [sub], "nested.deeper": [deep], "items": [item]})
+            self.assertEqual(namespace.reload(), set())
+
+            # only the changed sub-configuration is loaded again
+            write("deep.yaml", dict(deeper=dict(x=2, z=3)))
+            yamlparser.reset_loaded_file_count()
+            nested = namespace.nested
+            self.assertEqual(namespace.reload(), {"nested.deeper.x", "nested.deeper.z"})
+            self.assertEqual(yamlparser.get_loaded_file_count(), 1)
+            self.assertIs(namespace.nested, nested)
+            self.assertEqual(namespace.nested.deeper.x, 2)
+            self.assertEqual(namespace.attributes()["nested.deeper.z"], 3)
+
+            # overwrites of the referencing file are applied again
+            write("sub.yaml", dict(nested=dict(value=4, extra=5, deeper={"yaml": deep})))
+            self.assertEqual(namespace.reload(), {"nested.value"})
+            self.assertEqual(namespace.nested.extra, 2)
+            self.assertEqual(namespace.nested.deeper.x, 2)
+
+            # lists of sub-configurations are loaded again as a whole
+            write("item.yaml", dict(items=dict(y=2)))
+            self.assertEqual(namespace.reload(), {"items"})
+            self.assertEqual(namespace["items"][0].y, 2)
+
+            # changes of the main file replace everything, but do not affect clones
+            clone = namespace.clone()
+            namespace.set("name", "Changed")
+            write("main.yaml", dict(name="Other", nested={"yaml": sub}))
+            self.assertEqual(namespace.reload(), {"name", "nested.extra", "items"})
+            self.assertEqual(namespace.name, "Other")
+            self.assertNotIn("items", namespace.keys())
+            self.assertEqual(clone.nested.extra, 2)
+            self.assertEqual(clone.sources()["items"], [item])
+
+            # setting a value removes its source
+            namespace.nested = dict(value=1)
+            self.assertNotIn("nested", namespace.sources())
+
+            namespace.freeze()
+            self.assertRaises(AttributeError, namespace.reload)
+
+            # invalid files do not change the namespace, and loading is tried again
+            valid = write("valid.yaml", dict(name="first", nested=dict(value=1)))
+            reloader = yamlparser.Reloader(yamlparser.NameSpace(valid))
+            config = reloader.config
+            with open(valid, "w") as f:
+                f.write("name: [unterminated\n")
+            write.time += 10**9
+            os.utime(valid, ns=(write.time, write.time))
+            with self.assertRaises(Exception):
+                reloader.reload()
+            self.assertIs(reloader.config, config)
+            self.assertEqual(reloader.namespace.dict(), dict(name="first", nested=dict(value=1)))
+            self.assertEqual(reloader.namespace.sources(), {"": [valid]})
+            self.assertEqual(reloader.changed_files(), [os.path.realpath(valid)])
+            write("valid.yaml", dict(name="second", nested=dict(value=1)))
+            self.assertEqual(reloader.reload(), {"name"})
+            self.assertEqual(reloader.config.dict(), dict(name="second", nested=dict(value=1)))
+            self.assertEqual(reloader.namespace.sources(), {"": [valid]})
+
+            # keys that are named like functions of the namespace do not affect reloading
+            functions = dict(diff=1, reload=2, keys=3, update=4, clone=5, format_self=6, freeze=7)
+            shadowing = write("shadowing.yaml", dict(functions, value=1))
+            reloader = yamlparser.Reloader(yamlparser.NameSpace(shadowing), overrides={"value": 3})
+            write("shadowing.yaml", dict(functions, value=2, name="{reload}"))
+            self.assertEqual(reloader.reload(), {"name"})
+            self.assertEqual(reloader.config.name, "2")
+
+
+    def test_prefetch(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # a tree of sub-configurations with overwrites, lists and duplicate includes
+            leaves = []
+            for i in range(20):
+                leaves.append(os.path.join(directory, f"leaf{i}.yaml"))
+                yamlparser.NameSpace({f"leaf{i}": dict(value=i, name=f"leaf{i}")}).save(leaves[-1])
+            middle = []
+            for i in range(4):
+                middle.append(os.path.join(directory, f"middle{i}.yaml"))
+                content = {f"leaf{j}": {"yaml": leaves[j], "name": f"overwritten{i}"} for j in range(i*5, i*5+5)}
+                content["shared"] = {"yaml": leaves[0]}
+                yamlparser.NameSpace({f"middle{i}": content}, sub_config_key=None).save(middle[-1])
+            main = os.path.join(directory, "main.yaml")
+            yamlparser.NameSpace(dict(name="main", middle=[{"yaml": m} for m in middle[:2]], **{f"middle{i}": {"yaml": middle[i]} for i in range(2, 4)}), sub_config_key=None).save(main)
+
+            yamlparser.get_file_cache().clear()
+            yamlparser.reset_loaded_file_count()
+            expected = yamlparser.NameSpace(main)
+            count = yamlparser.get_loaded_file_count()
+
+            # all files are read by several threads
+            yamlparser.get_file_cache().clear()
+            yamlparser.reset_loaded_file_count()
+            with yamlparser.collect_stats() as collector:
+                namespace = yamlparser.NameSpace(main, jobs=8)
+            self.assertEqual(namespace.dict(), expected.dict())
+            self.assertEqual(yamlparser.get_loaded_file_count(), count)
+            reads = [event for event in collector.events if event[1] == "read"]
+            self.assertEqual(len(reads), 25)
+            self.assertGreater(len({event[4] for event in reads}), 1)
+
+            # the same with asyncio
+            yamlparser.get_file_cache().clear()
+            namespace = asyncio.run(yamlparser.NameSpace.aload(main))
+            self.assertEqual(namespace.dict(), expected.dict())
+            self.assertEqual(namespace.sources(), expected.sources())
+
+            # files that are loaded later are still read in the order of the command line
+            prefetched = yamlparser.prefetch_files([main, "unknown.yaml"], recursive=False)
+            self.assertEqual(list(prefetched), [os.path.realpath(main)])
+            command_line_options = [main, f"extra={leaves[1]}={leaves[2]}", middle[0], "--name", "changed"]
+            namespace = yamlparser.config_parser(command_line_options=command_line_options, store_config=False, jobs=4)
+            self.assertEqual(namespace.dict(), yamlparser.config_parser(command_line_options=command_line_options, store_config=False).dict())
+            self.assertEqual(namespace.extra.leaf2.value, 2)
+            self.assertEqual(namespace.middle0.leaf0.name, "overwritten0")
+
+            # errors are raised when loading
+            with open(leaves[3], "w") as f:
+                f.write("invalid: [")
+            self.assertRaises(Exception, yamlparser.NameSpace, main, jobs=4)
+
+
+    def test_fingerprint(self):
+        content = dict(name="Name", nested=dict(email="name@host.domain", deeper=dict(number=1, values=[1, dict(a=2)])))
+        namespace = yamlparser.NameSpace(content)
+        fingerprint = namespace.fingerprint()
+
+        # the fingerprint is stable and does not depend on the order of keys, but on types
+        self.assertEqual(yamlparser.NameSpace(dict(reversed(content.items()))).fingerprint(), fingerprint)
+        self.assertEqual(namespace.clone().fingerprint(), fingerprint)
+        self.assertNotEqual(yamlparser.NameSpace(dict(a=1)).fingerprint(), yamlparser.NameSpace(dict(a=1.)).fingerprint())
+        self.assertNotEqual(yamlparser.NameSpace(dict(a=dict(b=1))).fingerprint(), yamlparser.NameSpace({"a.b": "1"}).fingerprint())
+        self.assertNotEqual(yamlparser.NameSpace(dict(a=[1,2])).fingerprint(), yamlparser.NameSpace(dict(a=[[1],2])).fingerprint())
+
+        # unordered values have the same fingerprint in all processes
+        script = "import yamlparser; print(yamlparser.NameSpace(dict(s={'alpha', 'beta', 'gamma', 'delta', ('x', frozenset('yz'))})).fingerprint())"
+        package_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        fingerprints = set()
+        for seed in ("1", "2", "3"):
+            environment = dict(os.environ, PYTHONHASHSEED=seed, PYTHONPATH=os.pathsep.join([package_dir, os.environ.get("PYTHONPATH", "")]))
+            fingerprints.add(subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, env=environment, check=True).stdout)
+        self.assertEqual(len(fingerprints), 1)
+        self.assertNotEqual(yamlparser.NameSpace(dict(s={"a", "b"})).fingerprint(), yamlparser.NameSpace(dict(s=["a", "b"])).fingerprint())
+
+        # modifications change the fingerprint of the namespace and its parents, but not of its siblings
+        email = namespace.nested.email
+        namespace.nested.deeper.number = 2
+        self.assertNotEqual(namespace.fingerprint(), fingerprint)
+        namespace.set("nested.deeper.number", 1)
+        self.assertEqual(namespace.fingerprint(), fingerprint)
+        namespace.delete("nested.email")
+        self.assertNotEqual(namespace.fingerprint(), fingerprint)
+        namespace.nested.email = email
+        self.assertEqual(namespace.fingerprint(), fingerprint)
+
+        # clones are not affected by modifications of the original
+        clone = namespace.clone()
+        namespace.nested.deeper.number = 3
+        self.assertEqual(clone.fingerprint(), fingerprint)
+        self.assertNotEqual(clone.fingerprint(), namespace.fingerprint())
+
+        # modifiable namespaces are compared and hashed by identity, frozen namespaces by their contents
+        other = yamlparser.NameSpace(content)
+        self.assertNotEqual(clone, other)
+        self.assertEqual(len({other, clone, other}), 2)
+        self.assertNotEqual(other, content)
+        other.freeze()
+        self.assertNotEqual(clone, other)
+        clone.freeze()
+        self.assertEqual(clone, other)
+        self.assertEqual(hash(other), hash(clone))
+        self.assertEqual(len({other, clone}), 1)
+
+        # differences
+        self.assertEqual(other.diff(clone), set())
+        self.assertEqual(namespace.diff(other), {"nested.deeper.number"})
+        namespace.nested["extra"] = dict(a=1, b=2)
+        namespace["name"] = dict(first="Name")
+        namespace.delete("nested.deeper.values")
+        self.assertEqual(namespace.diff(other), {"name", "name.first", "nested.deeper.number", "nested.deeper.values", "nested.extra.a", "nested.extra.b"})
+        self.assertEqual(other.diff(namespace), namespace.diff(other))
+
+        # in-place modifications of lists and of namespaces inside lists are detected
+        first, second = yamlparser.NameSpace(dict(x=[1,2], l=[dict(q=1)])), yamlparser.NameSpace(dict(x=[1,2], l=[dict(q=1)]))
+        self.assertEqual(first.fingerprint(), second.fingerprint())
+        first.x.append(3)
+        self.assertNotEqual(first.fingerprint(), second.fingerprint())
+        self.assertEqual(first.diff(second), {"x"})
+        first.x.pop()
+        first.l[0].q = 5
+        self.assertNotEqual(first.fingerprint(), second.fingerprint())
+        self.assertEqual(first.diff(second), {"l"})
+
+        # frozen namespaces cache their hashes until they are unfrozen
+        first.freeze()
+        fingerprint = first.fingerprint()
+        first.unfreeze()
+        first.l[0].q = 1
+        self.assertEqual(first.fingerprint(), second.fingerprint())
+        self.assertNotEqual(first.fingerprint(), fingerprint)
+
+
+    def test_compile(self):
+        yaml_file = os.path.join(os.path.dirname(__file__), "test_config.yaml")
+        namespace = yamlparser.NameSpace(yaml_file)
+        namespace["my-key"] = dict(items=1)
+        compiled = namespace.freeze(compact=True)
+        self.assertIsInstance(compiled, yamlparser.FrozenNameSpace)
+        self.assertFalse(namespace._modifiable)
+
+        # the read API is identical
+        self.assertEqual(compiled.nested.sub_nested.e, 2.7182)
+        self.assertEqual(compiled["nested"]["sub_nested"]["name"], "subnested")
+        self.assertEqual(compiled["my-key"]["items"], 1)
+        self.assertEqual(compiled.list_value, (10, 42, 101))
+        self.assertEqual(list(compiled.keys()), list(namespace.keys()))
+        self.assertEqual(compiled.attributes(), namespace.attributes())
+        self.assertEqual(compiled.dict(), namespace.dict())
+        # modifying the returned containers does not affect the memoized ones
+        compiled.dict()["nested"]["name"] = "modified"
+        compiled.attributes()["list_value"].append(0)
+        self.assertEqual(compiled.dict(), namespace.dict())
+        self.assertEqual(compiled.attributes(), namespace.attributes())
+        self.assertEqual(compiled.dump(), namespace.dump())
+        # keys that are named like functions of the namespace
+        self.assertEqual(yamlparser.NameSpace(dict(compile=1)).freeze(compact=True)["compile"], 1)
+        self.assertEqual(compiled.format("{nested.name}"), "nested_test")
+        with self.assertRaises(AttributeError):
+            compiled.unknown
+        with self.assertRaises(KeyError):
+            compiled["unknown"]
+
+        # compiled namespaces are immutable and hashable
+        with self.assertRaises(AttributeError):
+            compiled.name = "New Name"
+        with self.assertRaises(AttributeError):
+            compiled.nested.pi = 3
+        self.assertEqual(compiled, namespace.compile())
+        self.assertEqual(hash(compiled), hash(namespace.compile()))
+        self.assertNotEqual(compiled, yamlparser.NameSpace(dict(name="test")).compile())
+        self.assertEqual(len({compiled, namespace.compile()}), 1)
+
+        # namespaces with the same keys share their class, and compiled namespaces can be pickled
+        self.assertIs(type(compiled.nested.another), type(compiled.some))
+        import pickle
+        self.assertEqual(pickle.loads(pickle.dumps(compiled)), compiled)
+
+        # a modifiable copy can be obtained
+        clone = compiled.clone()
+        clone.name = "New Name"
+        self.assertEqual(compiled.name, "test")
+        self.assertEqual(clone.list_value, [10, 42, 101])
+
+
     def test_sub_namespace_override(self):
         """test loading a subnamespace and overriding values in a sub-namespace"""
         # create a namespace that loads another yaml file
@@ -227,6 +815,58 @@ class TestYaml(unittest.TestCase):
         self.assertFalse(hasattr(namespace["nested"], "email"))
 
 
+    def test_path(self):
+
+        namespace = yamlparser.NameSpace(dict(name="Name", nested=dict(email="name@host.domain", deeper=dict(number=1))))
+
+        path = yamlparser.NameSpace.path("nested.deeper.number")
+        self.assertIs(path, yamlparser.NameSpace.path("nested.deeper.number"))
+        self.assertEqual(path.get(namespace), 1)
+        self.assertTrue(path.exists(namespace))
+        path.set(namespace, 2)
+        self.assertEqual(namespace.nested.deeper.number, 2)
+        self.assertEqual(namespace.attributes()["nested.deeper.number"], 2)
+
+        # get with defaults
+        self.assertEqual(namespace.get("nested.email"), "name@host.domain")
+        self.assertIsInstance(namespace.get("nested.deeper"), yamlparser.NameSpace)
+        self.assertIsNone(namespace.get("nested.unknown"))
+        self.assertEqual(namespace.get("name.unknown", 3), 3)
+        self.assertEqual(namespace.get("_modifiable", 4), 4)
+        self.assertFalse(yamlparser.NameSpace.path("nested.unknown").exists(namespace))
+
+        # values that are indexed like NumPy arrays behave like lists
+        class Indexed:
+            def __getitem__(self, key):
+                raise IndexError("only integers are valid indices")
+        namespace.indexed = Indexed()
+        self.assertEqual(namespace.get("nested.email.unknown", 5), 5)
+        self.assertEqual(namespace.get("indexed.unknown", 5), 5)
+        self.assertFalse(yamlparser.NameSpace.path("indexed.unknown").exists(namespace))
+        namespace.delete("indexed")
+
+        # missing sub-namespaces are created when setting values
+        yamlparser.NameSpace.path("new.sub.value").set(namespace, dict(a=1))
+        self.assertEqual(namespace.new.sub.value.a, 1)
+        self.assertRaises(AttributeError, yamlparser.NameSpace.path("name.sub").set, namespace, 1)
+
+        path.delete(namespace)
+        self.assertFalse(path.exists(namespace))
+        self.assertRaises(AttributeError, path.delete, namespace)
+
+        # clones are not affected by setting values in the original
+        clone = namespace.clone()
+        path.set(namespace, 5)
+        self.assertFalse(path.exists(clone))
+        self.assertEqual(path.get(namespace), 5)
+
+        # frozen namespaces cannot be modified, but read via paths
+        namespace.freeze()
+        self.assertRaises(AttributeError, path.set, namespace, 6)
+        self.assertRaises(AttributeError, path.delete, namespace)
+        self.assertEqual(path.get(namespace.compile()), 5)
+
+
     def test_nested_lists(self):
 
         # check that nested lists are handled correctly, i.e., transformed to NameSpaces
@@ -269,6 +909,153 @@ class TestYaml(unittest.TestCase):
         self.assertTrue("sub_nested" in namespace.nested[1].keys())
 
 
+    def test_backends(self):
+        """test that all YAML backends produce identical namespaces"""
+        yaml_file = os.path.join(os.path.dirname(__file__), "test_config.yaml")
+        default_backend = yamlparser.get_yaml_backend()
+        self.assertIn(default_backend, yamlparser.available_yaml_backends())
+
+        try:
+            dumps = []
+            for backend in yamlparser.available_yaml_backends():
+                yamlparser.set_yaml_backend(backend)
+                self.assertEqual(yamlparser.get_yaml_backend(), backend)
+                namespace = yamlparser.NameSpace(yaml_file)
+                dumps.append(namespace.dump())
+                # per-call selection of backends
+                for other in yamlparser.available_yaml_backends():
+                    self.assertEqual(namespace.load(yaml_file, backend=other), namespace.load(yaml_file))
+                    self.assertEqual(namespace.dump(backend=other), dumps[-1])
+            self.assertTrue(all(dump == dumps[0] for dump in dumps))
+        finally:
+            yamlparser.set_yaml_backend("auto")
+        self.assertEqual(yamlparser.get_yaml_backend(), default_backend)
+
+        with self.assertRaises(ValueError):
+            yamlparser.set_yaml_backend("unknown")
+
+    def test_array_storage(self):
+        """test that long numeric lists can be stored as arrays"""
+        import array
+        config = dict(weights=[0.5, 1.5, 2.5, 3.5], ids=[1, 2, 3, 4], mixed=[1, 2.5, 3, 4], short=[1.5], names=["{ids}", "b", "c", "d"], nested=dict(values=[1., 2., 3., 4.]))
+        expected = yamlparser.NameSpace(config)
+        self.assertIsNone(yamlparser.get_array_storage())
+        try:
+            yamlparser.set_array_storage("array", min_size=2)
+            self.assertEqual(yamlparser.get_array_storage(), "array")
+            for namespace in (yamlparser.NameSpace(config), yamlparser.NameSpace(expected.dict())):
+                self.assertIsInstance(namespace.weights, array.array)
+                self.assertIsInstance(namespace.ids, array.array)
+                self.assertIsInstance(namespace.nested["values"], array.array)
+                self.assertIsInstance(namespace.mixed, list)
+                self.assertIsInstance(namespace.short, list)
+                self.assertIsInstance(namespace.names, list)
+                # exports and hashes are identical to lists
+                self.assertEqual(namespace.dict(), expected.dict())
+                self.assertEqual(namespace.dump(), expected.dump())
+                self.assertEqual(namespace.fingerprint(), expected.fingerprint())
+                self.assertEqual(namespace.compile(), expected.compile())
+                self.assertEqual(namespace.format("{weights}"), "[0.5, 1.5, 2.5, 3.5]")
+                namespace.format_self()
+                self.assertEqual(namespace.names[0], "[1, 2, 3, 4]")
+
+            # clones own their arrays, and assigned lists are converted
+            clone = namespace.clone()
+            clone.weights[0] = 0.
+            self.assertEqual(namespace.weights[0], 0.5)
+            clone.ids = [5, 6, 7]
+            self.assertEqual(clone.ids, array.array("q", [5, 6, 7]))
+            self.assertEqual(namespace.diff(clone), {"weights", "ids"})
+
+            # cached files are parsed again for a different storage
+            with tempfile.TemporaryDirectory() as directory:
+                yaml_file = os.path.join(directory, "config.yaml")
+                expected.save(yaml_file)
+                self.assertIsInstance(yamlparser.NameSpace(yaml_file).weights, array.array)
+                # command line options overwrite arrays with lists of the same type
+                parsed = yamlparser.config_parser(command_line_options=[yaml_file, "--weights", "1", "2", "--ids", "3", "4"], store_config=False)
+                self.assertEqual(parsed.weights, array.array("d", [1., 2.]))
+                self.assertEqual(parsed.ids, array.array("q", [3, 4]))
+                yamlparser.set_array_storage(None)
+                self.assertIsInstance(yamlparser.NameSpace(yaml_file).weights, list)
+        finally:
+            yamlparser.set_array_storage(None)
+
+        with self.assertRaises(ValueError):
+            yamlparser.set_array_storage("unknown")
+
+    def test_file_cache(self):
+        """test that parsed files are cached, copied and invalidated"""
+        cache = yamlparser.get_file_cache()
+        cache.clear()
+        yaml_file = os.path.join(os.path.dirname(__file__), "test_config.yaml")
+
+        # loading the same sub-config several times parses the file only once
+        namespace = yamlparser.NameSpace(dict(nested=[{"yaml": yaml_file}] * 3))
+        self.assertEqual(cache.info()["misses"], 1)
+        self.assertEqual(cache.info()["hits"], 2)
+
+        # modifying one namespace does not corrupt the others or the cache
+        namespace.nested[0].name = "modified"
+        self.assertEqual(namespace.nested[1].name, "nested_test")
+        loaded = yamlparser.NameSpace(yaml_file)
+        loaded.list_value.append(12)
+        self.assertEqual(yamlparser.NameSpace(yaml_file).list_value, [10, 42, 101])
+
+        # changed files are parsed again
+        try:
+            file_descriptor,filename = tempfile.mkstemp(".yaml")
+            yamlparser.NameSpace(dict(name="Name")).save(filename)
+            self.assertEqual(yamlparser.NameSpace(filename).name, "Name")
+            with open(filename, "w") as f:
+                f.write("name: Other Name\n")
+            self.assertEqual(yamlparser.NameSpace(filename).name, "Other Name")
+        finally:
+            os.close(file_descriptor)
+            os.remove(filename)
+
+        # least recently used files are evicted
+        cache.resize(1)
+        self.assertEqual(len(cache), 1)
+        self.assertNotIn(yaml_file, cache)
+        cache.resize(128)
+        cache.clear()
+        self.assertEqual(cache.info(), dict(hits=0, misses=0, size=0, maxsize=128))
+
+    def test_package_resources(self):
+        """test the resource index of packages, including zipped packages"""
+        from yamlparser.resources import get_resource_index, invalidate_resource_index
+        invalidate_resource_index()
+        index = get_resource_index("yamlparser")
+        self.assertIs(get_resource_index("yamlparser"), index)
+        self.assertEqual(len(index.candidates("test_config.yaml")), 1)
+        self.assertEqual(len(index.candidates("test/test_config.yaml")), 1)
+        # partial file names are still matched as before
+        self.assertEqual(len(index.candidates("_config.yaml")), 3)
+        self.assertEqual(len(index.candidates("sub_config.yaml")), 1)
+        with self.assertRaises(ValueError):
+            yamlparser.NameSpace("yamlparser @ unknown.yaml")
+
+        # create a zipped package
+        directory = tempfile.mkdtemp()
+        zip_file = os.path.join(directory, "zipped.zip")
+        with zipfile.ZipFile(zip_file, "w") as z:
+            z.writestr("zipped_package/__init__.py", "")
+            z.writestr("zipped_package/configs/zipped.yaml", "name: zipped\nnested:\n  yaml: zipped_package @ sub.yaml\n")
+            z.writestr("zipped_package/configs/sub.yaml", "nested:\n  value: 42\n")
+        sys.path.insert(0, zip_file)
+        try:
+            namespace = yamlparser.NameSpace("zipped_package @ zipped.yaml")
+            self.assertEqual(namespace.name, "zipped")
+            self.assertEqual(namespace.nested.value, 42)
+            self.assertEqual(len(yamlparser.list_config_files("zipped_package")), 2)
+        finally:
+            sys.path.remove(zip_file)
+            sys.modules.pop("zipped_package", None)
+            invalidate_resource_index("zipped_package")
+            os.remove(zip_file)
+            os.rmdir(directory)
+
 
 if __name__ == "__main__":
     unittest.main()